@@ -1,4 +1,5 @@
 # flake8: noqa
 from .adapters import AutoExtractAdapter
+from .async_pages import *
 from .page_inputs import *
 from .pages import *
@@ -1,10 +1,26 @@
 from types import MappingProxyType
-from typing import Any, Iterator, KeysView
+from typing import Any, Dict, Iterator, KeysView, Tuple
+from weakref import WeakKeyDictionary
 
+import attr
 from itemadapter.adapter import AttrsAdapter
 
 from autoextract_poet.items import Item
 
+# Caches the fields of every item class: the attr.s fields by name, and
+# their names in definition order
+CLASS_FIELDS: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def get_class_fields(cls: type) -> Tuple[Dict[str, attr.Attribute], Tuple[str, ...]]:
+    """Return the attr.s fields of ``cls`` by name and the tuple of their
+    names, computed once per class."""
+    fields = CLASS_FIELDS.get(cls)
+    if fields is None:
+        fields_dict = attr.fields_dict(cls)
+        fields = CLASS_FIELDS[cls] = (fields_dict, tuple(fields_dict))
+    return fields
+
 
 class AutoExtractAdapter(AttrsAdapter):
     """
@@ -28,7 +44,10 @@ class AutoExtractAdapter(AttrsAdapter):
     """
 
     def __init__(self, item: Any) -> None:
-        super().__init__(item)
+        # The fields are looked up in the per-class cache instead of being
+        # collected for every adapter, as AttrsAdapter.__init__ does
+        self.item = item
+        self._fields_dict, self._field_names = get_class_fields(item.__class__)
 
     @classmethod
     def is_item(cls, item: Any) -> bool:
@@ -41,13 +60,17 @@ class AutoExtractAdapter(AttrsAdapter):
             return MappingProxyType({})
 
     def field_names(self) -> KeysView:
-        return KeysView({**self._fields_dict, **self.item._unknown_fields_dict})
+        unknown = self.item._unknown_fields
+        if not unknown:
+            return KeysView(self._fields_dict)
+        return KeysView({**self._fields_dict, **unknown})
 
     def __getitem__(self, field_name: str) -> Any:
         if field_name in self._fields_dict:
             return getattr(self.item, field_name)
-        elif field_name in self.item._unknown_fields_dict:
-            return self.item._unknown_fields_dict[field_name]
+        unknown = self.item._unknown_fields
+        if unknown and field_name in unknown:
+            return unknown[field_name]
         raise KeyError(field_name)
 
     def __setitem__(self, field_name: str, value: Any) -> None:
@@ -62,14 +85,20 @@ class AutoExtractAdapter(AttrsAdapter):
                 delattr(self.item, field_name)
             except AttributeError:
                 raise KeyError(field_name)
-        elif field_name in self.item._unknown_fields_dict:
-            del self.item._unknown_fields_dict[field_name]
+        elif self.item._unknown_fields and field_name in self.item._unknown_fields:
+            del self.item._unknown_fields[field_name]
         else:
             raise KeyError(
                 f"Object of type {self.item.__class__.__name__} does not contain a field with name {field_name}"
             )
 
     def __iter__(self) -> Iterator:
-        fields = [attr for attr in self._fields_dict if hasattr(self.item, attr)]
-        fields.extend(attr for attr in self.item._unknown_fields_dict if attr not in fields)
+        item = self.item
+        fields = [name for name in self._field_names if hasattr(item, name)]
+        unknown = item._unknown_fields
+        if unknown:
+            # Unknown fields shadowed by a known one are skipped, unless the
+            # latter has been deleted
+            known = self._fields_dict
+            fields.extend(name for name in unknown if name not in known or not hasattr(item, name))
         return iter(fields)
@@ -0,0 +1,270 @@
+"""
+Random access to AutoExtract results archived in JSON lines files.
+
+Large archives of AutoExtract responses are usually kept as JSON lines
+files, whose lines are responses (JSON arrays) or single results. Reading a
+few results by URL from them, e.g. to replay extractions for a handful of
+pages, shouldn't require parsing whole files. :class:`ResponseArchive`
+memory-maps the files and keeps an index from the URL requested to the
+position of its result::
+
+    archive = ResponseArchive(["dump-1.jsonl", "dump-2.jsonl"], "dumps.index")
+    page_input = archive.get("https://example.com/product/1")
+
+Only the line with the result is parsed when reading it, straight from the
+memory map, with :mod:`autoextract_poet.json_backends`.
+
+The index is stored in the SQLite database ``index_path`` (in memory by
+default), so it is built once: files are scanned again only if their size
+or modification time changed since they were indexed, and the index is
+updated when the archive is opened (or with
+:meth:`ResponseArchive.update_index`). Building it parses every line once.
+
+Only results which can be read are indexed: those with the URL requested
+(see :func:`~.get_result_url`), a known page type and its data, and without
+errors. When a URL was archived several times, the last one is returned.
+"""
+
+import mmap
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import attr
+
+from autoextract_poet import json_backends, registry
+from autoextract_poet.page_inputs import (
+    AutoExtractData,
+    get_page_input_class,
+    get_page_type,
+    get_result_url,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    url TEXT NOT NULL,
+    page_type TEXT NOT NULL,
+    file INTEGER NOT NULL REFERENCES files (id),
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    position INTEGER
+);
+CREATE INDEX IF NOT EXISTS records_url ON records (url, page_type);
+CREATE INDEX IF NOT EXISTS records_file ON records (file);
+"""
+
+# SQLite limits the number of parameters of a query
+_BATCH_SIZE = 400
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class Location:
+    """Where a result is archived"""
+
+    path: str
+    #: Position in bytes of the line of the result in the file
+    offset: int
+    #: Length in bytes of the line, without the line break
+    length: int
+    #: Index of the result in the response of the line, or ``None`` if the
+    #: line is a single result
+    position: Optional[int]
+    page_type: str
+
+
+class ResponseArchive:
+    """AutoExtract results archived in the JSON lines files ``paths``,
+    indexed by URL in the SQLite database ``index_path`` (in memory by
+    default). See :mod:`autoextract_poet.archive`."""
+
+    def __init__(self, paths: Iterable[str], index_path: str = ":memory:"):
+        self.paths = list(dict.fromkeys(os.path.abspath(os.fspath(path)) for path in paths))
+        self.index_path = index_path
+        self._maps: Dict[str, mmap.mmap] = {}
+        # Ids of the files of the archive in the index, mapped to their
+        # paths. The index could be shared with other archives
+        self._files: Dict[int, str] = {}
+        self._order = {path: idx for idx, path in enumerate(self.paths)}
+        self._conn = sqlite3.connect(index_path)
+        self._conn.executescript(_SCHEMA)
+        self.update_index()
+
+    def __enter__(self) -> "ResponseArchive":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of results indexed"""
+        counts = self._conn.execute("SELECT file, COUNT(*) FROM records GROUP BY file")
+        return sum(count for file_id, count in counts if file_id in self._files)
+
+    def __contains__(self, url: str) -> bool:
+        return self.locate(url) is not None
+
+    def close(self) -> None:
+        for mapped in self._maps.values():
+            mapped.close()
+        self._maps.clear()
+        self._conn.close()
+
+    def update_index(self) -> int:
+        """Index the files which are new or changed since indexed, returning
+        how many were (re)indexed"""
+        indexed = {
+            path: (file_id, size, mtime) for file_id, path, size, mtime in self._conn.execute("SELECT * FROM files")
+        }
+        files = {}
+        count = 0
+        for path in self.paths:
+            stat = os.stat(path)
+            entry = indexed.get(path)
+            if entry is not None and entry[1:] == (stat.st_size, stat.st_mtime_ns):
+                files[entry[0]] = path
+                continue
+            mapped = self._maps.pop(path, None)
+            if mapped is not None:
+                # The file changed since mapped
+                mapped.close()
+            files[self._index_file(path, entry[0] if entry else None, stat)] = path
+            count += 1
+        self._files = files
+        return count
+
+    def locate(self, url: str, page_type: Optional[str] = None) -> Optional[Location]:
+        """Return where the last result for ``url`` (and ``page_type``, if
+        given) is archived, or ``None`` if not archived"""
+        return self.locate_many([url], page_type)[0]
+
+    def locate_many(self, urls: Sequence[str], page_type: Optional[str] = None) -> List[Optional[Location]]:
+        """Same as :meth:`locate`, for a batch of URLs looked up at once"""
+        found: Dict[str, Location] = {}
+        for start in range(0, len(urls), _BATCH_SIZE):
+            end = start + _BATCH_SIZE
+            batch = list(set(urls[start:end]) - found.keys())
+            if not batch:
+                continue
+            query = (
+                "SELECT url, file, offset, length, position, page_type FROM records"
+                f" WHERE url IN ({', '.join('?' * len(batch))})"
+            )
+            params = batch
+            if page_type is not None:
+                query += " AND page_type = ?"
+                params = batch + [page_type]
+            for url, file_id, offset, length, position, row_page_type in self._conn.execute(query, params):
+                path = self._files.get(file_id)
+                if path is None:
+                    # A file of another archive
+                    continue
+                location = Location(path, offset, length, position, row_page_type)
+                current = found.get(url)
+                if current is None or self._sort_key(location) > self._sort_key(current):
+                    found[url] = location
+        return [found.get(url) for url in urls]
+
+    def get(self, url: str, page_type: Optional[str] = None) -> Optional[AutoExtractData]:
+        """Return the page input with the last result for ``url`` (and
+        ``page_type``, if given), or ``None`` if not archived"""
+        return self.get_many([url], page_type)[0]
+
+    def get_many(self, urls: Iterable[str], page_type: Optional[str] = None) -> List[Optional[AutoExtractData]]:
+        """Return the page inputs for ``urls``, in the same order. ``None``
+        is returned for the ones not archived. The URLs are looked up at
+        once, and the lines with several of them parsed once."""
+        locations = self.locate_many(list(urls), page_type)
+        lines: Dict[Tuple[str, int], Any] = {}
+        return [None if location is None else self.read(location, lines) for location in locations]
+
+    def read(self, location: Location, lines: Optional[Dict[Tuple[str, int], Any]] = None) -> AutoExtractData:
+        """Return the page input with the result archived in ``location``,
+        parsing only its line. The lines parsed are kept in ``lines``, if
+        given, to be reused."""
+        key = (location.path, location.offset)
+        value = None if lines is None else lines.get(key)
+        if value is None:
+            mapped = self._map(location.path)
+            end = location.offset + location.length
+            value = json_backends.loads(mapped[location.offset : end])  # noqa: E203
+            if lines is not None:
+                lines[key] = value
+        result = value if location.position is None else value[location.position]
+        return get_page_input_class(location.page_type)(result)
+
+    def _sort_key(self, location: Location) -> Tuple[int, int, int]:
+        # The last one in the order of the files
+        position = -1 if location.position is None else location.position
+        return self._order[location.path], location.offset, position
+
+    def _map(self, path: str) -> mmap.mmap:
+        mapped = self._maps.get(path)
+        if mapped is None:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[path] = mapped
+        return mapped
+
+    def _index_file(self, path: str, file_id: Optional[int], stat: os.stat_result) -> int:
+        with self._conn:
+            if file_id is not None:
+                self._conn.execute("DELETE FROM records WHERE file = ?", (file_id,))
+                self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+            cursor = self._conn.execute(
+                "INSERT INTO files (path, size, mtime) VALUES (?, ?, ?)", (path, stat.st_size, stat.st_mtime_ns)
+            )
+            new_id: int = cursor.lastrowid  # type: ignore[assignment]
+            if stat.st_size:
+                # Empty files can't be mapped
+                records = [(*record, new_id) for record in _iter_records(self._map(path))]
+                self._conn.executemany(
+                    "INSERT INTO records (url, page_type, offset, length, position, file) VALUES (?, ?, ?, ?, ?, ?)",
+                    records,
+                )
+        return new_id
+
+
+Record = Tuple[str, str, int, int, Optional[int]]
+
+
+def _iter_records(mapped: mmap.mmap) -> Iterable[Record]:
+    """Iterate over the URL, page type, offset, length and position of the
+    results which can be read in the JSON lines of ``mapped``"""
+    size = len(mapped)
+    offset = 0
+    while offset < size:
+        end = mapped.find(b"\n", offset)
+        if end < 0:
+            end = size
+        line = mapped[offset:end]
+        if line.strip():
+            try:
+                value = json_backends.loads(line)
+            except ValueError:
+                value = None
+            if isinstance(value, list):
+                for position, result in enumerate(value):
+                    key = _result_key(result)
+                    if key is not None:
+                        yield (*key, offset, end - offset, position)
+            else:
+                key = _result_key(value)
+                if key is not None:
+                    yield (*key, offset, end - offset, None)
+        offset = end + 1
+
+
+def _result_key(result: Any) -> Optional[Tuple[str, str]]:
+    if not isinstance(result, dict) or result.get("error") is not None:
+        return None
+    page_type = get_page_type(result)
+    url = get_result_url(result)
+    if url is None or page_type is None or page_type not in result or registry.get(page_type) is None:
+        return None
+    return url, page_type
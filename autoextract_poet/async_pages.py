@@ -0,0 +1,180 @@
+"""
+Page objects with an awaitable ``to_item``, for asyncio based crawlers.
+
+They are the same as those in :mod:`autoextract_poet.pages`, but decoding
+large items (e.g. product lists with hundreds of products) doesn't block the
+event loop: data larger than :attr:`~AsyncAutoExtractPage.offload_threshold`
+is decoded in :attr:`~AsyncAutoExtractPage.executor` (see
+:meth:`.AutoExtractData.to_item_async`). Both can be changed in subclasses::
+
+    class ProductListPage(AsyncAutoExtractProductListPage):
+        offload_threshold = 50
+
+    item = await ProductListPage(product_list_data).to_item()
+
+Decoding holds the GIL, so in threads it still competes with the event loop,
+but in slices of the interpreter switch interval instead of the whole
+decoding time. Use a process pool to decode in parallel.
+
+These pages are not registered (see :mod:`autoextract_poet.registry`): the
+synchronous ones remain the page classes of their page types.
+"""
+
+from concurrent.futures import Executor
+from typing import ClassVar, Optional
+
+import attr
+from web_poet import ItemPage
+
+from autoextract_poet.items import (
+    Article,
+    ArticleList,
+    Comments,
+    ForumPosts,
+    JobPosting,
+    Product,
+    ProductList,
+    RealEstate,
+    Reviews,
+    Vehicle,
+)
+from autoextract_poet.page_inputs import (
+    DEFAULT_OFFLOAD_THRESHOLD,
+    AutoExtractArticleData,
+    AutoExtractArticleListData,
+    AutoExtractCommentsData,
+    AutoExtractData,
+    AutoExtractForumPostsData,
+    AutoExtractJobPostingData,
+    AutoExtractProductData,
+    AutoExtractProductListData,
+    AutoExtractRealEstateData,
+    AutoExtractReviewsData,
+    AutoExtractVehicleData,
+)
+from autoextract_poet.util import export
+
+
+@export
+class AsyncAutoExtractPage(ItemPage):
+    """Base class of the page objects with an awaitable ``to_item``"""
+
+    #: Executor where large items are decoded. ``None`` for the default
+    #: executor of the event loop
+    executor: ClassVar[Optional[Executor]] = None
+    #: Size of the data above which it is decoded in the executor
+    #: (see :func:`~.estimate_size`)
+    offload_threshold: ClassVar[int] = DEFAULT_OFFLOAD_THRESHOLD
+
+    async def _to_item(self, page_input: AutoExtractData):
+        return await page_input.to_item_async(self.executor, self.offload_threshold)
+
+
+@export
+@attr.s(auto_attribs=True)
+class AsyncAutoExtractArticlePage(AsyncAutoExtractPage):
+    """Same as :class:`~.AutoExtractArticlePage`, with an awaitable ``to_item``"""
+
+    article_data: AutoExtractArticleData
+
+    async def to_item(self) -> Optional[Article]:
+        return await self._to_item(self.article_data)
+
+
+@export
+@attr.s(auto_attribs=True)
+class AsyncAutoExtractArticleListPage(AsyncAutoExtractPage):
+    """Same as :class:`~.AutoExtractArticleListPage`, with an awaitable ``to_item``"""
+
+    article_list_data: AutoExtractArticleListData
+
+    async def to_item(self) -> Optional[ArticleList]:
+        return await self._to_item(self.article_list_data)
+
+
+@export
+@attr.s(auto_attribs=True)
+class AsyncAutoExtractProductPage(AsyncAutoExtractPage):
+    """Same as :class:`~.AutoExtractProductPage`, with an awaitable ``to_item``"""
+
+    product_data: AutoExtractProductData
+
+    async def to_item(self) -> Optional[Product]:
+        return await self._to_item(self.product_data)
+
+
+@export
+@attr.s(auto_attribs=True)
+class AsyncAutoExtractProductListPage(AsyncAutoExtractPage):
+    """Same as :class:`~.AutoExtractProductListPage`, with an awaitable ``to_item``"""
+
+    product_list_data: AutoExtractProductListData
+
+    async def to_item(self) -> Optional[ProductList]:
+        return await self._to_item(self.product_list_data)
+
+
+@export
+@attr.s(auto_attribs=True)
+class AsyncAutoExtractCommentsPage(AsyncAutoExtractPage):
+    """Same as :class:`~.AutoExtractCommentsPage`, with an awaitable ``to_item``"""
+
+    comments_data: AutoExtractCommentsData
+
+    async def to_item(self) -> Optional[Comments]:
+        return await self._to_item(self.comments_data)
+
+
+@export
+@attr.s(auto_attribs=True)
+class AsyncAutoExtractForumPostsPage(AsyncAutoExtractPage):
+    """Same as :class:`~.AutoExtractForumPostsPage`, with an awaitable ``to_item``"""
+
+    forum_posts_data: AutoExtractForumPostsData
+
+    async def to_item(self) -> Optional[ForumPosts]:
+        return await self._to_item(self.forum_posts_data)
+
+
+@export
+@attr.s(auto_attribs=True)
+class AsyncAutoExtractJobPostingPage(AsyncAutoExtractPage):
+    """Same as :class:`~.AutoExtractJobPostingPage`, with an awaitable ``to_item``"""
+
+    job_posting_data: AutoExtractJobPostingData
+
+    async def to_item(self) -> Optional[JobPosting]:
+        return await self._to_item(self.job_posting_data)
+
+
+@export
+@attr.s(auto_attribs=True)
+class AsyncAutoExtractRealEstatePage(AsyncAutoExtractPage):
+    """Same as :class:`~.AutoExtractRealEstatePage`, with an awaitable ``to_item``"""
+
+    real_estate_data: AutoExtractRealEstateData
+
+    async def to_item(self) -> Optional[RealEstate]:
+        return await self._to_item(self.real_estate_data)
+
+
+@export
+@attr.s(auto_attribs=True)
+class AsyncAutoExtractReviewsPage(AsyncAutoExtractPage):
+    """Same as :class:`~.AutoExtractReviewsPage`, with an awaitable ``to_item``"""
+
+    reviews_data: AutoExtractReviewsData
+
+    async def to_item(self) -> Optional[Reviews]:
+        return await self._to_item(self.reviews_data)
+
+
+@export
+@attr.s(auto_attribs=True)
+class AsyncAutoExtractVehiclePage(AsyncAutoExtractPage):
+    """Same as :class:`~.AutoExtractVehiclePage`, with an awaitable ``to_item``"""
+
+    vehicle_data: AutoExtractVehicleData
+
+    async def to_item(self) -> Optional[Vehicle]:
+        return await self._to_item(self.vehicle_data)
@@ -0,0 +1,258 @@
+"""
+Compact binary encoding of items, for intermediate storage.
+
+Items are encoded positionally: every item becomes a tuple with the values
+of its fields in the order of the attrs fields of its class, followed by a
+dict with its unknown fields if it has any. Nested items are encoded the same
+way, so key names are not repeated for every ``Offer`` or ``Review``. The
+tuples are serialized with :mod:`marshal`, which is implemented in C:
+
+>>> from autoextract_poet.items import Offer
+>>> data = encode(Offer(price="10", currency="EUR"))
+>>> decode(data, Offer)
+Offer(price='10', currency='EUR', availability=None, regularPrice=None)
+
+As with decoders (see :mod:`autoextract_poet.decoders`), the functions
+converting items to tuples and back are generated for every item class the
+first time they are needed, and then cached in the class itself.
+
+The encoding doesn't include the item classes, which must be given when
+decoding, but it does include a hash of the field names of every class
+involved, so that ``ValueError`` is raised if they changed since encoding (e.g. a
+newer version of this library). The :mod:`marshal` format depends on the
+Python version, so this is meant for intermediate storage between stages of
+a pipeline, not as a long term format.
+
+Values must be JSON-like (strings, numbers, booleans, ``None``, lists and
+dicts), as those read from AutoExtract are. Lazy and frozen items are
+encoded as regular ones and items can't have deleted fields.
+"""
+
+import hashlib
+import marshal
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from autoextract_poet.decoders import _can_compile, compile_function
+from autoextract_poet.items import Item, _fields, get_nested_fields
+
+T = TypeVar("T", bound=Item)
+
+Packer = Callable[[Item], Tuple]
+Unpacker = Callable[[Tuple], Item]
+
+# Attribute names used to cache the compiled functions in every item class
+PACKER_ATTR = "_binary_packer"
+UNPACKER_ATTR = "_binary_unpacker"
+FINGERPRINT_ATTR = "_binary_fingerprint"
+
+#: Prefix of the encoded items: magic string and format version. Followed
+#: by the fingerprint of the item class (see :func:`get_fingerprint`) and the items
+HEADER = b"AEPB\x01"
+FINGERPRINT_SIZE = 8
+
+# Classes whose functions are being compiled. Used to break recursive definitions
+_COMPILING: Set[Type[Item]] = set()
+
+
+def encode(item: Item) -> bytes:
+    """Encode ``item``. See :mod:`autoextract_poet.binary`."""
+    cls = _base_class(item.__class__)
+    return _dump(cls, get_packer(cls)(item))
+
+
+def decode(data: bytes, cls: Type[T]) -> T:
+    """Decode an item of class ``cls`` encoded with :func:`encode`"""
+    return get_unpacker(cls)(_load(data, cls))  # type: ignore[return-value]
+
+
+def encode_many(items: Iterable[Optional[Item]], cls: Type[Item]) -> bytes:
+    """Encode a batch of items of class ``cls`` (or ``None``) at once"""
+    pack = get_packer(cls)
+    return _dump(
+        cls,
+        [None if item is None else pack(item) if item.__class__ is cls else _pack_value(item, cls) for item in items],
+    )
+
+
+def decode_many(data: bytes, cls: Type[T]) -> List[Optional[T]]:
+    """Decode a batch of items of class ``cls`` encoded with :func:`encode_many`"""
+    unpack = get_unpacker(cls)
+    return [None if values is None else unpack(values) for values in _load(data, cls)]  # type: ignore[misc]
+
+
+def get_fingerprint(cls: Type[Item]) -> bytes:
+    """Return a hash of the names and field names of ``cls`` and its nested
+    item classes, recursively. Encoded along with the items to detect changes
+    in the classes."""
+    fingerprint = cls.__dict__.get(FINGERPRINT_ATTR)
+    if fingerprint is None:
+        classes: List[Type[Item]] = []
+        pending = [cls]
+        while pending:
+            current = pending.pop(0)
+            if current not in classes:
+                classes.append(current)
+                pending += [nested_cls for nested_cls, _ in get_nested_fields(current).values()]
+        schema = [
+            f"{current.__module__}.{current.__qualname__}:{','.join(field.name for field in _fields(current))}"
+            for current in classes
+        ]
+        fingerprint = hashlib.blake2b("\n".join(schema).encode(), digest_size=FINGERPRINT_SIZE).digest()
+        setattr(cls, FINGERPRINT_ATTR, fingerprint)
+    return fingerprint
+
+
+def get_packer(cls: Type[Item]) -> Packer:
+    """Return the function converting items of class ``cls`` to tuples,
+    compiling it if needed."""
+    packer = cls.__dict__.get(PACKER_ATTR)
+    if packer is None:
+        _COMPILING.add(cls)
+        try:
+            packer = compile_packer(cls)
+        finally:
+            _COMPILING.discard(cls)
+        setattr(cls, PACKER_ATTR, packer)
+    return packer
+
+
+def get_unpacker(cls: Type[Item]) -> Unpacker:
+    """Return the function converting tuples to items of class ``cls``,
+    compiling it if needed."""
+    unpacker = cls.__dict__.get(UNPACKER_ATTR)
+    if unpacker is None:
+        _COMPILING.add(cls)
+        try:
+            unpacker = compile_unpacker(cls)
+        finally:
+            _COMPILING.discard(cls)
+        setattr(cls, UNPACKER_ATTR, unpacker)
+    return unpacker
+
+
+def compile_packer(cls: Type[Item]) -> Packer:
+    """Generate the function converting items of class ``cls`` to tuples"""
+    nested = get_nested_fields(cls)
+    namespace: Dict[str, Any] = {"_pack_value": _pack_value, "_deleted": _deleted}
+    reads, values = [], []
+    for idx, field in enumerate(_fields(cls)):
+        name = field.name
+        reads.append(f"        v{idx} = obj.{name}")
+        if name not in nested:
+            values.append(f"v{idx}")
+            continue
+        nested_cls, is_list = nested[name]
+        namespace[f"_cls_{idx}"] = nested_cls
+        namespace[f"_pack_{idx}"] = (
+            (lambda item, _cls=nested_cls: _pack_value(item, _cls))
+            if nested_cls in _COMPILING
+            else get_packer(nested_cls)
+        )
+        # Items of the expected class are packed directly. The rest (None,
+        # variants, etc.) go through the generic path
+        if is_list:
+            pack = f"_pack_{idx}(e) if e.__class__ is _cls_{idx} else _pack_value(e, _cls_{idx})"
+            values.append(f"None if v{idx} is None else [{pack} for e in v{idx}]")
+        else:
+            values.append(f"_pack_{idx}(v{idx}) if v{idx}.__class__ is _cls_{idx} else _pack_value(v{idx}, _cls_{idx})")
+    lines = [
+        "def pack(obj):",
+        "    try:",
+        *reads,
+        "    except AttributeError:",
+        "        _deleted(obj)",
+        "    values = (",
+        *(f"        {value}," for value in values),
+        "    )",
+        "    unknown = obj._unknown_fields",
+        "    if unknown:",
+        "        return values + (unknown if unknown.__class__ is dict else dict(unknown),)",
+        "    return values",
+    ]
+    return compile_function("pack", lines, namespace, cls)
+
+
+def compile_unpacker(cls: Type[Item]) -> Unpacker:
+    """Generate the function converting tuples to items of class ``cls``"""
+    nested = get_nested_fields(cls)
+    fields = _fields(cls)
+    names = [f"v{idx}" for idx in range(len(fields))]
+    namespace: Dict[str, Any] = {"_cls": cls, "_new": object.__new__}
+    lines = [
+        "def unpack(values):",
+        f"    if len(values) == {len(fields)}:",
+        f"        {', '.join(names)}, = values" if names else "        pass",
+        "        unknown = None",
+        "    else:",
+        f"        {', '.join(names + ['unknown'])}, = values",
+    ]
+    for idx, field in enumerate(fields):
+        if field.name not in nested:
+            continue
+        nested_cls, is_list = nested[field.name]
+        namespace[f"_unpack_{idx}"] = (
+            (lambda values, _cls=nested_cls: get_unpacker(_cls)(values))
+            if nested_cls in _COMPILING
+            else get_unpacker(nested_cls)
+        )
+        lines.append(f"    if v{idx} is not None:")
+        if is_list:
+            lines.append(f"        v{idx} = [None if e is None else _unpack_{idx}(e) for e in v{idx}]")
+        else:
+            lines.append(f"        v{idx} = _unpack_{idx}(v{idx})")
+    lines.append("    obj = _new(_cls)")
+    if _can_compile(cls):
+        lines += [f"    obj.{field.name} = v{idx}" for idx, field in enumerate(fields)]
+        lines.append("    obj._unknown_fields = unknown")
+    else:
+        # Set directly like when unpickling (see items._restore_item), so that
+        # converters, validators, etc. don't run again on the encoded values
+        namespace["_setattr"] = object.__setattr__
+        lines += [f"    _setattr(obj, {field.name!r}, v{idx})" for idx, field in enumerate(fields)]
+        lines.append("    _setattr(obj, '_unknown_fields', unknown)")
+    lines.append("    return obj")
+    return compile_function("unpack", lines, namespace, cls)
+
+
+def _base_class(cls: Type[Item]) -> Type[Item]:
+    # Lazy and frozen variants are encoded as the class they derive from
+    return cls.__dict__.get("_variant_of", cls)
+
+
+def _pack_value(value: Any, cls: Type[Item]) -> Optional[Tuple]:
+    """Pack the value of a field expected to hold an item of class ``cls``"""
+    if value is None:
+        return None
+    if isinstance(value, Item) and _base_class(value.__class__) is cls:
+        return get_packer(cls)(value)
+    raise ValueError(f"Expected an instance of {cls.__qualname__}, got {value!r}")
+
+
+def _deleted(item: Item) -> None:
+    raise ValueError(f"{item.__class__.__qualname__} items with deleted fields can't be encoded")
+
+
+def _dump(cls: Type[Item], payload: Any) -> bytes:
+    return b"".join([HEADER, get_fingerprint(cls), marshal.dumps(payload)])
+
+
+def _load(data: bytes, cls: Type[Item]) -> Any:
+    if not data.startswith(HEADER):
+        raise ValueError("Not encoded with autoextract_poet.binary, or with another version")
+    start = len(HEADER)
+    end = start + FINGERPRINT_SIZE
+    view = memoryview(data)
+    if view[start:end] != get_fingerprint(cls):
+        raise ValueError(f"The fields of {cls.__qualname__} or its nested items changed since encoded")
+    return marshal.loads(view[end:])
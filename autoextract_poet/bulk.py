@@ -0,0 +1,248 @@
+"""
+Bulk decoding of AutoExtract response dumps with a pool of processes.
+
+Decoding is CPU bound and holds the GIL, so a single process is the
+bottleneck when decoding millions of results. The functions in this module
+spread the parsing and decoding of one or many files over a pool of
+processes, in chunks:
+
+* JSON lines files (``.jsonl``, ``.jl``, ``.ndjson``), whose lines are
+  AutoExtract responses (JSON arrays) or single results, are split in chunks
+  of ``chunk_size`` lines, read by the main process and decoded by the pool.
+* Any other file is an AutoExtract response (a JSON array), decoded as a
+  single chunk by a process of the pool. Split large responses in JSON lines
+  files to decode them in parallel.
+
+Every chunk is parsed with :mod:`autoextract_poet.json_backends`, routed to
+the page input classes with :func:`~autoextract_poet.dispatch.dispatch`,
+and its items read with :meth:`AutoExtractData.to_items
+<autoextract_poet.page_inputs.AutoExtractData.to_items>`, so that they come
+out of the pool fully typed::
+
+    for item in iter_items(["dump-1.jsonl", "dump-2.jsonl"], processes=8):
+        ...
+
+Chunks are returned in the order of the files, or as soon as they are
+decoded if ``ordered=False``. Only a few chunks per process are in flight at
+any moment, so memory usage is bounded however large the files are.
+
+Page input classes are looked up in the worker processes, so custom ones
+must be defined in modules imported by them (not in ``__main__``) unless
+processes are forked.
+"""
+
+import collections
+import json
+import os
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
+from typing import IO, Any, Deque, Iterable, Iterator, List, Optional, Tuple
+
+import attr
+
+from autoextract_poet import json_backends
+from autoextract_poet.dispatch import BatchError, dispatch
+from autoextract_poet.items import Item
+from autoextract_poet.page_inputs import AutoExtractData
+
+#: Lines of the JSON lines files per chunk
+DEFAULT_CHUNK_SIZE = 1000
+
+#: Extensions of the JSON lines files
+JSONL_EXTENSIONS = (".jsonl", ".jl", ".ndjson")
+
+
+@attr.s(auto_attribs=True, slots=True)
+class Chunk:
+    """The items decoded from a chunk of a file"""
+
+    #: The file the chunk was read from
+    path: str
+    #: Number of the first line of the chunk (1-based) for JSON lines
+    #: files, ``None`` for responses decoded whole
+    line: Optional[int]
+    #: Items of the results, in the order of the file. ``None`` for the
+    #: results with null data
+    items: List[Optional[Item]] = attr.Factory(list)
+    #: Results that couldn't be decoded (see :func:`~.dispatch`), with their
+    #: ``index`` relative to the results of the chunk
+    errors: List[BatchError] = attr.Factory(list)
+    #: The items as JSON lines, instead of ``items``, when writing them
+    #: (see :func:`write_items`)
+    encoded: Optional[bytes] = None
+
+
+def iter_chunks(
+    paths: Iterable[str],
+    processes: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ordered: bool = True,
+    executor: Optional[Executor] = None,
+) -> Iterator[Chunk]:
+    """Decode the files of AutoExtract responses in ``paths``, iterating over
+    their chunks. See :mod:`autoextract_poet.bulk`.
+
+    A pool of ``processes`` processes (as many as CPUs by default) is created
+    for the occasion, unless ``executor`` is given. With ``processes=0``
+    chunks are decoded in the current process, which is useful to debug.
+
+    Errors reading the files are raised, but results which can't be parsed
+    or decoded are reported in the ``errors`` of their chunks.
+    """
+    return _iter_chunks(paths, processes, chunk_size, ordered, executor, encode=False)
+
+
+def iter_items(
+    paths: Iterable[str],
+    processes: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ordered: bool = True,
+    executor: Optional[Executor] = None,
+) -> Iterator[Optional[Item]]:
+    """Iterate over the items decoded from the files in ``paths``.
+    Errors are skipped: use :func:`iter_chunks` to get them."""
+    for chunk in iter_chunks(paths, processes, chunk_size, ordered, executor):
+        yield from chunk.items
+
+
+def write_items(
+    paths: Iterable[str],
+    output: IO[bytes],
+    processes: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ordered: bool = True,
+    executor: Optional[Executor] = None,
+) -> int:
+    """Write the items decoded from the files in ``paths`` to the binary
+    stream ``output`` as JSON lines (see :meth:`~.Item.to_dict`), returning
+    the number of items written. Items are encoded by the pool too.
+    Errors are skipped: use :func:`iter_chunks` to get them."""
+    count = 0
+    for chunk in _iter_chunks(paths, processes, chunk_size, ordered, executor, encode=True):
+        if chunk.encoded:
+            output.write(chunk.encoded)
+            count += chunk.encoded.count(b"\n")
+    return count
+
+
+def decode_chunk(path: str, line: Optional[int], texts: Optional[List[bytes]], encode: bool = False) -> Chunk:
+    """Decode a chunk: the lines ``texts`` of a JSON lines file starting at
+    line number ``line``, or the whole file in ``path`` if ``texts`` is
+    ``None``. Run by the processes of the pool."""
+    chunk = Chunk(path, line)
+    results: List[Any] = []
+    if texts is None:
+        with open(path, "rb") as f:
+            texts = [f.read()]
+    for number, text in enumerate(texts, line or 1):
+        if not text.strip():
+            continue
+        try:
+            value = json_backends.loads(text)
+        except ValueError as e:
+            where = f" at line {number}" if line is not None else ""
+            chunk.errors.append(BatchError(len(results), text, None, f"Invalid JSON{where}: {e}"))
+            results.append(None)
+            continue
+        if isinstance(value, list):
+            results.extend(value)
+        else:
+            results.append(value)
+    batch = dispatch(results)
+    # Errors found parsing and dispatching, by position
+    errors = {error.index: error for error in batch.errors}
+    errors.update((error.index, error) for error in chunk.errors)
+    try:
+        items = AutoExtractData.to_items(batch.page_inputs)
+    except Exception:
+        # Some result can't be decoded: decoding them one by one to find it
+        indexes = [index for index in range(len(results)) if index not in errors]
+        items = []
+        for index, page_input in zip(indexes, batch.page_inputs):
+            try:
+                items.append(page_input.to_item())
+            except Exception as e:
+                message = f"Can't decode the {page_input.page_type!r} data: {e!r}"
+                errors[index] = BatchError(index, results[index], page_input.page_type, message)
+    chunk.errors = [errors[index] for index in sorted(errors)]
+    if encode:
+        lines = [json.dumps(item.to_dict()) for item in items if item is not None]
+        chunk.encoded = "".join(f"{line}\n" for line in lines).encode()
+    else:
+        chunk.items = items
+    return chunk
+
+
+Task = Tuple[str, Optional[int], Optional[List[bytes]]]
+
+
+def iter_tasks(paths: Iterable[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Task]:
+    """Iterate over the chunks of the files in ``paths``, as the arguments
+    of :func:`decode_chunk`"""
+    for path in paths:
+        path = os.fspath(path)
+        if not path.lower().endswith(JSONL_EXTENSIONS):
+            yield path, None, None
+            continue
+        with open(path, "rb") as f:
+            texts: List[bytes] = []
+            first = 1
+            for number, text in enumerate(f, 1):
+                if not texts:
+                    first = number
+                texts.append(text)
+                if len(texts) >= chunk_size:
+                    yield path, first, texts
+                    texts = []
+            if texts:
+                yield path, first, texts
+
+
+def _iter_chunks(
+    paths: Iterable[str],
+    processes: Optional[int],
+    chunk_size: int,
+    ordered: bool,
+    executor: Optional[Executor],
+    encode: bool,
+) -> Iterator[Chunk]:
+    tasks = iter_tasks(paths, chunk_size)
+    if executor is None and processes == 0:
+        for task in tasks:
+            yield decode_chunk(*task, encode=encode)
+        return
+    own_executor = executor is None
+    pool = ProcessPoolExecutor(processes) if executor is None else executor
+    # Chunks in flight, to bound the memory used
+    max_pending = 2 * (processes or os.cpu_count() or 1)
+    pending: Deque[Future] = collections.deque()
+    try:
+        for task in tasks:
+            pending.append(pool.submit(decode_chunk, *task, encode=encode))
+            if len(pending) < max_pending:
+                continue
+            if ordered:
+                yield pending.popleft().result()
+            else:
+                done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+                pending = collections.deque(future for future in pending if future in not_done)
+                for future in done:
+                    yield future.result()
+        if ordered:
+            while pending:
+                yield pending.popleft().result()
+        else:
+            for future in as_completed(pending):
+                yield future.result()
+            pending.clear()
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_executor:
+            pool.shutdown()
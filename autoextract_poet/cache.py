@@ -0,0 +1,241 @@
+"""
+Local persistent cache of AutoExtract results, stored in SQLite.
+
+AutoExtract requests are slow and billed, so re-running spiders during
+development or backfills shouldn't pay again for the same extractions.
+:class:`ResponseCache` keeps the raw results of the page inputs, keyed by
+URL and page type, and hands back ready-made page inputs::
+
+    cache = ResponseCache("autoextract.sqlite", max_age=7 * 24 * 3600)
+    page_input = cache.get(url, "product")
+    if page_input is None:
+        page_input = AutoExtractProductData(request_autoextract(url))
+        cache.put(page_input)
+
+The browser HTML (:class:`~.AutoExtractHtml`) can be cached as well, with
+:meth:`ResponseCache.get_html` and :meth:`ResponseCache.put_html`.
+
+Entries older than ``max_age`` seconds are not returned (but kept until
+replaced or evicted), and when the results stored exceed ``max_size`` bytes
+the least recently used ones are evicted.
+"""
+
+import json
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import attr
+
+from autoextract_poet import json_backends
+from autoextract_poet.page_inputs import (
+    AutoExtractData,
+    AutoExtractHtml,
+    get_page_input_class,
+    get_result_url,
+)
+
+#: Kind of the entries with browser HTML, instead of a page type
+HTML_KIND = "#html"
+
+Key = Tuple[str, str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (url, kind)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+"""
+
+# SQLite limits the number of parameters of a query
+_BATCH_SIZE = 400
+
+
+@attr.s(auto_attribs=True, slots=True)
+class CacheStats:
+    """Counters of the lookups of a cache"""
+
+    hits: int = 0
+    #: Includes the stale entries
+    misses: int = 0
+    #: Entries found, but older than the maximum age
+    stale: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """Cache of AutoExtract results in the SQLite database ``path`` (in memory
+    by default). See :mod:`autoextract_poet.cache`.
+
+    ``max_age`` is the freshness window in seconds, which can also be given on
+    every lookup, and ``max_size`` the maximum size in bytes of the results
+    stored. There are no limits by default.
+    """
+
+    def __init__(self, path: str = ":memory:", max_age: Optional[float] = None, max_size: Optional[int] = None):
+        self.path = path
+        self.max_age = max_age
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._conn = sqlite3.connect(path)
+        if path != ":memory:":
+            # Readers don't block the writer
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def size(self) -> int:
+        """Return the size in bytes of the results stored"""
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, url: str, page_type: str, max_age: Optional[float] = None) -> Optional[AutoExtractData]:
+        """Return the page input with the result for ``url`` and
+        ``page_type``, or ``None`` if not cached or older than ``max_age``
+        (by default, the one of the cache)."""
+        return self.get_many([(url, page_type)], max_age)[0]
+
+    def get_many(self, keys: Sequence[Key], max_age: Optional[float] = None) -> List[Optional[AutoExtractData]]:
+        """Return the page inputs for the pairs of URL and page type ``keys``,
+        in the same order. ``None`` is returned for the ones not found."""
+        payloads = self._get_payloads(keys, max_age)
+        results: List[Optional[AutoExtractData]] = []
+        for (_, page_type), payload in zip(keys, payloads):
+            if payload is None:
+                results.append(None)
+            else:
+                results.append(get_page_input_class(page_type)(json_backends.loads(payload)))
+        return results
+
+    def put(self, page_input: AutoExtractData, url: Optional[str] = None) -> None:
+        """Store the result of ``page_input``, under ``url`` or, if not given,
+        under the URL requested in its query (see :func:`get_result_url`)."""
+        self.put_many([page_input], [url] if url is not None else None)
+
+    def put_many(self, page_inputs: Iterable[AutoExtractData], urls: Optional[Iterable[str]] = None) -> None:
+        """Store the results of a batch of page inputs, in a single
+        transaction. ``urls`` are the keys, if given (see :meth:`put`)."""
+        page_inputs = list(page_inputs)
+        if urls is None:
+            urls = [_required_url(page_input.data) for page_input in page_inputs]
+        else:
+            urls = list(urls)
+            if len(urls) != len(page_inputs):
+                raise ValueError(f"Got {len(urls)} URLs for {len(page_inputs)} page inputs")
+        rows = [
+            (url, page_input.page_type, json.dumps(page_input.data).encode())
+            for url, page_input in zip(urls, page_inputs)
+        ]
+        self._put_payloads(rows)
+
+    def get_html(self, url: str, max_age: Optional[float] = None) -> Optional[AutoExtractHtml]:
+        """Same as :meth:`get`, but for the browser HTML of ``url``"""
+        [payload] = self._get_payloads([(url, HTML_KIND)], max_age)
+        return None if payload is None else AutoExtractHtml(url, payload.decode())
+
+    def put_html(self, html: AutoExtractHtml) -> None:
+        """Store the browser HTML, under its URL"""
+        self._put_payloads([(html.url, HTML_KIND, html.html.encode())])
+
+    def delete(self, url: str, kind: str) -> bool:
+        """Delete the entry for ``url`` and the page type (or :data:`HTML_KIND`)
+        ``kind``. Return whether it existed."""
+        with self._conn:
+            cursor = self._conn.execute("DELETE FROM entries WHERE url = ? AND kind = ?", (url, kind))
+        return cursor.rowcount > 0
+
+    def clear(self) -> None:
+        """Delete all the entries, keeping the counters"""
+        with self._conn:
+            self._conn.execute("DELETE FROM entries")
+
+    def _get_payloads(self, keys: Sequence[Key], max_age: Optional[float]) -> List[Optional[bytes]]:
+        max_age = self.max_age if max_age is None else max_age
+        now = time.time()
+        found: Dict[Key, Tuple[bytes, float]] = {}
+        for start in range(0, len(keys), _BATCH_SIZE):
+            end = start + _BATCH_SIZE
+            batch = keys[start:end]
+            condition = " OR ".join(["(url = ? AND kind = ?)"] * len(batch))
+            params = [value for key in batch for value in key]
+            query = f"SELECT url, kind, payload, created FROM entries WHERE {condition}"
+            for url, kind, payload, created in self._conn.execute(query, params):
+                found[(url, kind)] = (payload, created)
+        payloads: List[Optional[bytes]] = []
+        hits = []
+        stats = self.stats
+        for url, kind in keys:
+            entry = found.get((url, kind))
+            if entry is not None and max_age is not None and now - entry[1] > max_age:
+                stats.stale += 1
+                entry = None
+            if entry is None:
+                stats.misses += 1
+                payloads.append(None)
+            else:
+                stats.hits += 1
+                hits.append((now, url, kind))
+                payloads.append(entry[0])
+        if hits:
+            # Kept even without a maximum size, in case one is set later
+            with self._conn:
+                self._conn.executemany("UPDATE entries SET accessed = ? WHERE url = ? AND kind = ?", hits)
+        return payloads
+
+    def _put_payloads(self, rows: Iterable[Tuple[str, str, bytes]]) -> None:
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (url, kind, payload, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [(url, kind, payload, len(payload), now, now) for url, kind, payload in rows],
+            )
+        if self.max_size is not None:
+            self.evict(self.max_size)
+
+    def evict(self, max_size: int) -> int:
+        """Delete the least recently used entries until the results stored
+        take ``max_size`` bytes at most. Return the number of entries deleted."""
+        excess = self.size() - max_size
+        if excess <= 0:
+            return 0
+        keys = []
+        cursor = self._conn.execute("SELECT url, kind, size FROM entries ORDER BY accessed")
+        for url, kind, size in cursor:
+            keys.append((url, kind))
+            excess -= size
+            if excess <= 0:
+                break
+        cursor.close()
+        with self._conn:
+            self._conn.executemany("DELETE FROM entries WHERE url = ? AND kind = ?", keys)
+        self.stats.evictions += len(keys)
+        return len(keys)
+
+
+def _required_url(result: Dict) -> str:
+    url = get_result_url(result)
+    if url is None:
+        raise ValueError("The URL requested is not in the result: give the URL to cache it")
+    return url
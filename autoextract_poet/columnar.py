@@ -0,0 +1,279 @@
+"""
+Columnar export of items.
+
+:func:`to_table` converts a sequence of items of the same class into a
+:class:`Table` of typed columns, suitable for vectorized analysis.
+`NumPy`_ arrays are used when it is installed, and the standard library
+``array`` module otherwise.
+
+The columns are named after the fields, using dots for those of the nested
+items (e.g. ``aggregateRating.ratingValue``). Lists (e.g. ``offers`` or
+``images``) are flattened: their values are stored in the columns one after
+another, and the table keeps an array of offsets for every list field telling
+where the values of every row start and end. For instance, the offers of the
+product in the row ``i`` are those between the positions ``offsets["offers"][i]``
+and ``offsets["offers"][i + 1]`` of the ``offers.*`` columns. Lists inside
+lists are offsets into the flattened parent (e.g. ``products.offers``).
+
+Columns are typed according to the annotations of the fields. If some value
+doesn't match them (e.g. a string in a float field), the column keeps the
+values as they are, with the ``object`` kind. Fields holding items of a class
+which contains them (e.g. the children of a tree) are not flattened either.
+
+Unknown fields are not exported.
+
+.. _NumPy: https://numpy.org/
+"""
+
+import array
+import math
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+    get_type_hints,
+)
+
+import attr
+
+from autoextract_poet.items import Item, _fields, nested_item_type
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore[assignment]
+
+
+# Column kinds
+FLOAT = "float"
+INT = "int"
+BOOL = "bool"
+STR = "str"
+OBJECT = "object"
+
+_SCALAR_KINDS = {float: FLOAT, int: INT, bool: BOOL, str: STR}
+
+# Field plans: (attribute name, column name, kind, is a list, sub plan for items)
+_Plan = List[Tuple[str, str, str, bool, Optional[list]]]
+_ITEM = "item"
+
+
+@attr.s(auto_attribs=True, slots=True)
+class Column:
+    """A column of a :class:`Table`.
+
+    ``values`` is a typed array: ``float64`` for float fields (``NaN`` for
+    missing values), ``int64`` for integer fields, ``int8`` for booleans
+    (``0`` for missing values in both cases). Strings are dictionary encoded
+    by default: ``values`` contains ``int32`` codes, indexes in
+    ``categories`` (``-1`` for missing values). Other values, and those of
+    the columns with values not matching their annotations, are kept in an
+    object array (or a list if NumPy is not available).
+
+    ``valid`` is an array of booleans (``uint8`` if NumPy is not available)
+    telling which values are present.
+    """
+
+    kind: str
+    values: Any
+    valid: Any
+    categories: Optional[List[Any]] = None
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    def to_list(self) -> List:
+        """Return the column values as a list, with ``None`` for missing values"""
+        if self.categories is not None:
+            categories = self.categories
+            values = [categories[code] for code in self.values.tolist()]
+        elif isinstance(self.values, list):
+            values = self.values
+        else:
+            values = self.values.tolist()
+            if self.kind == BOOL:
+                values = [bool(value) for value in values]
+        return [value if valid else None for value, valid in zip(values, self.valid)]
+
+
+@attr.s(auto_attribs=True, slots=True)
+class Table:
+    """Columnar representation of a sequence of items. See :mod:`autoextract_poet.columnar`."""
+
+    item_class: Type[Item]
+    length: int
+    columns: Dict[str, Column]
+    offsets: Dict[str, Any]
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, name: str) -> Column:
+        return self.columns[name]
+
+
+def to_table(
+    items: Sequence[Optional[Item]],
+    item_class: Optional[Type[Item]] = None,
+    strings: str = "dictionary",
+    use_numpy: Optional[bool] = None,
+) -> Table:
+    """Return the :class:`Table` with the fields of ``items``, all of them
+    instances of ``item_class`` (or ``None``). ``item_class`` is the class of
+    the first item if not given, and ``ValueError`` is raised if there is none.
+
+    Strings are dictionary encoded unless ``strings`` is ``"object"``.
+    NumPy is used if installed, unless ``use_numpy`` is ``False``.
+    """
+    if strings not in ("dictionary", "object"):
+        raise ValueError(f"Unsupported strings encoding {strings!r}")
+    if use_numpy is None:
+        use_numpy = np is not None
+    elif use_numpy and np is None:
+        raise ImportError("NumPy is not installed")
+    if item_class is None:
+        item_class = next((type(item) for item in items if item is not None), None)
+    if item_class is None:
+        raise ValueError("The class of the items could not be determined")
+    plan = _plan(item_class, "")
+    data: Dict[str, list] = {}
+    offsets: Dict[str, List[int]] = {}
+    _init(plan, data, offsets)
+    for item in items:
+        _fill(plan, item, data, offsets)
+
+    kinds = _kinds(plan)
+    columns = {name: _column(kinds[name], values, strings == "dictionary", use_numpy) for name, values in data.items()}
+    return Table(
+        item_class=item_class,
+        length=len(items),
+        columns=columns,
+        offsets={name: _array("q", values, use_numpy) for name, values in offsets.items()},
+    )
+
+
+def _scalar_kind(tp: Any) -> Tuple[str, bool]:
+    """Return the column kind for a field type, and whether it is a list"""
+    is_list = False
+    args = [arg for arg in getattr(tp, "__args__", None) or () if arg is not type(None)]  # noqa: E721
+    if getattr(tp, "__origin__", None) is Union and len(args) == 1:
+        tp = args[0]
+        args = list(getattr(tp, "__args__", None) or ())
+    if getattr(tp, "__origin__", None) in (list, List) and len(args) == 1:
+        tp, is_list = args[0], True
+    return _SCALAR_KINDS.get(tp, OBJECT), is_list
+
+
+def _plan(cls: Type[Item], prefix: str, parents: FrozenSet[Type[Item]] = frozenset()) -> _Plan:
+    try:
+        hints = get_type_hints(cls)
+    except Exception:
+        hints = {}
+    parents = parents | {cls}
+    plan: _Plan = []
+    for field in _fields(cls):
+        tp = hints.get(field.name, field.type)
+        name = prefix + field.name
+        nested = nested_item_type(tp)
+        if nested and nested[0] not in parents:
+            nested_cls, is_list = nested
+            plan.append((field.name, name, _ITEM, is_list, _plan(nested_cls, name + ".", parents)))
+        elif nested:
+            # Recursive definitions (e.g. a tree) would have infinite columns:
+            # the items are kept as objects instead
+            plan.append((field.name, name, OBJECT, nested[1], None))
+        else:
+            kind, is_list = _scalar_kind(tp)
+            plan.append((field.name, name, kind, is_list, None))
+    return plan
+
+
+def _init(plan: _Plan, data: Dict[str, list], offsets: Dict[str, List[int]]) -> None:
+    for _, name, _kind, is_list, sub_plan in plan:
+        if is_list:
+            offsets[name] = [0]
+        if sub_plan is not None:
+            _init(sub_plan, data, offsets)
+        else:
+            data[name] = []
+
+
+def _kinds(plan: _Plan) -> Dict[str, str]:
+    kinds = {}
+    for _, name, kind, _, sub_plan in plan:
+        if sub_plan is not None:
+            kinds.update(_kinds(sub_plan))
+        else:
+            kinds[name] = kind
+    return kinds
+
+
+def _fill(plan: _Plan, item: Optional[Item], data: Dict[str, list], offsets: Dict[str, List[int]]) -> None:
+    for attr_name, name, _kind, is_list, sub_plan in plan:
+        value = getattr(item, attr_name, None)
+        if is_list:
+            elements = value or ()
+            column_offsets = offsets[name]
+            column_offsets.append(column_offsets[-1] + len(elements))
+            if sub_plan is not None:
+                for element in elements:
+                    _fill(sub_plan, element, data, offsets)
+            else:
+                data[name].extend(elements)
+        elif sub_plan is not None:
+            _fill(sub_plan, value, data, offsets)
+        else:
+            data[name].append(value)
+
+
+def _array(typecode: str, values: list, use_numpy: bool) -> Any:
+    if use_numpy:
+        return np.array(values, dtype=_NUMPY_TYPES[typecode])
+    return array.array(typecode, values)
+
+
+_NUMPY_TYPES = {"d": "float64", "q": "int64", "b": "int8", "i": "int32", "B": "bool"}
+
+
+# Values accepted by the typed columns. Booleans are not numbers, and floats
+# are not truncated to integers
+_CHECKS = {
+    FLOAT: lambda value: value.__class__ is float or (isinstance(value, (int, float)) and value.__class__ is not bool),
+    INT: lambda value: isinstance(value, int) and value.__class__ is not bool,
+    BOOL: lambda value: isinstance(value, bool),
+    STR: lambda value: isinstance(value, str),
+}
+
+
+def _column(kind: str, values: list, dictionary: bool, use_numpy: bool) -> Column:
+    valid = _array("B", [value is not None for value in values], use_numpy)
+    check = _CHECKS.get(kind)
+    if check is not None and not all(value is None or check(value) for value in values):
+        # Some value doesn't match the annotation (the decoders don't validate
+        # types), so the values are kept as they are
+        kind = OBJECT
+    if kind == FLOAT:
+        return Column(
+            kind, _array("d", [math.nan if value is None else float(value) for value in values], use_numpy), valid
+        )
+    if kind in (INT, BOOL):
+        typecode = "q" if kind == INT else "b"
+        return Column(
+            kind, _array(typecode, [0 if value is None else int(value) for value in values], use_numpy), valid
+        )
+    if kind == STR and dictionary:
+        codes: Dict[Any, int] = {}
+        setdefault = codes.setdefault
+        encoded = [-1 if value is None else setdefault(value, len(codes)) for value in values]
+        return Column(kind, _array("i", encoded, use_numpy), valid, categories=list(codes))
+    if use_numpy:
+        objects = np.empty(len(values), dtype=object)
+        objects[:] = values
+        return Column(kind, objects, valid)
+    return Column(kind, values, valid)
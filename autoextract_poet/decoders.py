@@ -0,0 +1,380 @@
+"""
+Compiled decoders for :class:`~.Item` classes.
+
+Reading an item from a dictionary is by far the most frequent operation
+performed with these items, so instead of going through a generic
+implementation each item class gets its own decoder function. The source
+code of the decoder is generated from the attrs fields of the class the first
+time it is needed, and then cached in the class itself. Nested items are
+read according to :func:`~.get_nested_fields`.
+"""
+
+import abc
+import operator
+from types import MemberDescriptorType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Type
+
+import attr
+
+from autoextract_poet.items import Item, NestedFields, _fields, get_nested_fields
+from autoextract_poet.util import split_in_unknown_and_known_fields
+
+Decoder = Callable[[Optional[Dict]], Optional[Item]]
+# Returns the reader for the items of a nested item class
+ReaderGetter = Callable[[Type[Item]], Callable]
+
+# Attribute names used to cache the compiled decoders in every item class
+DECODER_ATTR = "_decoder"
+LAZY_DECODER_ATTR = "_lazy_decoder"
+
+_MISSING = object()
+
+# Classes whose decoder is being compiled. Used to break recursive definitions
+_COMPILING: Set[Type[Item]] = set()
+
+
+def get_decoder(cls: Type[Item]) -> Decoder:
+    """Return the decoder of the item class ``cls``, compiling it if needed.
+
+    The decoder is a function accepting a dictionary (or ``None``) and
+    returning an instance of ``cls`` (or ``None``), exactly as
+    :meth:`~.Item.from_dict` does.
+    """
+    decoder = cls.__dict__.get(DECODER_ATTR)
+    if decoder is None:
+        _COMPILING.add(cls)
+        try:
+            decoder = compile_decoder(cls)
+        finally:
+            _COMPILING.discard(cls)
+        setattr(cls, DECODER_ATTR, decoder)
+    return decoder
+
+
+def get_lazy_decoder(cls: Type[Item]) -> Decoder:
+    """Return the lazy decoder of the item class ``cls``, compiling it if needed.
+
+    Lazy decoders keep the raw value of the fields holding items or lists of
+    items until they are accessed for the first time. See
+    :meth:`~.Item.from_dict_lazy`.
+    """
+    decoder = cls.__dict__.get(LAZY_DECODER_ATTR)
+    if decoder is None:
+        decoder = compile_lazy_decoder(cls)
+        setattr(cls, LAZY_DECODER_ATTR, decoder)
+    return decoder
+
+
+def _can_compile(cls: Type[Item]) -> bool:
+    """Compiled decoders fill the slots of the instance directly, skipping
+    ``__init__``. This is only safe for plain attrs classes, so any class
+    using validators, converters, hooks or private attributes
+    goes through the generic decoder instead.
+    """
+    if cls.__setattr__ is not object.__setattr__:
+        return False
+    if cls.__attrs_post_init__ is not Item.__attrs_post_init__:  # type: ignore[attr-defined]
+        return False
+    if getattr(cls, "__attrs_pre_init__", None) is not None:
+        return False
+    for field in _fields(cls):
+        if not field.init or field.validator or field.converter or field.name.startswith("_"):
+            return False
+        if isinstance(field.default, attr.Factory) and field.default.takes_self:  # type: ignore[arg-type,union-attr]
+            return False
+    return True
+
+
+def get_reader(cls: Type[Item]) -> Callable:
+    """Return the fastest callable equivalent to ``cls.from_dict``.
+    That is the decoder of the class, unless ``from_dict`` is overridden."""
+    if cls.from_dict.__func__ is not Item.from_dict.__func__:  # type: ignore[attr-defined]
+        return cls.from_dict
+    if cls in _COMPILING:
+        # Recursive definition: its decoder is not available yet
+        return cls.from_dict
+    return get_decoder(cls)
+
+
+def get_lazy_reader(cls: Type[Item]) -> Callable:
+    """Same as :func:`get_reader`, but for lazy decoders"""
+    if cls.from_dict.__func__ is not Item.from_dict.__func__:  # type: ignore[attr-defined]
+        return cls.from_dict
+    return get_lazy_decoder(cls)
+
+
+def compile_decoder(
+    cls: Type[Item],
+    lazy_cls: Optional[Type[Item]] = None,
+    reader: ReaderGetter = get_reader,
+    string_hooks: Optional[Dict[str, Callable[[str], str]]] = None,
+) -> Decoder:
+    """Generate the decoder function for the item class ``cls``.
+
+    If ``lazy_cls`` is given, the decoder returns instances of it instead,
+    keeping the raw value of the nested fields (see :func:`compile_lazy_decoder`).
+
+    The nested items are read with the readers returned by ``reader`` for
+    their classes. ``string_hooks`` maps field names to functions that are
+    applied to their values when they are strings
+    (see :mod:`autoextract_poet.interning`).
+    """
+    nested = get_nested_fields(cls)
+    string_hooks = string_hooks or {}
+    if not _can_compile(cls):
+        return _generic_decoder(cls, nested, reader, string_hooks)
+
+    fields = _fields(cls)
+    namespace: Dict[str, Any] = {
+        "_cls": lazy_cls or cls,
+        "_Unresolved": _Unresolved,
+        "_new": object.__new__,
+        "_MISSING": _MISSING,
+        "_known": frozenset(field.name for field in fields),
+        "_fallback": _generic_decoder(cls, nested, reader, string_hooks),
+    }
+    lines = [
+        "def decode(data):",
+        "    if not data:",
+        "        return None",
+        "    get = data.get",
+        "    obj = _new(_cls)",
+    ]
+    for idx, field in enumerate(fields):
+        name = field.name
+        if name in nested and lazy_cls:
+            # Setting the slot directly, given that the lazy class
+            # overrides the attribute with a property
+            namespace[f"_set_{idx}"] = getattr(cls, name).__set__
+            lines.append(f"    v = get({name!r})")
+            default = "[]" if nested[name][1] else "None"
+            lines.append(f"    _set_{idx}(obj, _Unresolved(v) if v else {default})")
+        elif name in nested:
+            nested_cls, is_list = nested[name]
+            decoder_name = f"_decode_{idx}"
+            namespace[decoder_name] = reader(nested_cls)
+            lines.append(f"    v = get({name!r})")
+            if is_list:
+                lines.append(f"    obj.{name} = [{decoder_name}(e) for e in v] if v else []")
+            else:
+                lines.append(f"    obj.{name} = {decoder_name}(v) if v else None")
+        elif field.default is attr.NOTHING:
+            lines.append(f"    v = get({name!r}, _MISSING)")
+            lines.append("    if v is _MISSING:")
+            lines.append("        return _fallback(data)")
+            lines.append(f"    obj.{name} = v")
+        elif isinstance(field.default, attr.Factory):  # type: ignore[arg-type]
+            factory = field.default.factory  # type: ignore[union-attr]
+            if factory is list:
+                default = "[]"
+            else:
+                default = f"_factory_{idx}()"
+                namespace[f"_factory_{idx}"] = factory
+            lines.append(f"    v = get({name!r}, _MISSING)")
+            lines.append(f"    obj.{name} = {default} if v is _MISSING else v")
+        elif field.default is None:
+            lines.append(f"    obj.{name} = get({name!r})")
+        else:
+            namespace[f"_default_{idx}"] = field.default
+            lines.append(f"    obj.{name} = get({name!r}, _default_{idx})")
+        if name in string_hooks and name not in nested:
+            namespace[f"_hook_{idx}"] = string_hooks[name]
+            lines.append(f"    v = obj.{name}")
+            lines.append("    if v.__class__ is str:")
+            lines.append(f"        obj.{name} = _hook_{idx}(v)")
+    lines += [
+        "    if data.keys() <= _known:",
+        "        obj._unknown_fields = None",
+        "    else:",
+        "        obj._unknown_fields = {k: v for k, v in data.items() if k not in _known} or None",
+        "    return obj",
+    ]
+    return compile_function("decode", lines, namespace, cls)
+
+
+def compile_lazy_decoder(cls: Type[Item]) -> Decoder:
+    """Generate the lazy decoder function for the item class ``cls``.
+
+    Lazy decoders return instances of a subclass of ``cls`` created on the fly
+    that overrides the fields holding items or lists of items with properties.
+    Their raw values are read (lazily too) on the first access, and the result
+    is kept in the slot for the next ones.
+
+    This is only possible for slotted classes with compiled decoders and
+    nested fields. The regular decoder is returned for the rest.
+    """
+    nested = get_nested_fields(cls)
+    if (
+        not nested
+        or not _can_compile(cls)
+        or not all(isinstance(getattr(cls, name, None), MemberDescriptorType) for name in nested)
+    ):
+        return get_decoder(cls)
+    lazy_cls = _make_lazy_class(cls, nested)
+    decoder = compile_decoder(cls, lazy_cls)
+    setattr(lazy_cls, LAZY_DECODER_ATTR, decoder)
+    return decoder
+
+
+class _Unresolved:
+    """Raw value of a nested field of a lazy item not read yet"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+def _lazy_property(slot: Any, nested_cls: Type[Item], is_list: bool) -> property:
+    get, set_, delete = slot.__get__, slot.__set__, slot.__delete__
+    read = None
+
+    def fget(obj):
+        nonlocal read
+        value = get(obj)
+        if value.__class__ is _Unresolved:
+            if read is None:
+                read = get_lazy_reader(nested_cls)
+            raw = value.value
+            value = [read(e) for e in raw] if is_list else read(raw)
+            set_(obj, value)
+        return value
+
+    return property(fget, set_, delete)
+
+
+def _make_lazy_class(cls: Type[Item], nested: NestedFields) -> Type[Item]:
+    """Create the subclass of ``cls`` used for its lazy instances"""
+    namespace = {
+        name: _lazy_property(getattr(cls, name), nested_cls, is_list) for name, (nested_cls, is_list) in nested.items()
+    }
+    return make_variant_class(cls, namespace)
+
+
+def make_variant_class(cls: Type[Item], namespace: Dict[str, Any]) -> Type[Item]:
+    """Create a subclass of ``cls`` with the attributes in ``namespace``, used
+    for variants of its instances (e.g. lazy ones). It has no slots of its
+    own, so instances can be converted between both classes assigning
+    ``__class__``, and it looks like ``cls`` (same name, module, etc.).
+
+    Instances of the variant compare equal to the regular ones: attrs returns
+    ``NotImplemented`` when comparing instances of different classes, so
+    Python falls back to the ``__eq__`` defined here.
+    """
+    get_values = operator.attrgetter(*(field.name for field in _fields(cls)))
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__ and other.__class__ is not cls:
+            return NotImplemented
+        return get_values(self) == get_values(other)
+
+    def __ne__(self, other):
+        result = __eq__(self, other)
+        return result if result is NotImplemented else not result
+
+    namespace = {
+        "__slots__": (),
+        "__module__": cls.__module__,
+        "__qualname__": cls.__qualname__,
+        "__doc__": cls.__doc__,
+        "__eq__": __eq__,
+        "__ne__": __ne__,
+        "__hash__": cls.__hash__,
+        # Used to pickle its instances as instances of cls
+        "_variant_of": cls,
+        **namespace,
+    }
+    return type(cls.__name__, (cls,), namespace)
+
+
+def _generic_decoder(
+    cls: Type[Item],
+    nested: NestedFields,
+    reader: ReaderGetter = get_reader,
+    string_hooks: Optional[Dict[str, Callable[[str], str]]] = None,
+) -> Decoder:
+    """Decoder going through ``__init__``, used for the classes that can't be compiled"""
+    nested_decoders = [(name, reader(nested_cls), is_list) for name, (nested_cls, is_list) in nested.items()]
+    hooks = [(name, hook) for name, hook in (string_hooks or {}).items() if name not in nested]
+
+    def decode(data: Optional[Dict]) -> Optional[Item]:
+        if not data:
+            return None
+        data = dict(data)
+        for name, decoder, is_list in nested_decoders:
+            value = data.get(name)
+            if is_list:
+                data[name] = [decoder(e) for e in value or []]
+            else:
+                data[name] = decoder(value)
+        for name, hook in hooks:
+            value = data.get(name)
+            if type(value) is str:
+                data[name] = hook(value)
+        unknown_fields, known_fields = split_in_unknown_and_known_fields(data, cls)
+        obj = cls(**known_fields)  # type: ignore
+        obj._unknown_fields = unknown_fields or None
+        return obj
+
+    return decode
+
+
+class CustomDecoders(abc.ABC):
+    """Set of decoders compiled with custom options, one for every item class.
+
+    Subclasses implement :meth:`compile`, usually invoking
+    :func:`compile_decoder` with :meth:`reader` as the reader of nested
+    items, so that these are decoded with the same options. The decoders are
+    cached in the instance instead of in the item classes.
+    """
+
+    def __init__(self) -> None:
+        self._decoders: Dict[Type[Item], Decoder] = {}
+        self._compiling: Set[Type[Item]] = set()
+
+    @abc.abstractmethod
+    def compile(self, cls: Type[Item]) -> Decoder:
+        """Generate the decoder for the item class ``cls``"""
+
+    def get_decoder(self, cls: Type[Item]) -> Decoder:
+        """Return the decoder of the item class ``cls``, compiling it if needed"""
+        decoder = self._decoders.get(cls)
+        if decoder is None:
+            self._compiling.add(cls)
+            try:
+                decoder = self.compile(cls)
+            finally:
+                self._compiling.discard(cls)
+            self._decoders[cls] = decoder
+        return decoder
+
+    def reader(self, cls: Type[Item]) -> Callable:
+        """Same as :func:`get_reader`, but for these decoders"""
+        if cls.from_dict.__func__ is not Item.from_dict.__func__:  # type: ignore[attr-defined]
+            return cls.from_dict
+        if cls in self._compiling:
+            # Recursive definition: its decoder is not available yet
+            return lambda data: self.get_decoder(cls)(data)
+        return self.get_decoder(cls)
+
+    def from_dict(self, cls: Type[Item], data: Optional[Dict]) -> Optional[Item]:
+        """Same as ``cls.from_dict(data)``, but with these decoders"""
+        return self.reader(cls)(data)
+
+    def from_dicts(self, cls: Type[Item], items: Iterable[Optional[Dict]]) -> List[Optional[Item]]:
+        """Same as ``cls.from_dicts(items)``, but with these decoders"""
+        decode = self.reader(cls)
+        return [decode(item) for item in items]
+
+
+def compile_function(name: str, lines: List[str], namespace: Dict[str, Any], cls: Type) -> Callable:
+    """Compile the source ``lines`` defining the function ``name``, using
+    ``namespace`` as globals. The generated source is attached to the
+    function (``__source__``) to ease debugging."""
+    source = "\n".join(lines)
+    filename = f"<autoextract_poet {name} {cls.__module__}.{cls.__qualname__}>"
+    exec(compile(source, filename, "exec"), namespace)
+    function = namespace[name]
+    function.__qualname__ = f"{cls.__qualname__}.{name}"
+    function.__source__ = source
+    return function
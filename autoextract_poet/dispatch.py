@@ -0,0 +1,87 @@
+"""
+Dispatching of AutoExtract batch responses.
+
+A single AutoExtract response can mix results of different page types
+(e.g. ``product``, ``article`` and ``productList``) with errors. :func:`dispatch`
+wraps every result in the page input class of its page type, and collects
+the errors apart instead of raising exceptions, so that whole batches are
+processed in a single loop:
+
+>>> batch = dispatch([
+...     {"query": {"userQuery": {"pageType": "product"}}, "product": {"name": "Chair"}},
+...     {"query": {"userQuery": {"pageType": "article"}}, "error": "Downloader error: http404"},
+... ])
+>>> [page_input.to_item().name for page_input in batch.page_inputs]
+['Chair']
+>>> [(error.index, error.page_type, error.message) for error in batch.errors]
+[(1, 'article', 'Downloader error: http404')]
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import attr
+
+from autoextract_poet import json_backends, registry
+from autoextract_poet.page_inputs import AutoExtractData, get_page_type
+
+
+@attr.s(auto_attribs=True, slots=True)
+class BatchError:
+    """A result of a batch that couldn't be wrapped in a page input"""
+
+    #: Position of the result in the batch
+    index: int
+    #: The result as received
+    result: Any
+    #: Page type requested, if available
+    page_type: Optional[str]
+    #: The error reported by AutoExtract, or the reason the result was rejected
+    message: str
+
+
+@attr.s(auto_attribs=True, slots=True)
+class Batch:
+    """The page inputs and errors of a batch, both in the order received"""
+
+    page_inputs: List[AutoExtractData] = attr.Factory(list)
+    errors: List[BatchError] = attr.Factory(list)
+
+    def by_page_type(self) -> Dict[str, List[AutoExtractData]]:
+        """Return the page inputs grouped by page type"""
+        groups: Dict[str, List[AutoExtractData]] = {}
+        for page_input in self.page_inputs:
+            groups.setdefault(page_input.page_type, []).append(page_input)
+        return groups
+
+
+def dispatch(results: Union[bytes, str, Iterable[Any]]) -> Batch:
+    """Route the results of an AutoExtract response to their page input
+    classes (see :mod:`autoextract_poet.registry`).
+
+    ``results`` is the response as a list of results, or as raw JSON (parsed
+    with :mod:`autoextract_poet.json_backends`). Results are reported as
+    errors, never raising exceptions, if AutoExtract returned an error
+    for them, if their page type is unknown, or if they lack its data.
+    """
+    if isinstance(results, (bytes, str)):
+        results = json_backends.loads(results)
+    classes = {info.page_type: info.page_input_class for info in registry.page_types()}
+    batch = Batch()
+    append, add_error = batch.page_inputs.append, batch.errors.append
+    for index, result in enumerate(results):
+        page_type = get_page_type(result)
+        if not isinstance(result, dict):
+            add_error(BatchError(index, result, None, "Result is not a JSON object"))
+            continue
+        error = result.get("error")
+        if error is not None:
+            add_error(BatchError(index, result, page_type, str(error)))
+            continue
+        cls = classes.get(page_type)  # type: ignore[arg-type]
+        if cls is None:
+            add_error(BatchError(index, result, page_type, f"Unknown page type: {page_type!r}"))
+        elif page_type not in result:
+            add_error(BatchError(index, result, page_type, f"Missing {page_type!r} data"))
+        else:
+            append(cls(result))
+    return batch
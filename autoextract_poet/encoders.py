@@ -0,0 +1,114 @@
+"""
+Compiled encoders for :class:`~.Item` classes, the counterpart of
+:mod:`autoextract_poet.decoders`.
+
+The encoder of an item class converts its instances to dictionaries with
+the same structure as the AutoExtract API results, including the unknown
+fields. Its source code is generated from the attrs fields of the class the
+first time it is needed, and then cached in the class itself.
+"""
+
+from typing import Any, Callable, Dict, Set, Type
+
+from autoextract_poet.decoders import compile_function
+from autoextract_poet.items import Item, _fields, get_nested_fields
+
+Encoder = Callable[[Item], Dict]
+
+# Attribute name used to cache the compiled encoder in every item class
+ENCODER_ATTR = "_encoder"
+
+# Classes whose encoder is being compiled. Used to break recursive definitions
+_COMPILING: Set[Type[Item]] = set()
+
+
+def get_encoder(cls: Type[Item]) -> Encoder:
+    """Return the encoder of the item class ``cls``, compiling it if needed.
+
+    The encoder is a function accepting an instance of ``cls`` and returning
+    a dictionary, exactly as :meth:`~.Item.to_dict` does.
+    """
+    encoder = cls.__dict__.get(ENCODER_ATTR)
+    if encoder is None:
+        _COMPILING.add(cls)
+        try:
+            encoder = compile_encoder(cls)
+        finally:
+            _COMPILING.discard(cls)
+        setattr(cls, ENCODER_ATTR, encoder)
+    return encoder
+
+
+def encode_value(value: Any) -> Any:
+    """Encode any value: items are converted to dictionaries and lists are
+    encoded element-wise. The rest of values are returned as they are."""
+    if isinstance(value, Item):
+        return get_encoder(value.__class__)(value)
+    if isinstance(value, list):
+        return [encode_value(v) for v in value]
+    return value
+
+
+def compile_encoder(cls: Type[Item]) -> Encoder:
+    """Generate the encoder function for the item class ``cls``."""
+    nested = get_nested_fields(cls)
+    namespace: Dict[str, Any] = {
+        "_encode_value": encode_value,
+        "_generic": _generic_encoder(cls),
+    }
+    reads, entries = [], []
+    for idx, field in enumerate(_fields(cls)):
+        name = field.name
+        if name not in nested:
+            entries.append(f"        {name!r}: self.{name},")
+            continue
+        nested_cls, is_list = nested[name]
+        namespace[f"_cls_{idx}"] = nested_cls
+        if nested_cls in _COMPILING:
+            # Recursive definition: its encoder is not available yet
+            namespace[f"_encode_{idx}"] = encode_value
+        else:
+            namespace[f"_encode_{idx}"] = get_encoder(nested_cls)
+        # Items of the expected class are encoded directly. The rest (None,
+        # subclasses, etc.) go through the generic path
+        reads.append(f"        v{idx} = self.{name}")
+        if is_list:
+            encode = f"_encode_{idx}(e) if e.__class__ is _cls_{idx} else _encode_value(e)"
+            value = f"[{encode} for e in v{idx}] if v{idx}.__class__ is list else _encode_value(v{idx})"
+        else:
+            value = f"_encode_{idx}(v{idx}) if v{idx}.__class__ is _cls_{idx} else _encode_value(v{idx})"
+        entries.append(f"        {name!r}: {value},")
+    lines = [
+        "def to_dict(self):",
+        "    try:",
+        *reads,
+        "        result = {",
+        *entries,
+        "        }",
+        "    except AttributeError:",
+        "        # Some field was deleted",
+        "        return _generic(self)",
+        "    unknown = self._unknown_fields",
+        "    if unknown:",
+        "        for k, v in unknown.items():",
+        "            if k not in result:",
+        "                result[k] = v",
+        "    return result",
+    ]
+    return compile_function("to_dict", lines, namespace, cls)
+
+
+def _generic_encoder(cls: Type[Item]) -> Encoder:
+    """Encoder skipping the deleted fields, like ``AutoExtractAdapter`` does"""
+    names = [field.name for field in _fields(cls)]
+
+    def to_dict(item: Item) -> Dict:
+        result = {name: encode_value(getattr(item, name)) for name in names if hasattr(item, name)}
+        unknown = item._unknown_fields
+        if unknown:
+            for key, value in unknown.items():
+                if key not in result:
+                    result[key] = value
+        return result
+
+    return to_dict
@@ -0,0 +1,177 @@
+"""
+Sharing of identical nested items.
+
+The same small nested items (breadcrumbs, pagination links, organizations,
+locations...) appear over and over in the results of a crawl, and even many
+times in a single result. :class:`Flyweights` decodes items sharing a single
+instance for every distinct value of these items, saving both the time to
+create them and the memory to keep them:
+
+>>> from autoextract_poet.items import Product
+>>> flyweights = Flyweights()
+>>> data = {"name": "Chair", "breadcrumbs": [{"name": "Home", "link": "/"}]}
+>>> first, second = flyweights.from_dicts(Product, [data, dict(data, name="Table")])
+>>> first.breadcrumbs[0] is second.breadcrumbs[0]
+True
+
+Sharing is only safe as long as the shared instances are not modified, so
+**every item of the shared classes returned by** :class:`Flyweights` **is
+immutable**: setting or deleting its attributes raises
+``attr.exceptions.FrozenInstanceError``, and its unknown fields are a
+read-only mapping. Use :func:`thaw` to get a regular, mutable copy.
+
+Items are shared only when all their values are hashable, which is always
+the case for items without nested items or lists.
+"""
+
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional, Type
+
+import attr
+
+from autoextract_poet.decoders import (
+    CustomDecoders,
+    Decoder,
+    compile_decoder,
+    make_variant_class,
+)
+from autoextract_poet.items import (
+    Breadcrumb,
+    Item,
+    Location,
+    Organization,
+    PaginationLink,
+    _fields,
+)
+
+#: Item classes shared by default
+DEFAULT_CLASSES = (Breadcrumb, PaginationLink, Organization, Location)
+
+DEFAULT_MAX_SIZE = 100_000
+
+# Fields missing from the data, in the keys of the shared items
+_ABSENT = object()
+
+# Attribute names used to cache the frozen variant of every item class, and
+# to tell the frozen variants apart
+FROZEN_CLASS_ATTR = "_frozen_class"
+FROZEN_MARK_ATTR = "_frozen"
+
+
+# Read-only and empty, shared by all the frozen items without unknown fields
+_NO_UNKNOWN_FIELDS: Mapping[str, Any] = MappingProxyType({})
+
+
+def _frozen_setattr(self: Any, name: str, value: Any) -> None:
+    raise attr.exceptions.FrozenInstanceError()
+
+
+def _frozen_delattr(self: Any, name: str) -> None:
+    raise attr.exceptions.FrozenInstanceError()
+
+
+def get_frozen_class(cls: Type[Item]) -> Type[Item]:
+    """Return the frozen variant of the item class ``cls``, creating it if
+    needed. Its instances compare equal to the regular ones."""
+    frozen_cls = cls.__dict__.get(FROZEN_CLASS_ATTR)
+    if frozen_cls is None:
+        frozen_cls = make_variant_class(
+            cls,
+            {
+                "__setattr__": _frozen_setattr,
+                "__delattr__": _frozen_delattr,
+                FROZEN_MARK_ATTR: True,
+            },
+        )
+        setattr(cls, FROZEN_CLASS_ATTR, frozen_cls)
+    return frozen_cls
+
+
+def is_frozen(item: Item) -> bool:
+    """Tell whether ``item`` was made immutable with :func:`freeze`"""
+    return item.__class__.__dict__.get(FROZEN_MARK_ATTR, False)
+
+
+def freeze(item: Item) -> Item:
+    """Make ``item`` immutable, in place. Nested items and lists are not
+    frozen. Return the same item."""
+    if not is_frozen(item):
+        unknown = item._unknown_fields
+        object.__setattr__(item, "_unknown_fields", MappingProxyType(unknown) if unknown else _NO_UNKNOWN_FIELDS)
+        item.__class__ = get_frozen_class(type(item))
+    return item
+
+
+def thaw(item: Item) -> Item:
+    """Return a mutable copy of a frozen item, or the item itself if not frozen"""
+    if not is_frozen(item):
+        return item
+    cls = item.__class__.__bases__[0]
+    copy = cls(**{field.name: getattr(item, field.name) for field in _fields(cls) if field.init})
+    copy._unknown_fields = dict(item._unknown_fields) or None
+    return copy
+
+
+class Flyweights(CustomDecoders):
+    """Decodes items sharing the instances of the identical items of
+    ``classes`` (by default :data:`DEFAULT_CLASSES`), which are frozen
+    (see :mod:`autoextract_poet.flyweight`).
+
+    The shared instances are kept in a cache of up to ``max_size`` items
+    (``None`` for no limit). Once full, new items are no longer shared. The
+    scope of the sharing is up to the user: a single instance can be used
+    for a whole crawl, or :meth:`clear` invoked after every batch.
+
+    Items are decoded with :meth:`~.CustomDecoders.from_dict` and
+    :meth:`~.CustomDecoders.from_dicts`.
+    """
+
+    def __init__(self, classes: Iterable[Type[Item]] = DEFAULT_CLASSES, max_size: Optional[int] = DEFAULT_MAX_SIZE):
+        super().__init__()
+        self.classes = frozenset(classes)
+        self.max_size = max_size
+        self._cache: Dict[tuple, Item] = {}
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def clear(self) -> None:
+        """Forget the shared instances"""
+        self._cache.clear()
+
+    def compile(self, cls: Type[Item]) -> Decoder:
+        decode = compile_decoder(cls, reader=self.reader)
+        if cls not in self.classes:
+            return decode
+        cache, max_size = self._cache, self.max_size
+        lookup = cache.get
+        names = tuple(field.name for field in _fields(cls))
+        known = frozenset(names)
+
+        def decode_shared(data: Optional[Dict]) -> Optional[Item]:
+            if not data:
+                return None
+            # Values in the order of the fields, with their types, as 1, 1.0
+            # and True are equal
+            get = data.get
+            values = [get(name, _ABSENT) for name in names]
+            key: tuple = (cls, tuple([(value.__class__, value) for value in values]))
+            if not data.keys() <= known:
+                unknown = sorted((name, value.__class__, value) for name, value in data.items() if name not in known)
+                key += (tuple(unknown),)
+            try:
+                item = lookup(key)
+            except TypeError:
+                # Unhashable values
+                item = decode(data)
+                return freeze(item) if item is not None else None
+            if item is None:
+                item = decode(data)
+                if item is None:
+                    return None
+                freeze(item)
+                if max_size is None or len(cache) < max_size:
+                    cache[key] = item
+            return item
+
+        return decode_shared
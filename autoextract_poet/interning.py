@@ -0,0 +1,123 @@
+"""
+Opt-in interning of strings while decoding items.
+
+Some fields take very few distinct values (currencies, units, availability,
+languages...) that are repeated across millions of items. After parsing the
+JSON, each one of them is a different string object. An :class:`Interner`
+decodes items collapsing the values of the chosen fields to a single shared
+object per distinct value, which reduces the memory used by large
+collections of items:
+
+>>> from autoextract_poet.items import Product
+>>> interner = Interner()
+>>> data = {"offers": [{"price": "1", "currency": "USD"}]}
+>>> first = interner.from_dict(Product, data)
+>>> second = interner.from_dict(Product, {"offers": [{"price": "2", "currency": "".join(["U", "SD"])}]})
+>>> first.offers[0].currency is second.offers[0].currency
+True
+
+The interned values are kept in a bounded :class:`InternTable`. Once full,
+new values are no longer interned (but still decoded), so that fields taking
+unexpectedly many distinct values can't grow it without limit.
+"""
+
+from typing import Callable, Dict, Iterable, Mapping, Optional, Set, Type
+
+from autoextract_poet.decoders import CustomDecoders, Decoder, compile_decoder
+from autoextract_poet.items import (
+    GTIN,
+    Area,
+    Article,
+    ArticleFromList,
+    Breadcrumb,
+    Item,
+    MileageFromOdometer,
+    Offer,
+    Salary,
+    TradeAction,
+)
+
+#: Fields interned by default, by item class. Subclasses inherit the fields
+#: of their base classes
+DEFAULT_FIELDS: Mapping[Type[Item], Iterable[str]] = {
+    Offer: ("currency", "availability"),
+    GTIN: ("type",),
+    Area: ("unitCode",),
+    MileageFromOdometer: ("unitCode",),
+    TradeAction: ("tradeType", "currency"),
+    Salary: ("currency",),
+    Breadcrumb: ("name",),
+    Article: ("inLanguage",),
+    ArticleFromList: ("inLanguage",),
+}
+
+DEFAULT_MAX_SIZE = 100_000
+
+
+class InternTable:
+    """Bounded table of interned strings.
+
+    >>> table = InternTable(max_size=1)
+    >>> table.intern("".join(["a", "b"])) is table.intern("".join(["a", "b"]))
+    True
+    >>> table.intern("".join(["c", "d"])) is table.intern("".join(["c", "d"]))
+    False
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self._strings: Dict[str, str] = {}
+        self._lookup = self._strings.get
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def __contains__(self, value: str) -> bool:
+        return value in self._strings
+
+    def intern(self, value: str) -> str:
+        """Return the interned instance of ``value``, adding it to the
+        table if there is room left."""
+        interned = self._lookup(value)
+        if interned is None:
+            if len(self._strings) >= self.max_size:
+                return value
+            interned = self._strings[value] = value
+        return interned
+
+    def clear(self) -> None:
+        self._strings.clear()
+
+
+class Interner(CustomDecoders):
+    """Decodes items interning the values of some of their fields.
+
+    ``fields`` maps item classes to the names of the fields to intern (by
+    default :data:`DEFAULT_FIELDS`). Only string values are interned.
+    The strings are kept in ``table``, a new :class:`InternTable` of
+    ``max_size`` strings if not given. Tables can be shared among interners.
+
+    Items are decoded with :meth:`~.CustomDecoders.from_dict` and
+    :meth:`~.CustomDecoders.from_dicts`. Nested items are interned too.
+    """
+
+    def __init__(
+        self,
+        fields: Optional[Mapping[Type[Item], Iterable[str]]] = None,
+        table: Optional[InternTable] = None,
+        max_size: int = DEFAULT_MAX_SIZE,
+    ):
+        super().__init__()
+        self.fields = {cls: frozenset(names) for cls, names in (DEFAULT_FIELDS if fields is None else fields).items()}
+        self.table = InternTable(max_size) if table is None else table
+
+    def fields_for(self, cls: Type[Item]) -> Set[str]:
+        """Return the names of the fields interned for the item class ``cls``"""
+        names: Set[str] = set()
+        for base in cls.__mro__:
+            names.update(self.fields.get(base, ()))
+        return names
+
+    def compile(self, cls: Type[Item]) -> Decoder:
+        hooks: Dict[str, Callable[[str], str]] = {name: self.table.intern for name in self.fields_for(cls)}
+        return compile_decoder(cls, reader=self.reader, string_hooks=hooks)
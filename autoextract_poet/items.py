@@ -1,20 +1,75 @@
-from typing import Dict, List, Optional
+import operator
+import warnings
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    cast,
+    get_type_hints,
+)
 
 import attr
 
-from .util import split_in_unknown_and_known_fields
+# Maps field names to a pair (item class, whether it is a list of items)
+NestedFields = Dict[str, Tuple[Type["Item"], bool]]
 
 
 class _ItemBase:
-    # Reserving an slot for _unknown_fields_dict.
+    # Reserving an slot for the unknown fields.
     # This is done in a base class because otherwise attr.s won't pick it up
-    __slots__ = ("_unknown_fields_dict",)
+    __slots__ = ("_unknown_fields",)
+
+
+_get_unknown_fields = _ItemBase._unknown_fields.__get__  # type: ignore[attr-defined]
+_set_unknown_fields = _ItemBase._unknown_fields.__set__  # type: ignore[attr-defined]
+
+
+def _unknown_fields_dict(self) -> Dict:
+    # Most items have no unknown fields, so the slot is ``None`` instead of
+    # an empty dict until they are needed. Internal code reads the slot
+    # directly to avoid creating them.
+    unknown = _get_unknown_fields(self)
+    if unknown is None:
+        unknown = {}
+        _set_unknown_fields(self, unknown)
+    return unknown
+
+
+_ItemBase._unknown_fields_dict = property(_unknown_fields_dict, _set_unknown_fields)  # type: ignore[attr-defined]
 
 
 @attr.s(auto_attribs=True, slots=True)
 class Item(_ItemBase):
+    # Fields holding items or lists of items. Derived from the annotations of
+    # every item class when it is defined. Use ``get_nested_fields`` to read it.
+    # Item classes can still declare it, which is only used if their
+    # annotations can't be resolved.
+    _nested_fields: ClassVar[NestedFields] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        declared = cls.__dict__.get("_nested_fields")
+        if declared is not None:
+            cls._declared_nested_fields = declared
+            del cls._nested_fields
+        # attr.s(slots=True) creates the final class again, this time
+        # including the attrs fields
+        if "__attrs_attrs__" in cls.__dict__:
+            try:
+                cls._nested_fields = _derive_nested_fields(cls)
+            except Exception:
+                # Resolved on first use (e.g. the class references itself)
+                pass
+
     def __attrs_post_init__(self):
-        self._unknown_fields_dict = {}
+        self._unknown_fields = None
 
     @classmethod
     def from_dict(cls, item: Optional[Dict]):
@@ -25,40 +80,251 @@ class Item(_ItemBase):
         so that ``AutoExtractAdapter`` can include them in the resultant item.
         This ensures supporting new AutoExtract fields even if the
         item library is not in sync.
+
+        Fields annotated as items (e.g. ``Optional[Rating]``) or as lists
+        of items (e.g. ``List[Offer]``) are read recursively.
+
+        The work is done by a decoder function specific for every class,
+        generated on the first invocation. See :mod:`autoextract_poet.decoders`.
         """
-        if not item:
-            return None
-        unknown_fields, known_fields = split_in_unknown_and_known_fields(item, cls)
-        obj = cls(**known_fields)  # type: ignore
-        obj._unknown_fields_dict = unknown_fields
-        return obj
+        decoder = cls.__dict__.get("_decoder")
+        if decoder is None:
+            from .decoders import get_decoder
+
+            decoder = get_decoder(cls)
+        return decoder(item)
+
+    @classmethod
+    def from_json(cls, data: Union[bytes, str]):
+        """
+        Read an item from its JSON representation, parsed with the fastest
+        JSON library available (see :mod:`autoextract_poet.json_backends`).
+        """
+        from . import json_backends
+
+        return cls.from_dict(json_backends.loads(data))
+
+    @classmethod
+    def from_dict_lazy(cls, item: Optional[Dict]):
+        """
+        Read an item from a dictionary, as ``from_dict`` does, but deferring
+        reading the fields holding items or lists of items (e.g.
+        ``ProductList.products``) until they are accessed for the first time.
+        Useful when only a few fields of the item are going to be used.
+
+        The item returned is an instance of a subclass of ``cls``
+        that behaves exactly as a regular one (e.g. compares equal).
+        Nested items are read lazily as well.
+        """
+        from .decoders import get_lazy_decoder
+
+        return get_lazy_decoder(cls)(item)
+
+    def to_dict(self) -> Dict:
+        """
+        Return the item as a dictionary with the structure of the
+        AutoExtract API results. That is, the counterpart of ``from_dict``.
+
+        Nested items are converted as well, and unknown fields are included
+        after the known ones, the same way ``AutoExtractAdapter`` does.
+        Lists of plain values are not copied, but shared with the item.
+
+        The work is done by an encoder function specific for every class,
+        generated on the first invocation. See :mod:`autoextract_poet.encoders`.
+        """
+        encoder = self.__class__.__dict__.get("_encoder")
+        if encoder is None:
+            from .encoders import get_encoder
+
+            encoder = get_encoder(self.__class__)
+        return encoder(self)
 
     @classmethod
     def from_list(cls, items: Optional[List[Dict]]) -> List:
         """
         Read items from a list, invoking ``from_dict`` for each item in the list
         """
-        return [cls.from_dict(item) for item in items or []]
+        return cls.from_dicts(items or [])
 
+    @classmethod
+    def from_dicts(cls, items: Iterable[Optional[Dict]]) -> List:
+        """
+        Read a batch of items, as ``from_dict`` would do for each one of them.
 
-def _apply_types(item: Optional[dict], *, from_dict: dict = None, from_list: dict = None) -> Optional[dict]:
-    """
-    Utility function to wrap basic types into data structures.
-
-    Assumptions:
-    * field names stay the same;
-    * from_dict fields are optional, and in case of an absent field
-      we're preserving None instead of creating an empty data structure;
-    * from_list fields are optional, but in case of an absent field
-      an empty list is created.
+        Preferable to invoking ``from_dict`` in a loop when reading many items
+        of the same class, given that the decoder is looked up only once.
+        """
+        from .decoders import get_reader
+
+        read = get_reader(cls)
+        return [read(item) for item in items]
+
+    def __reduce__(self):
+        """
+        Compact pickling: items are pickled as their class and the tuple of
+        the values of their fields, in order, restored calling the class.
+        Their unknown fields and deleted fields, if any, are restored
+        apart. Nested items are pickled the same way.
+
+        Items of the classes which can't be created passing the values of
+        all their fields positionally (e.g. those with ``kw_only`` or
+        ``init=False`` fields, or converters) are restored setting their
+        fields directly instead.
+
+        Variants of the item classes (e.g. lazy or frozen items) are pickled
+        as regular items of the class they derive from.
+        """
+        cls = self.__class__
+        cls = cls.__dict__.get("_variant_of", cls)
+        get_values, _, positional = cls.__dict__.get("_pickle_info") or _pickle_info(cls)
+        unknown = self._unknown_fields
+        if unknown is not None and unknown.__class__ is not dict:
+            unknown = dict(unknown) or None
+        try:
+            values = get_values(self)
+        except AttributeError:
+            # Some field was deleted
+            values = tuple(getattr(self, field.name, _DELETED) for field in _fields(cls))
+            return _restore_item, (cls, values, unknown)
+        if unknown is None and positional:
+            return cls, values
+        return _restore_item, (cls, values, unknown)
+
+
+def _fields(cls: Type[Item]) -> Tuple["attr.Attribute", ...]:
+    """``attr.fields`` of an item class. Item classes are attrs classes, but
+    not all the versions of the attrs stubs can tell"""
+    return attr.fields(cast(Any, cls))
+
+
+class _Deleted:
+    """Value of the deleted fields when pickling"""
+
+    def __reduce__(self):
+        return "_DELETED"
+
+
+_DELETED = _Deleted()
+
+
+def _pickle_info(cls: Type[Item]) -> Tuple[Callable[[Any], Tuple], Tuple[str, ...], bool]:
+    """Return a function returning the tuple of the field values of an
+    item of class ``cls``, the tuple of their names, and whether the class
+    can be called with the values to restore its items. Cached in the class."""
+    from .decoders import _can_compile
+
+    fields = _fields(cls)
+    names = tuple(field.name for field in fields)
+    # Calling the class must be equivalent to setting the fields directly
+    positional = _can_compile(cls) and not any(field.kw_only for field in fields)
+    get_values: Callable[[Any], Tuple]
+    if len(names) > 1:
+        get_values = operator.attrgetter(*names)
+    elif names:
+        get_one = operator.attrgetter(names[0])
+
+        def get_values(item):
+            return (get_one(item),)
+
+    else:
+
+        def get_values(item):
+            return ()
+
+    info = (get_values, names, positional)
+    cls._pickle_info = info  # type: ignore[attr-defined]
+    return info
+
+
+def _restore_item(cls: Type[Item], values: Tuple, unknown: Optional[Dict]) -> Item:
+    """Restore a pickled item. See ``Item.__reduce__``"""
+    _, names, _ = cls.__dict__.get("_pickle_info") or _pickle_info(cls)
+    obj = object.__new__(cls)
+    setter = object.__setattr__
+    for name, value in zip(names, values):
+        if value is not _DELETED:
+            setter(obj, name, value)
+    setter(obj, "_unknown_fields", unknown)
+    return obj
+
+
+def nested_item_type(tp: Any) -> Optional[Tuple[Type[Item], bool]]:
+    """If the type annotation ``tp`` refers to items, return a pair
+    with the item class and a boolean telling whether it is a list of them.
+    Return ``None`` otherwise.
+
+    >>> nested_item_type(Optional[Item])
+    (<class 'autoextract_poet.items.Item'>, False)
+    >>> nested_item_type(List[Item])
+    (<class 'autoextract_poet.items.Item'>, True)
+    >>> nested_item_type(List[str])
+    >>> nested_item_type(Optional[str])
     """
-    if not item:
-        return None
+    origin = getattr(tp, "__origin__", None)
+    args: Tuple = getattr(tp, "__args__", None) or ()
+    is_list = False
+    if origin is Union:
+        args = tuple(arg for arg in args if arg is not type(None))  # noqa: E721
+        if len(args) != 1:
+            return None
+        tp = args[0]
+        origin = getattr(tp, "__origin__", None)
+        args = getattr(tp, "__args__", None) or ()
+    if origin in (list, List):
+        if len(args) != 1:
+            return None
+        tp, is_list = args[0], True
+    if isinstance(tp, type) and issubclass(tp, Item):
+        return tp, is_list
+    return None
 
-    new_item = dict(**item)
-    new_item.update({key: cls.from_dict(item.get(key)) for key, cls in (from_dict or {}).items()})
-    new_item.update({key: cls.from_list(item.get(key, [])) for key, cls in (from_list or {}).items()})
-    return new_item
+
+def get_nested_fields(cls: Type[Item]) -> NestedFields:
+    """Return the fields of the item class ``cls`` holding items
+    (or lists of items), mapped to the pair returned by :func:`nested_item_type`.
+
+    >>> get_nested_fields(Review)
+    {'reviewRating': (<class 'autoextract_poet.items.Rating'>, False)}
+    >>> get_nested_fields(Offer)
+    {}
+
+    ``TypeError`` is raised if the annotations of ``cls`` can't be resolved,
+    unless the class declares its ``_nested_fields``, which are used instead
+    with a warning.
+    """
+    nested = cls.__dict__.get("_nested_fields")
+    if nested is None:
+        # Either the class is not slotted, or it couldn't be resolved
+        # when it was defined (e.g. it references itself)
+        try:
+            nested = _derive_nested_fields(cls)
+        except Exception as e:
+            nested = cls.__dict__.get("_declared_nested_fields")
+            if nested is None:
+                raise TypeError(
+                    f"Can't resolve the annotations of {cls.__qualname__} to find its nested items: {e!r}."
+                    " Fix them or declare its _nested_fields"
+                ) from e
+            warnings.warn(
+                f"Can't resolve the annotations of {cls.__qualname__} to find its nested items: {e!r}."
+                " Using its declared _nested_fields",
+                stacklevel=2,
+            )
+        cls._nested_fields = nested
+    return nested
+
+
+def _derive_nested_fields(cls: Type[Item]) -> NestedFields:
+    """Read the nested fields from the attrs field annotations. Errors
+    resolving them are raised."""
+    # Resolves string annotations and forward references
+    hints = get_type_hints(cls)
+    nested = {}
+    for field in _fields(cls):
+        nested_type = nested_item_type(hints.get(field.name, field.type))
+        if nested_type:
+            nested[field.name] = nested_type
+    return nested
 
 
 @attr.s(auto_attribs=True, slots=True)
@@ -130,11 +396,6 @@ class Article(Item):
     audioUrls: List[str] = attr.Factory(list)
     canonicalUrl: Optional[str] = None
 
-    @classmethod
-    def from_dict(cls, item: Optional[Dict]):
-        new_item = _apply_types(item, from_list={"breadcrumbs": Breadcrumb})
-        return super().from_dict(new_item)
-
 
 @attr.s(auto_attribs=True, slots=True)
 class ArticleFromList(Item):
@@ -160,18 +421,6 @@ class ArticleList(Item):
     paginationNext: Optional[PaginationLink] = None
     paginationPrevious: Optional[PaginationLink] = None
 
-    @classmethod
-    def from_dict(cls, item: Optional[Dict]):
-        new_item = _apply_types(
-            item,
-            from_list={"articles": ArticleFromList},
-            from_dict={
-                "paginationNext": PaginationLink,
-                "paginationPrevious": PaginationLink,
-            },
-        )
-        return super().from_dict(new_item)
-
 
 @attr.s(auto_attribs=True, slots=True)
 class Product(Item):
@@ -196,20 +445,6 @@ class Product(Item):
     size: Optional[str] = None
     style: Optional[str] = None
 
-    @classmethod
-    def from_dict(cls, item: Optional[Dict]):
-        new_item = _apply_types(
-            item,
-            from_dict={"aggregateRating": Rating},
-            from_list={
-                "additionalProperty": AdditionalProperty,
-                "breadcrumbs": Breadcrumb,
-                "gtin": GTIN,
-                "offers": Offer,
-            },
-        )
-        return super().from_dict(new_item)
-
 
 @attr.s(auto_attribs=True, slots=True)
 class ProductFromList(Item):
@@ -225,11 +460,6 @@ class ProductFromList(Item):
     description: Optional[str] = None
     aggregateRating: Optional[Rating] = None
 
-    @classmethod
-    def from_dict(cls, item: Optional[Dict]):
-        new_item = _apply_types(item, from_dict={"aggregateRating": Rating}, from_list={"offers": Offer})
-        return super().from_dict(new_item)
-
 
 @attr.s(auto_attribs=True, slots=True)
 class ProductList(Item):
@@ -240,21 +470,6 @@ class ProductList(Item):
     paginationNext: Optional[PaginationLink] = None
     paginationPrevious: Optional[PaginationLink] = None
 
-    @classmethod
-    def from_dict(cls, item: Optional[Dict]):
-        new_item = _apply_types(
-            item,
-            from_list={
-                "products": ProductFromList,
-                "breadcrumbs": Breadcrumb,
-            },
-            from_dict={
-                "paginationNext": PaginationLink,
-                "paginationPrevious": PaginationLink,
-            },
-        )
-        return super().from_dict(new_item)
-
 
 @attr.s(auto_attribs=True, slots=True)
 class Location(Item):
@@ -290,18 +505,6 @@ class JobPosting(Item):
     baseSalary: Optional[Salary] = None
     jobLocation: Optional[Location] = None
 
-    @classmethod
-    def from_dict(cls, item: Optional[Dict]):
-        new_item = _apply_types(
-            item,
-            from_dict={
-                "hiringOrganization": Organization,
-                "baseSalary": Salary,
-                "jobLocation": Location,
-            },
-        )
-        return super().from_dict(new_item)
-
 
 @attr.s(auto_attribs=True, slots=True)
 class Comment(Item):
@@ -320,11 +523,6 @@ class Comments(Item):
     url: Optional[str] = None
     comments: List[Comment] = attr.Factory(list)
 
-    @classmethod
-    def from_dict(cls, item: Optional[Dict]):
-        new_item = _apply_types(item, from_list={"comments": Comment})
-        return super().from_dict(new_item)
-
 
 @attr.s(auto_attribs=True, slots=True)
 class ForumPost(Item):
@@ -351,11 +549,6 @@ class ForumPosts(Item):
     topic: Optional[Topic] = None
     posts: List[ForumPost] = attr.Factory(list)
 
-    @classmethod
-    def from_dict(cls, item: Optional[Dict]):
-        new_item = _apply_types(item, from_list={"posts": ForumPost}, from_dict={"topic": Topic})
-        return super().from_dict(new_item)
-
 
 @attr.s(auto_attribs=True, slots=True)
 class Address(Item):
@@ -408,22 +601,6 @@ class RealEstate(Item):
     identifier: Optional[str] = None
     tradeActions: List[TradeAction] = attr.Factory(list)
 
-    @classmethod
-    def from_dict(cls, item: Optional[Dict]):
-        new_item = _apply_types(
-            item,
-            from_list={
-                "additionalProperty": AdditionalProperty,
-                "breadcrumbs": Breadcrumb,
-                "tradeActions": TradeAction,
-            },
-            from_dict={
-                "address": Address,
-                "area": Area,
-            },
-        )
-        return super().from_dict(new_item)
-
 
 @attr.s(auto_attribs=True, slots=True)
 class Review(Item):
@@ -438,11 +615,6 @@ class Review(Item):
     isVerified: Optional[bool] = None
     probability: Optional[float] = None
 
-    @classmethod
-    def from_dict(cls, item: Optional[Dict]):
-        new_item = _apply_types(item, from_dict={"reviewRating": Rating})
-        return super().from_dict(new_item)
-
 
 @attr.s(auto_attribs=True, slots=True)
 class Reviews(Item):
@@ -452,20 +624,6 @@ class Reviews(Item):
     paginationNext: Optional[PaginationLink] = None
     paginationPrevious: Optional[PaginationLink] = None
 
-    @classmethod
-    def from_dict(cls, item: Optional[Dict]):
-        new_item = _apply_types(
-            item,
-            from_list={
-                "reviews": Review,
-            },
-            from_dict={
-                "paginationNext": PaginationLink,
-                "paginationPrevious": PaginationLink,
-            },
-        )
-        return super().from_dict(new_item)
-
 
 @attr.s(auto_attribs=True, slots=True)
 class MileageFromOdometer(Item):
@@ -521,22 +679,3 @@ class Vehicle(Item):
     numberOfDoors: Optional[int] = None
     vehicleSeatingCapacity: Optional[int] = None
     fuelEfficiency: List[FuelEfficiency] = attr.Factory(list)
-
-    @classmethod
-    def from_dict(cls, item: Optional[Dict]):
-        new_item = _apply_types(
-            item,
-            from_dict={
-                "aggregateRating": Rating,
-                "mileageFromOdometer": MileageFromOdometer,
-                "vehicleEngine": VehicleEngine,
-                "availableAtOrFrom": AvailableAtOrFrom,
-            },
-            from_list={
-                "additionalProperty": AdditionalProperty,
-                "breadcrumbs": Breadcrumb,
-                "offers": Offer,
-                "fuelEfficiency": FuelEfficiency,
-            },
-        )
-        return super().from_dict(new_item)
@@ -0,0 +1,82 @@
+"""
+JSON parsing backends.
+
+Parsing is a large share of the cost of reading AutoExtract responses, so the
+fastest available JSON library is used: `orjson`_ or `msgspec`_ if installed,
+falling back to the standard library ``json`` module otherwise.
+
+.. _orjson: https://github.com/ijl/orjson
+.. _msgspec: https://github.com/jcrist/msgspec
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Union
+
+Loads = Callable[[Union[bytes, str]], Any]
+
+
+def _orjson() -> Loads:
+    import orjson  # type: ignore[import]
+
+    return orjson.loads
+
+
+def _msgspec() -> Loads:
+    import msgspec
+
+    return msgspec.json.decode
+
+
+def _json() -> Loads:
+    return json.loads
+
+
+# Backends by preference order
+BACKENDS: Dict[str, Callable[[], Loads]] = {
+    "orjson": _orjson,
+    "msgspec": _msgspec,
+    "json": _json,
+}
+
+
+def get_loads(backend: Optional[str] = None) -> Loads:
+    """Return the ``loads`` function of the backend with the given name, or
+    of the default one (see :func:`set_backend`) if not given.
+
+    ``ImportError`` is raised if the backend is not installed.
+
+    >>> get_loads("json")(b'{"a": [1]}')
+    {'a': [1]}
+    """
+    if backend is None:
+        return loads
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown JSON backend {backend!r}. Choose one of: {', '.join(BACKENDS)}")
+    return BACKENDS[backend]()
+
+
+def available_backends() -> List[str]:
+    """Return the names of the installed backends, by preference order"""
+    names = []
+    for name, load in BACKENDS.items():
+        try:
+            load()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def set_backend(backend: Optional[str] = None) -> str:
+    """Set the backend used by default, returning its name. If no name is
+    given, the preferred one among the installed backends is chosen."""
+    global loads, backend_name
+    backend = backend or available_backends()[0]
+    loads = get_loads(backend)
+    backend_name = backend
+    return backend
+
+
+loads = json.loads  # type: Loads
+backend_name = "json"
+set_backend()
@@ -1,7 +1,24 @@
-from typing import ClassVar, Generic, Optional, Type, TypeVar
+import asyncio
+from concurrent.futures import Executor
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 import attr
 
+from autoextract_poet import json_backends, registry
+from autoextract_poet.decoders import get_reader
 from autoextract_poet.items import (
     Article,
     ArticleList,
@@ -35,6 +52,10 @@ class AutoExtractHtml:
 
 T = TypeVar("T", bound=Item)
 
+#: Size (see :func:`estimate_size`) above which :meth:`AutoExtractData.to_item_async`
+#: decodes in an executor. About half a millisecond of decoding
+DEFAULT_OFFLOAD_THRESHOLD = 200
+
 
 @attr.s(auto_attribs=True)
 class AutoExtractData(Generic[T]):
@@ -53,12 +74,126 @@ class AutoExtractData(Generic[T]):
     page_type: ClassVar[str]
     data: dict
 
+    # Set for every subclass when defined, see __init_subclass__. None if it
+    # can't be resolved then (e.g. a mixin is listed first)
+    _item_class: ClassVar[Any] = T  # type: ignore[misc]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        try:
+            cls._item_class = get_item_class(cls)
+        except (AttributeError, IndexError):
+            cls._item_class = None
+            return
+        if "page_type" in cls.__dict__:
+            registry.register_page_input(cls, cls._item_class)
+
     @property
     def item_class(self):
-        return get_item_class(self)
+        return self._item_class or get_item_class(type(self))
 
     def to_item(self) -> Optional[T]:
-        return self.item_class.from_dict(self.data[self.page_type])
+        """Return the item for the data.
+
+        The item is read only once: following invocations return the same
+        instance (so changes made to it are visible for everyone sharing the
+        page input) as long as ``data`` is not replaced by another object.
+        Invoke :meth:`invalidate_item` if ``data`` is modified in place.
+        """
+        data = self.data
+        cached = self.__dict__.get("_item_cache")
+        if cached is not None and cached[0] is data:
+            return cached[1]
+        item = self.item_class.from_dict(data[self.page_type])
+        self.__dict__["_item_cache"] = (data, item)
+        return item
+
+    async def to_item_async(
+        self, executor: Optional[Executor] = None, threshold: int = DEFAULT_OFFLOAD_THRESHOLD
+    ) -> Optional[T]:
+        """Same as :meth:`to_item`, but data larger than ``threshold`` (see
+        :func:`estimate_size`) is decoded in ``executor`` (the default executor
+        of the event loop if not given), so that large items don't block the
+        event loop. Process pools can be used too.
+        """
+        data = self.data
+        cached = self.__dict__.get("_item_cache")
+        if cached is not None and cached[0] is data:
+            return cached[1]
+        item_data = data[self.page_type]
+        if estimate_size(item_data) <= threshold:
+            return self.to_item()
+        loop = asyncio.get_running_loop()
+        item = await loop.run_in_executor(executor, self.item_class.from_dict, item_data)
+        # Concurrent invocations return the item of the first one finishing
+        cached = self.__dict__.get("_item_cache")
+        if cached is not None and cached[0] is data:
+            return cached[1]
+        if self.data is data:
+            self.__dict__["_item_cache"] = (data, item)
+        return item
+
+    def invalidate_item(self) -> None:
+        """Discard the item cached by :meth:`to_item`"""
+        self.__dict__.pop("_item_cache", None)
+
+    @staticmethod
+    def to_items(page_inputs: Iterable["AutoExtractData"]) -> List[Optional[Item]]:
+        """Return the items of a batch of page inputs, in the same order.
+
+        Equivalent to invoking ``to_item`` for every page input (cache
+        included), but the item class and decoder are looked up only once per
+        page input class. Page inputs of different classes can be mixed, e.g.::
+
+            items = AutoExtractData.to_items(page_inputs)
+
+        The page inputs of classes overriding ``to_item`` or ``item_class``
+        are read invoking their ``to_item``.
+        """
+        readers: Dict[Type[AutoExtractData], Optional[Tuple[str, Callable]]] = {}
+        items = []
+        for page_input in page_inputs:
+            page_input_cls = type(page_input)
+            if page_input_cls in readers:
+                reader = readers[page_input_cls]
+            else:
+                reader = readers[page_input_cls] = _batch_reader(page_input_cls)
+            if reader is None:
+                items.append(page_input.to_item())
+                continue
+            data = page_input.data
+            cached = page_input.__dict__.get("_item_cache")
+            if cached is not None and cached[0] is data:
+                items.append(cached[1])
+                continue
+            page_type, read = reader
+            item = read(data[page_type])
+            page_input.__dict__["_item_cache"] = (data, item)
+            items.append(item)
+        return items
+
+
+def _batch_reader(page_input_cls: Type[AutoExtractData]) -> Optional[Tuple[str, Callable]]:
+    """Return the page type and the item reader used by :meth:`AutoExtractData.to_items`
+    for a page input class, or ``None`` if its items must be read with ``to_item``"""
+    if page_input_cls.to_item is not AutoExtractData.to_item:
+        return None
+    if page_input_cls.item_class is not AutoExtractData.item_class:
+        return None
+    return page_input_cls.page_type, get_reader(page_input_cls._item_class or get_item_class(page_input_cls))
+
+
+def estimate_size(data: Any) -> int:
+    """Return the size of the data of an item, as a rough estimate of the
+    cost of decoding it: the number of elements of its lists (e.g. the
+    products of a product list), plus one.
+
+    >>> estimate_size({"name": "Chair", "offers": [{"price": "1"}, {"price": "2"}]})
+    3
+    """
+    if not isinstance(data, dict):
+        return 1
+    return 1 + sum(len(value) for value in data.values() if isinstance(value, list))
 
 
 def get_item_class(page_input_cls: Type[AutoExtractData]) -> Type[Item]:
@@ -74,6 +209,72 @@ def get_item_class(page_input_cls: Type[AutoExtractData]) -> Type[Item]:
     return page_input_cls.__orig_bases__[0].__args__[0]  # type: ignore[attr-defined]
 
 
+def get_page_type(result: dict) -> Optional[str]:
+    """Return the page type requested in the query of an AutoExtract result,
+    or ``None`` if not available.
+
+    >>> get_page_type({"query": {"userQuery": {"pageType": "product"}}})
+    'product'
+    >>> get_page_type({"error": "Timeout"})
+    """
+    # No exceptions are raised, as this is often used with error results
+    query = result.get("query") if isinstance(result, dict) else None
+    user_query = query.get("userQuery") if isinstance(query, dict) else None
+    return user_query.get("pageType") if isinstance(user_query, dict) else None
+
+
+def get_result_url(result: Dict) -> Optional[str]:
+    """Return the URL requested in the query of an AutoExtract result, or
+    ``None`` if not available.
+
+    >>> get_result_url({"query": {"userQuery": {"url": "https://example.com"}}})
+    'https://example.com'
+    """
+    query = result.get("query") if isinstance(result, dict) else None
+    user_query = query.get("userQuery") if isinstance(query, dict) else None
+    return user_query.get("url") if isinstance(user_query, dict) else None
+
+
+def get_page_input_class(page_type: Optional[str]) -> Type[AutoExtractData]:
+    """Return the page input class for the page type.
+
+    >>> get_page_input_class("productList") is AutoExtractProductListData
+    True
+
+    ``ValueError`` is raised for unknown page types.
+    See :mod:`autoextract_poet.registry`.
+    """
+    info = registry.get(page_type) if page_type is not None else None
+    if info is None:
+        raise ValueError(f"Unknown page type: {page_type!r}")
+    return info.page_input_class
+
+
+def page_inputs_from_json(response: Union[bytes, str]) -> List[AutoExtractData]:
+    """Return the page inputs for the results of a raw AutoExtract response
+    (a JSON array), choosing the page input class from the page type of
+    every result (see :func:`get_page_input_class`).
+
+    The response is parsed with the fastest JSON library available
+    (see :mod:`autoextract_poet.json_backends`).
+    """
+    classes: Dict[Optional[str], Type[AutoExtractData]] = {}
+    page_inputs = []
+    for result in json_backends.loads(response):
+        page_type = get_page_type(result)
+        cls = classes.get(page_type)
+        if cls is None:
+            cls = classes[page_type] = get_page_input_class(page_type)
+        page_inputs.append(cls(result))
+    return page_inputs
+
+
+def items_from_json(response: Union[bytes, str]) -> List[Optional[Item]]:
+    """Return the items for the results of a raw AutoExtract response.
+    See :func:`page_inputs_from_json`."""
+    return AutoExtractData.to_items(page_inputs_from_json(response))
+
+
 @export
 @attr.s(auto_attribs=True)
 class AutoExtractArticleData(AutoExtractData[Article]):
@@ -29,6 +29,7 @@ from autoextract_poet.page_inputs import (
     AutoExtractReviewsData,
     AutoExtractVehicleData,
 )
+from autoextract_poet.registry import register_page
 from autoextract_poet.util import export
 
 
@@ -56,6 +57,7 @@ class AutoExtractItemWebPage(AutoExtractWebPage, ItemPage):
 
 
 @export
+@register_page
 @attr.s(auto_attribs=True)
 class AutoExtractArticlePage(ItemPage):
     """
@@ -71,6 +73,7 @@ class AutoExtractArticlePage(ItemPage):
 
 
 @export
+@register_page
 @attr.s(auto_attribs=True)
 class AutoExtractArticleListPage(ItemPage):
     """
@@ -86,6 +89,7 @@ class AutoExtractArticleListPage(ItemPage):
 
 
 @export
+@register_page
 @attr.s(auto_attribs=True)
 class AutoExtractProductPage(ItemPage):
     """
@@ -101,6 +105,7 @@ class AutoExtractProductPage(ItemPage):
 
 
 @export
+@register_page
 @attr.s(auto_attribs=True)
 class AutoExtractProductListPage(ItemPage):
     """
@@ -116,6 +121,7 @@ class AutoExtractProductListPage(ItemPage):
 
 
 @export
+@register_page
 @attr.s(auto_attribs=True)
 class AutoExtractCommentsPage(ItemPage):
     """
@@ -131,6 +137,7 @@ class AutoExtractCommentsPage(ItemPage):
 
 
 @export
+@register_page
 @attr.s(auto_attribs=True)
 class AutoExtractForumPostsPage(ItemPage):
     """
@@ -146,6 +153,7 @@ class AutoExtractForumPostsPage(ItemPage):
 
 
 @export
+@register_page
 @attr.s(auto_attribs=True)
 class AutoExtractJobPostingPage(ItemPage):
     """
@@ -161,6 +169,7 @@ class AutoExtractJobPostingPage(ItemPage):
 
 
 @export
+@register_page
 @attr.s(auto_attribs=True)
 class AutoExtractRealEstatePage(ItemPage):
     """
@@ -176,6 +185,7 @@ class AutoExtractRealEstatePage(ItemPage):
 
 
 @export
+@register_page
 @attr.s(auto_attribs=True)
 class AutoExtractReviewsPage(ItemPage):
     """
@@ -191,6 +201,7 @@ class AutoExtractReviewsPage(ItemPage):
 
 
 @export
+@register_page
 @attr.s(auto_attribs=True)
 class AutoExtractVehiclePage(ItemPage):
     """
@@ -0,0 +1,98 @@
+"""
+Registry of the AutoExtract page types.
+
+Every page type (e.g. ``"product"``) is related to a page input class
+(:class:`~.AutoExtractProductData`), an item class (:class:`~.Product`) and
+a page class (:class:`~.AutoExtractProductPage`). The registry allows to go
+from any of them to the rest with a single dictionary lookup:
+
+>>> from autoextract_poet import AutoExtractProductData, AutoExtractProductPage
+>>> lookup("product").item_class
+<class 'autoextract_poet.items.Product'>
+>>> lookup(AutoExtractProductPage).page_type
+'product'
+>>> lookup(lookup(AutoExtractProductData).item_class).page_class is AutoExtractProductPage
+True
+
+Page input classes defining a ``page_type`` are registered automatically
+when defined. Page classes are registered with the :func:`register_page`
+decorator. When several classes are registered for the same page type,
+the last one wins.
+"""
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Type, TypeVar, Union
+
+import attr
+
+from autoextract_poet.items import Item
+
+if TYPE_CHECKING:
+    from autoextract_poet.page_inputs import AutoExtractData  # noqa: F401
+
+
+@attr.s(auto_attribs=True, slots=True)
+class PageTypeInfo:
+    """Classes related to an AutoExtract page type"""
+
+    page_type: str
+    page_input_class: Type["AutoExtractData"]
+    item_class: Type[Item]
+    page_class: Optional[Type] = None
+
+
+_BY_PAGE_TYPE: Dict[str, PageTypeInfo] = {}
+# Page input, item and page classes don't overlap, so they can share the dict
+_BY_CLASS: Dict[type, PageTypeInfo] = {}
+
+C = TypeVar("C", bound=type)
+
+
+def lookup(key: Union[str, type]) -> PageTypeInfo:
+    """Return the information for a page type, given its name or any of its
+    page input, item or page classes. ``KeyError`` is raised if not found."""
+    if isinstance(key, str):
+        return _BY_PAGE_TYPE[key]
+    return _BY_CLASS[key]
+
+
+def get(key: Union[str, type], default: Any = None) -> Optional[PageTypeInfo]:
+    """Same as :func:`lookup`, but returning ``default`` if not found"""
+    try:
+        return lookup(key)
+    except (KeyError, TypeError):
+        return default
+
+
+def page_types() -> List[PageTypeInfo]:
+    """Return the information for all the registered page types"""
+    return list(_BY_PAGE_TYPE.values())
+
+
+def register_page_input(cls: Type["AutoExtractData"], item_class: Type[Item]) -> PageTypeInfo:
+    """Register the page input class ``cls``, whose ``page_type`` and item
+    class are given. Invoked automatically for the subclasses of
+    :class:`~.AutoExtractData`."""
+    previous = _BY_PAGE_TYPE.get(cls.page_type)
+    info = PageTypeInfo(cls.page_type, cls, item_class, previous.page_class if previous else None)
+    _BY_PAGE_TYPE[info.page_type] = info
+    for related in (cls, item_class, info.page_class):
+        if related is not None:
+            _BY_CLASS[related] = info
+    return info
+
+
+def register_page(cls: C) -> C:
+    """Class decorator registering a page class. The class must be an
+    ``attr.s`` class with a field annotated with a registered page input class.
+    Must be applied after (that is, above) ``attr.s``."""
+    for field in attr.fields(cls):
+        if field.type is None:
+            continue
+        info = get(field.type)
+        if info is not None and info.page_input_class is field.type:
+            break
+    else:
+        raise ValueError(f"{cls} has no field of a registered page input class")
+    info.page_class = cls
+    _BY_CLASS[cls] = info
+    return cls
@@ -0,0 +1,150 @@
+"""
+Incremental reading of AutoExtract responses.
+
+AutoExtract API responses are JSON arrays with one result per query. Dumps of
+many responses can be huge, so instead of loading them as a whole the
+functions in this module read them in chunks, keeping in memory no more
+than the largest single result (plus a chunk).
+"""
+
+import codecs
+import json
+import re
+from typing import IO, Any, Dict, Iterator, Optional, Type
+
+from autoextract_poet.page_inputs import (
+    AutoExtractData,
+    get_page_input_class,
+    get_page_type,
+)
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_SEPARATORS = frozenset(" \t\n\r,]")
+_DECODER = json.JSONDecoder()
+
+
+def iter_results(stream: IO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """Iterate over the elements of the JSON arrays in ``stream``.
+
+    ``stream`` can be a binary (UTF-8 encoded) or a text file-like object
+    containing one or many concatenated JSON arrays, optionally separated
+    by whitespace (so JSON lines files whose lines are arrays are supported).
+
+    >>> import io
+    >>> list(iter_results(io.BytesIO(b'[{"a": 1}, {"b": 2}]\\n[]\\n[3]')))
+    [{'a': 1}, {'b': 2}, 3]
+
+    ``json.JSONDecodeError`` is raised if the content is not valid.
+    """
+    buffer = _Buffer(stream, chunk_size)
+    while True:
+        char = buffer.peek()
+        if not char:
+            return
+        buffer.expect("[")
+        if buffer.peek() == "]":
+            buffer.advance()
+            continue
+        while True:
+            yield buffer.decode_value()
+            char = buffer.peek()
+            buffer.expect(",", "]")
+            if char == "]":
+                break
+
+
+def iter_page_inputs(
+    stream: IO,
+    page_input_cls: Optional[Type[AutoExtractData]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[AutoExtractData]:
+    """Iterate over the results of the AutoExtract responses in ``stream``
+    (see :func:`iter_results`), wrapping each one of them in its page input
+    class (e.g. :class:`~.AutoExtractProductData`).
+
+    The page input class is chosen from the page type of the query of every
+    result, unless ``page_input_cls`` is given. ``ValueError`` is raised for
+    results whose page type is unknown.
+    """
+    classes: Dict[Optional[str], Type[AutoExtractData]] = {}
+    for result in iter_results(stream, chunk_size):
+        if page_input_cls is not None:
+            yield page_input_cls(result)
+            continue
+        page_type = get_page_type(result)
+        cls = classes.get(page_type)
+        if cls is None:
+            cls = classes[page_type] = get_page_input_class(page_type)
+        yield cls(result)
+
+
+class _Buffer:
+    """Text buffer over a stream, refilled on demand. The consumed text is
+    dropped every time the buffer is refilled."""
+
+    def __init__(self, stream: IO, chunk_size: int):
+        self._read = stream.read
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size: int) -> bool:
+        """Read up to ``size`` more characters from the stream.
+        Return ``False`` if the end of the stream was reached."""
+        if self.eof:
+            return False
+        chunk = self._read(size)
+        final = not chunk
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk, final)
+        if final:
+            self.eof = True
+        consumed = self.pos
+        self.text = self.text[consumed:] + chunk
+        self.pos = 0
+        return not final
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or an empty
+        string at the end of the stream."""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()  # type: ignore[union-attr]
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill(self._chunk_size):
+                return ""
+
+    def advance(self) -> None:
+        self.pos += 1
+
+    def expect(self, *chars: str) -> None:
+        char = self.peek()
+        if not char or char not in chars:
+            expected = " or ".join(repr(char) for char in chars)
+            raise json.JSONDecodeError(f"Expecting {expected}", self.text, self.pos)
+        self.advance()
+
+    def decode_value(self) -> Any:
+        """Decode the JSON value starting at the current position. The buffer
+        is refilled until the value is complete, reading each time as much
+        as it is buffered so that large values are read in linear time."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError as e:
+                error: Optional[json.JSONDecodeError] = e
+            else:
+                # A value not followed by a separator could be truncated
+                # (e.g. the number 1.25 split as "1." and "25")
+                if self.eof or (end < len(self.text) and self.text[end] in _SEPARATORS):
+                    self.pos = end
+                    return value
+                error = None
+            if not self.fill(max(self._chunk_size, len(self.text) - self.pos)):
+                if error is not None:
+                    raise error
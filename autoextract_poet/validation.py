@@ -0,0 +1,305 @@
+"""
+Compiled validation of items.
+
+Checks that the values of the fields of items match their annotations:
+plain types (``str``, ``int``, ``float``, ``bool``...), ``Optional`` values,
+nested items and the elements of lists, recursively. Problems are reported,
+never raised, with the path of the value within the item:
+
+>>> from autoextract_poet.items import Product
+>>> for problem in validate(Product.from_dict({"name": 1, "offers": [{"price": 2}]})):
+...     print(problem.message)
+name: expected Optional[str], got int
+offers[0].price: expected Optional[str], got int
+
+As with decoders (see :mod:`autoextract_poet.decoders`), every item class
+gets its own validator function, generated from its annotations the first
+time it is needed and then cached in the class itself. Valid items are
+checked without allocating anything, so that every item of large feeds can
+be validated.
+
+Integers are valid values for ``float`` fields, as JSON doesn't tell them
+apart, but booleans are not valid numbers. Annotations which can't be
+checked (e.g. ``Any``) are skipped, and unknown fields are not validated.
+Lazy items (see :meth:`~.Item.from_dict_lazy`) are read when validated.
+"""
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+    get_type_hints,
+)
+
+import attr
+
+from autoextract_poet.decoders import compile_function
+from autoextract_poet.items import Item, _fields
+
+# Returns the problems of an item, or None if it is valid
+Validator = Callable[[Item], Optional[List["Problem"]]]
+
+# Attribute name used to cache the compiled validator in every item class
+VALIDATOR_ATTR = "_validator"
+
+# Classes whose validator is being compiled. Used to break recursive definitions
+_COMPILING: Set[Type[Item]] = set()
+
+
+class _Missing:
+    """Value of the fields deleted from an item"""
+
+    def __repr__(self):
+        return "<missing>"
+
+
+#: Value of the problems of fields which were deleted
+MISSING = _Missing()
+
+
+@attr.s(auto_attribs=True, slots=True)
+class Problem:
+    """A value not matching the annotation of its field"""
+
+    #: Path of the value in the item, e.g. ``offers[0].price``
+    path: str
+    #: The annotation, e.g. ``Optional[str]``
+    expected: str
+    #: The value found, or :data:`MISSING` if the field was deleted
+    value: Any
+
+    @property
+    def message(self) -> str:
+        found = "missing" if self.value is MISSING else type(self.value).__name__
+        return f"{self.path}: expected {self.expected}, got {found}"
+
+
+def validate(item: Item) -> List[Problem]:
+    """Return the problems found in ``item`` and its nested items, or an empty
+    list if it is valid. See :mod:`autoextract_poet.validation`."""
+    return _validate_any(item) or []
+
+
+def is_valid(item: Item) -> bool:
+    """Return whether ``item`` and its nested items are valid"""
+    return not _validate_any(item)
+
+
+def get_validator(cls: Type[Item]) -> Validator:
+    """Return the validator of the item class ``cls``, compiling it if needed.
+
+    The validator is a function accepting an instance of ``cls`` and returning
+    the list of its problems, or ``None`` if there are none.
+    """
+    validator = cls.__dict__.get(VALIDATOR_ATTR)
+    if validator is None:
+        _COMPILING.add(cls)
+        try:
+            validator = compile_validator(cls)
+        finally:
+            _COMPILING.discard(cls)
+        setattr(cls, VALIDATOR_ATTR, validator)
+    return validator
+
+
+def compile_validator(cls: Type[Item]) -> Validator:
+    """Generate the validator function for the item class ``cls``."""
+    try:
+        # Resolves string annotations and forward references
+        hints = get_type_hints(cls)
+    except Exception:
+        hints = {}
+    fields = _fields(cls)
+    namespace: Dict[str, Any] = {
+        "_MISSING": MISSING,
+        "_add": _add,
+        "_add_nested": _add_nested,
+        "_add_element": _add_element,
+        "_validate_any": _validate_any,
+    }
+    checks = []
+    for idx, field in enumerate(fields):
+        tp = hints.get(field.name, field.type)
+        checks += _field_check(field.name, idx, tp, namespace)
+    args = ", ".join(f"v{idx}" for idx in range(len(fields)))
+    reads = ", ".join(f"obj.{field.name}" for field in fields)
+    getattrs = ", ".join(f"getattr(obj, {field.name!r}, _MISSING)" for field in fields)
+    lines = [
+        f"def check({args}):",
+        "    problems = None",
+        *checks,
+        "    return problems",
+        "def validate(obj):",
+        "    try:",
+        f"        return check({reads})",
+        "    except AttributeError:",
+        "        # Some field was deleted",
+        f"        return check({getattrs})",
+    ]
+    return compile_function("validate", lines, namespace, cls)
+
+
+def _field_check(name: str, idx: int, tp: Any, namespace: Dict[str, Any]) -> List[str]:
+    """Return the source lines checking the value ``v{idx}`` of the field
+    ``name`` annotated as ``tp``"""
+    var = f"v{idx}"
+    namespace[f"_expected_{idx}"] = _type_name(tp)
+    add = f"problems = _add(problems, {name!r}, {var}, _expected_{idx})"
+    optional, tp = _unwrap_optional(tp)
+    origin = getattr(tp, "__origin__", None)
+    args: Tuple = getattr(tp, "__args__", None) or ()
+    if origin in (list, List) or tp is list:
+        lines = [
+            f"    if {var}.__class__ is not list and not isinstance({var}, list):",
+            f"        {add}",
+        ]
+        element_check = _element_check(name, idx, args[0] if len(args) == 1 else Any, namespace)
+        if element_check:
+            lines += [
+                "    else:",
+                f"        for i, e in enumerate({var}):",
+                *(f"        {line}" for line in element_check),
+            ]
+        return lines
+    if isinstance(tp, type) and issubclass(tp, Item):
+        namespace[f"_cls_{idx}"] = tp
+        namespace[f"_validate_{idx}"] = _validate_any if tp in _COMPILING else get_validator(tp)
+        return [
+            f"    if {var}.__class__ is _cls_{idx}:",
+            f"        p = _validate_{idx}({var})",
+            f"    elif isinstance({var}, _cls_{idx}):",
+            f"        p = _validate_any({var})",
+            "    else:",
+            "        p = None",
+            *([f"        if {var} is not None:", f"            {add}"] if optional else [f"        {add}"]),
+            "    if p:",
+            f"        problems = _add_nested(problems, {name!r}, p)",
+        ]
+    invalid = _invalid_expression(var, tp, f"_type_{idx}", namespace)
+    if invalid is None:
+        invalid = f"{var} is _MISSING"
+    elif optional:
+        invalid = f"{var} is not None and ({invalid})"
+    return [f"    if {invalid}:", f"        {add}"]
+
+
+def _element_check(name: str, idx: int, tp: Any, namespace: Dict[str, Any]) -> List[str]:
+    """Return the source lines checking the element ``e``, at index ``i``,
+    of the list ``v{idx}`` of the field ``name``, or none if it can't be checked"""
+    namespace[f"_element_{idx}"] = _type_name(tp)
+    optional, tp = _unwrap_optional(tp)
+    add = f"problems = _add_element(problems, {name!r}, i, e, _element_{idx})"
+    if isinstance(tp, type) and issubclass(tp, Item):
+        namespace[f"_element_cls_{idx}"] = tp
+        namespace[f"_element_validate_{idx}"] = _validate_any if tp in _COMPILING else get_validator(tp)
+        return [
+            f"    if e.__class__ is _element_cls_{idx}:",
+            f"        p = _element_validate_{idx}(e)",
+            f"    elif isinstance(e, _element_cls_{idx}):",
+            "        p = _validate_any(e)",
+            *(["    elif e is None:", "        continue"] if optional else []),
+            "    else:",
+            f"        {add}",
+            "        continue",
+            "    if p:",
+            f"        problems = _add_element(problems, {name!r}, i, e, p)",
+        ]
+    invalid = _invalid_expression("e", tp, f"_element_type_{idx}", namespace)
+    if invalid is None:
+        return []
+    if optional:
+        invalid = f"e is not None and ({invalid})"
+    return [f"    if {invalid}:", f"        {add}"]
+
+
+def _invalid_expression(var: str, tp: Any, type_name: str, namespace: Dict[str, Any]) -> Optional[str]:
+    """Return an expression which is true if the value ``var`` is not an
+    instance of ``tp``, or ``None`` if it can't be checked"""
+    if tp is float:
+        return f"{var}.__class__ is not float and (not isinstance({var}, (int, float)) or {var}.__class__ is bool)"
+    if tp is int:
+        return f"{var}.__class__ is not int and (not isinstance({var}, int) or {var}.__class__ is bool)"
+    if tp in (str, bool):
+        return f"{var}.__class__ is not {tp.__name__} and not isinstance({var}, {tp.__name__})"
+    origin = getattr(tp, "__origin__", None)
+    if isinstance(origin, type):
+        # Other generics, e.g. Dict[str, str], only check the container
+        tp = origin
+    # Any is a class since Python 3.11
+    if isinstance(tp, type) and tp not in (object, Any):
+        namespace[type_name] = tp
+        return f"not isinstance({var}, {type_name})"
+    return None
+
+
+def _unwrap_optional(tp: Any):
+    """Return whether ``tp`` is ``Optional``, and the type it wraps"""
+    if getattr(tp, "__origin__", None) is Union:
+        args = [arg for arg in tp.__args__ if arg is not type(None)]  # noqa: E721
+        if len(args) == 1:
+            return True, args[0]
+    return False, tp
+
+
+def _type_name(tp: Any) -> str:
+    """
+    >>> _type_name(Optional[List[Item]])
+    'Optional[List[Item]]'
+    """
+    optional, inner = _unwrap_optional(tp)
+    if optional:
+        return f"Optional[{_type_name(inner)}]"
+    origin = getattr(tp, "__origin__", None)
+    args = getattr(tp, "__args__", None)
+    if origin in (list, List) and args:
+        return f"List[{_type_name(args[0])}]"
+    if isinstance(tp, type):
+        return tp.__name__
+    return str(tp).replace("typing.", "")
+
+
+def _validate_any(item: Any) -> Optional[List[Problem]]:
+    cls = item.__class__
+    validator = cls.__dict__.get(VALIDATOR_ATTR)
+    if validator is None:
+        validator = get_validator(cls)
+    return validator(item)
+
+
+def _add(problems: Optional[List[Problem]], path: str, value: Any, expected: str) -> List[Problem]:
+    if problems is None:
+        problems = []
+    problems.append(Problem(path, expected, value))
+    return problems
+
+
+def _add_nested(problems: Optional[List[Problem]], name: str, nested: List[Problem]) -> List[Problem]:
+    """Add the problems of the nested item in the field ``name``"""
+    if problems is None:
+        problems = []
+    for problem in nested:
+        problems.append(Problem(f"{name}.{problem.path}", problem.expected, problem.value))
+    return problems
+
+
+def _add_element(
+    problems: Optional[List[Problem]], name: str, index: int, value: Any, nested: Union[str, List[Problem]]
+) -> List[Problem]:
+    """Add the problems of the element ``value`` at ``index`` of the list in
+    the field ``name``: the problems of the element, if it is an item, or the
+    expected type otherwise."""
+    if problems is None:
+        problems = []
+    path = f"{name}[{index}]"
+    if isinstance(nested, str):
+        problems.append(Problem(path, nested, value))
+        return problems
+    for problem in nested:
+        problems.append(Problem(f"{path}.{problem.path}", problem.expected, problem.value))
+    return problems
@@ -0,0 +1,58 @@
+"""
+Benchmarks for autoextract-poet, run on the samples in ``tests/fixtures``.
+Run them from the root of the repository, e.g.::
+
+    python -m benchmarks.memory
+
+See ``benchmarks/README.rst``.
+"""
+
+import json
+import os
+from typing import Dict, Type
+
+from autoextract_poet import registry
+from autoextract_poet.items import Item
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "tests", "fixtures")
+
+#: Fixture with a sample AutoExtract response for every page type
+FIXTURES: Dict[str, str] = {
+    "article": "sample_article.json",
+    "articleList": "sample_article_list.json",
+    "comments": "sample_comments.json",
+    "forumPosts": "sample_forum_posts.json",
+    "jobPosting": "sample_job_posting.json",
+    "product": "sample_product.json",
+    "productList": "sample_product_list.json",
+    "realEstate": "sample_real_estate.json",
+    "reviews": "sample_reviews.json",
+    "vehicle": "sample_vehicle.json",
+}
+
+
+def load_results() -> Dict[str, dict]:
+    """Return the sample AutoExtract result for every page type"""
+    results = {}
+    for page_type, name in FIXTURES.items():
+        with open(os.path.join(FIXTURES_DIR, name)) as f:
+            results[page_type] = json.load(f)[0]
+    return results
+
+
+def item_class(page_type: str) -> Type[Item]:
+    return registry.lookup(page_type).item_class
+
+
+def load_json(path: str) -> dict:
+    """Return the content of a JSON file, or an empty dict if it doesn't exist"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_json(path: str, data: dict) -> None:
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
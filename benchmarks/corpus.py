@@ -0,0 +1,260 @@
+"""
+Synthetic AutoExtract corpora for load testing.
+
+Generates any number of AutoExtract results, for any page type, taking the
+samples in ``tests/fixtures`` as templates: every generated item has the
+structure of the sample, with its values replaced by random ones of the same
+kind (texts, URLs, numbers, dates...). Short single-word values (currencies,
+availability, units...) are kept, as they are usually categorical.
+
+The generation is reproducible: the same seed and options always produce
+the same corpus, and every result depends only on the seed and its position,
+so corpora can be generated in parallel chunks (see ``start``).
+
+Usage::
+
+    python -m benchmarks.corpus corpus.jsonl --count 1000000 --page-type product --seed 1
+
+The output is a JSON array (``.json``) or has a result per line (``.jsonl``).
+See ``--help`` for the rest of options: list lengths, null rates, unknown
+fields injection, text sizes and error rates.
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence, Tuple, Type
+
+import attr
+
+from autoextract_poet import registry
+from autoextract_poet.items import Item, _fields, get_nested_fields
+from benchmarks import FIXTURES, load_results
+
+#: Range of the lengths of the lists of items, by field name. The rest of
+#: lists have the length of the sample
+DEFAULT_LIST_LENGTHS: Dict[str, Tuple[int, int]] = {
+    "additionalProperty": (0, 10),
+    "articles": (10, 30),
+    "breadcrumbs": (2, 5),
+    "comments": (5, 30),
+    "gtin": (0, 2),
+    "images": (1, 8),
+    "offers": (1, 3),
+    "posts": (5, 30),
+    "products": (10, 30),
+    "reviews": (5, 20),
+}
+
+_WORDS = (
+    "the of and to in for with on by from new best quality great price free shipping size color black white "
+    "red blue green light dark steel wood cotton leather classic modern premium original edition set pack "
+    "home garden kitchen office outdoor sport travel kids women men news report city market company people "
+    "year week today review rating product service support delivery model series pro plus mini max"
+).split()
+_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+_NUMBER = re.compile(r"^-?\d+(\.\d+)?$")
+_CATEGORICAL = re.compile(r"^[A-Za-z][A-Za-z0-9_/]{0,14}$")
+
+
+@attr.s(auto_attribs=True)
+class CorpusOptions:
+    """Options of the generated corpus"""
+
+    #: Page types of the results, chosen randomly for every result
+    page_types: Sequence[str] = tuple(FIXTURES)
+    #: Range of the lengths of the lists of items, by field name
+    list_lengths: Dict[str, Tuple[int, int]] = attr.Factory(lambda: dict(DEFAULT_LIST_LENGTHS))
+    #: Probability of every field being ``None`` (or an empty list)
+    null_rate: float = 0.1
+    #: Probability of every item getting an unknown field
+    unknown_rate: float = 0.05
+    #: Size of the texts, relative to those of the samples
+    text_scale: float = 1.0
+    #: Probability of every result being an error
+    error_rate: float = 0.0
+
+
+class CorpusGenerator:
+    """Generates the results of a synthetic corpus. See :mod:`benchmarks.corpus`."""
+
+    def __init__(self, seed: int = 0, options: Optional[CorpusOptions] = None):
+        self.seed = seed
+        self.options = options or CorpusOptions()
+        self._samples = load_results()
+        unknown = set(self.options.page_types) - set(self._samples)
+        if unknown:
+            raise ValueError(f"Unknown page types: {', '.join(sorted(unknown))}")
+
+    def result(self, index: int) -> Dict[str, Any]:
+        """Return the result at the position ``index`` of the corpus"""
+        rng = random.Random(f"{self.seed}-{index}")
+        options = self.options
+        page_type = rng.choice(options.page_types)
+        sample = self._samples[page_type]
+        url = f"https://example.com/{page_type.lower()}/{index}"
+        query = {
+            "id": f"{self.seed}-{index}",
+            "domain": "example.com",
+            "userQuery": {"pageType": page_type, "url": url},
+        }
+        if rng.random() < options.error_rate:
+            return {"query": query, "error": rng.choice(["Downloader error: http404", "Query timed out"])}
+        cls = registry.lookup(page_type).item_class
+        return {
+            "query": query,
+            "webPage": sample.get("webPage"),
+            "algorithmVersion": sample.get("algorithmVersion"),
+            page_type: _Generator(rng, options).item(cls, sample[page_type], url),
+        }
+
+    def results(self, count: int, start: int = 0) -> Iterator[Dict[str, Any]]:
+        """Iterate over ``count`` results, starting at the position ``start``"""
+        for index in range(start, start + count):
+            yield self.result(index)
+
+    def write(self, stream: IO[str], count: int, start: int = 0, jsonl: bool = False) -> None:
+        """Write ``count`` results to ``stream``, as a JSON array or with a
+        result per line if ``jsonl``."""
+        separator = "\n" if jsonl else ",\n"
+        if not jsonl:
+            stream.write("[")
+        for i, result in enumerate(self.results(count, start)):
+            if i:
+                stream.write(separator)
+            stream.write(json.dumps(result))
+        stream.write("\n" if jsonl else "]\n")
+
+
+@attr.s(auto_attribs=True)
+class _Generator:
+    rng: random.Random
+    options: CorpusOptions
+
+    def item(self, cls: Type[Item], sample: Dict[str, Any], url: str) -> Dict[str, Any]:
+        rng, options = self.rng, self.options
+        nested = get_nested_fields(cls)
+        item: Dict[str, Any] = {}
+        for field in _fields(cls):
+            name = field.name
+            value = sample.get(name)
+            if name in ("url", "canonicalUrl"):
+                item[name] = url
+                continue
+            is_list = isinstance(value, list) or (name in nested and nested[name][1])
+            if value is None or rng.random() < options.null_rate:
+                item[name] = [] if is_list else None
+            elif name in nested:
+                nested_cls, _ = nested[name]
+                if is_list:
+                    samples = [element for element in value if isinstance(element, dict)] or [{}]
+                    item[name] = [
+                        self.item(nested_cls, rng.choice(samples), f"{url}/{name}/{i}")
+                        for i in range(self.length(name, len(value)))
+                    ]
+                else:
+                    item[name] = self.item(nested_cls, value, f"{url}/{name}")
+            elif isinstance(value, list):
+                values = value or [None]
+                item[name] = [self.value(rng.choice(values), url) for _ in range(self.length(name, len(value)))]
+            else:
+                item[name] = self.value(value, url)
+        if rng.random() < options.unknown_rate:
+            item[f"unknownField{rng.randint(1, 5)}"] = self.text(20)
+        return item
+
+    def length(self, name: str, sample_length: int) -> int:
+        low, high = self.options.list_lengths.get(name, (sample_length, sample_length))
+        return self.rng.randint(low, high)
+
+    def value(self, sample: Any, url: str) -> Any:
+        rng = self.rng
+        if isinstance(sample, bool) or sample is None:
+            return sample
+        if isinstance(sample, int):
+            return rng.randint(0, max(2 * sample, 10))
+        if isinstance(sample, float):
+            # Probabilities and the like are kept between 0 and 1
+            return round(rng.uniform(0, 1.0 if sample <= 1 else 2 * sample), 2)
+        if isinstance(sample, dict):
+            return {key: self.value(value, url) for key, value in sample.items()}
+        if not isinstance(sample, str):
+            return sample
+        if sample.startswith("http"):
+            return f"{url}/{rng.randint(0, 10**6)}"
+        if _NUMBER.match(sample):
+            decimals = len(sample.split(".")[1]) if "." in sample else 0
+            return f"{rng.uniform(0, max(2 * float(sample), 10)):.{decimals}f}"
+        if _DATE.match(sample):
+            return f"20{rng.randint(10, 24)}-{rng.randint(1, 12):02}-{rng.randint(1, 28):02}" + sample[10:]
+        if _CATEGORICAL.match(sample):
+            return sample
+        size = max(1, round(len(sample) * self.options.text_scale))
+        if sample.startswith("<"):
+            tag = sample[1:].split(">")[0].split()[0]
+            return f"<{tag}>{self.text(size)}</{tag}>"
+        return self.text(size)
+
+    def text(self, size: int) -> str:
+        words: List[str] = []
+        length = -1
+        while length < size:
+            word = self.rng.choice(_WORDS)
+            words.append(word)
+            length += len(word) + 1
+        text = " ".join(words)
+        return text[0].upper() + text[1:]
+
+
+def _list_length(value: str) -> Tuple[str, Tuple[int, int]]:
+    name, _, lengths = value.partition("=")
+    low, _, high = lengths.partition(":")
+    return name, (int(low), int(high or low))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic AutoExtract corpus")
+    parser.add_argument("output", help="output file (.json or .jsonl), - for the standard output")
+    parser.add_argument("--count", type=int, default=1000, help="number of results")
+    parser.add_argument("--start", type=int, default=0, help="position of the first result")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jsonl", action="store_true", help="a result per line (default for .jsonl files)")
+    parser.add_argument(
+        "--page-type", action="append", choices=list(FIXTURES), help="page type of the results (repeatable)"
+    )
+    parser.add_argument(
+        "--list-length",
+        action="append",
+        type=_list_length,
+        default=[],
+        metavar="FIELD=MIN:MAX",
+        help="range of lengths of a list field, e.g. offers=0:5 (repeatable)",
+    )
+    parser.add_argument("--null-rate", type=float, default=0.1)
+    parser.add_argument("--unknown-rate", type=float, default=0.05)
+    parser.add_argument("--text-scale", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    options = CorpusOptions(
+        page_types=args.page_type or tuple(FIXTURES),
+        list_lengths={**DEFAULT_LIST_LENGTHS, **dict(args.list_length)},
+        null_rate=args.null_rate,
+        unknown_rate=args.unknown_rate,
+        text_scale=args.text_scale,
+        error_rate=args.error_rate,
+    )
+    generator = CorpusGenerator(args.seed, options)
+    jsonl = args.jsonl or args.output.endswith(".jsonl")
+    if args.output == "-":
+        generator.write(sys.stdout, args.count, args.start, jsonl)
+    else:
+        with open(args.output, "w") as f:
+            generator.write(f, args.count, args.start, jsonl)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
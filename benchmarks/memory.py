@@ -0,0 +1,204 @@
+"""
+Memory footprint of the items.
+
+For every page type, the item of its sample result is decoded many times
+with ``tracemalloc`` tracing the allocations, reporting per decoded item:
+
+* the bytes and memory blocks it retains (the item, nested items, lists and
+  unknown fields dicts, but not the strings and numbers, which are shared
+  with the parsed JSON);
+* the peak of memory used while decoding it (Python 3.9+ only).
+
+The retained bytes and blocks are checked against the budgets recorded in
+``memory_budgets.json``, failing if any of them is exceeded. The sizes of the
+objects differ between Python versions, so the budgets are recorded for every
+Python minor version (e.g. ``3.11``). Running a version without budgets fails
+too, until they are recorded. The deep size of every item class (including
+the strings and numbers) is reported too.
+
+Usage::
+
+    python -m benchmarks.memory [--repeat N] [--update] [--headroom 0.1]
+
+``--update`` records the current measures, plus some headroom, as the
+new budgets of the running Python version.
+"""
+
+import argparse
+import gc
+import math
+import os
+import sys
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import attr
+
+from autoextract_poet.items import Item, _fields
+from benchmarks import item_class, load_json, load_results, save_json
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), "memory_budgets.json")
+
+# Budgeted measures
+BUDGETED = ("bytes", "blocks")
+
+
+@attr.s(auto_attribs=True, slots=True)
+class Measure:
+    """Memory used by a single decoded item, on average"""
+
+    bytes: float
+    blocks: float
+    peak: Optional[float] = None
+
+
+@attr.s(auto_attribs=True, slots=True)
+class ClassSize:
+    """Deep size of all the instances of an item class"""
+
+    count: int = 0
+    bytes: int = 0
+
+
+def measure_decode(decode: Callable[[Any], Any], data: Any, repeat: int = 100) -> Measure:
+    """Measure the memory used by the results of ``decode(data)``, decoding
+    it ``repeat`` times."""
+    decode(data)  # Warm up, e.g. compiling the decoders
+    results: List[Any] = [None] * repeat
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        reset_peak = getattr(tracemalloc, "reset_peak", None)
+        if reset_peak is not None:
+            reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        for i in range(repeat):
+            results[i] = decode(data)
+        peak = tracemalloc.get_traced_memory()[1] - start if reset_peak is not None else None
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "filename")
+    return Measure(
+        bytes=sum(stat.size_diff for stat in stats) / repeat,
+        blocks=sum(stat.count_diff for stat in stats) / repeat,
+        peak=None if peak is None else peak / repeat,
+    )
+
+
+def deep_sizes(item: Item, sizes: Optional[Dict[str, ClassSize]] = None) -> Dict[str, ClassSize]:
+    """Return the number of instances and deep size of every item class in
+    ``item`` and its nested items. The size of each item includes its lists,
+    unknown fields and values, but not its nested items, accounted to their
+    own class. Objects shared among items are only counted once."""
+    sizes = {} if sizes is None else sizes
+    _walk_item(item, sizes, set())
+    return sizes
+
+
+def _walk_item(item: Item, sizes: Dict[str, ClassSize], seen: Set[int]) -> None:
+    if id(item) in seen:
+        return
+    seen.add(id(item))
+    nested: List[Item] = []
+    size = sys.getsizeof(item) + _size(item._unknown_fields, seen, nested)
+    for field in _fields(type(item)):
+        size += _size(getattr(item, field.name, None), seen, nested)
+    class_size = sizes.setdefault(type(item).__name__, ClassSize())
+    class_size.count += 1
+    class_size.bytes += size
+    for nested_item in nested:
+        _walk_item(nested_item, sizes, seen)
+
+
+def _size(value: Any, seen: Set[int], nested: List[Item]) -> int:
+    if isinstance(value, Item):
+        nested.append(value)
+        return 0
+    if value is None or isinstance(value, bool) or id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(_size(element, seen, nested) for element in value)
+    elif isinstance(value, dict):
+        size += sum(_size(k, seen, nested) + _size(v, seen, nested) for k, v in value.items())
+    return size
+
+
+def run(repeat: int = 100) -> Tuple[Dict[str, Measure], Dict[str, ClassSize]]:
+    """Return the measures for every page type and the deep sizes of every
+    item class in the samples."""
+    measures, sizes = {}, {}  # type: ignore[var-annotated]
+    for page_type, result in load_results().items():
+        cls = item_class(page_type)
+        measures[page_type] = measure_decode(cls.from_dict, result[page_type], repeat)
+        deep_sizes(cls.from_dict(result[page_type]), sizes)
+    return measures, sizes
+
+
+def check_budgets(measures: Dict[str, Measure], budgets: Dict[str, Dict[str, float]]) -> List[str]:
+    """Return the description of the measures exceeding their budgets"""
+    failures = []
+    for page_type, measure in measures.items():
+        for name in BUDGETED:
+            budget = budgets.get(page_type, {}).get(name)
+            value = getattr(measure, name)
+            if budget is not None and value > budget:
+                failures.append(f"{page_type}: {value:.0f} {name} per item exceeds the budget of {budget:.0f}")
+    return failures
+
+
+def make_budgets(measures: Dict[str, Measure], headroom: float) -> Dict[str, Dict[str, float]]:
+    return {
+        page_type: {name: math.ceil(round(getattr(measure, name) * (1 + headroom), 6)) for name in BUDGETED}
+        for page_type, measure in measures.items()
+    }
+
+
+def python_version() -> str:
+    """Return the key of the budgets of the running Python version"""
+    return f"{sys.version_info[0]}.{sys.version_info[1]}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Memory footprint of the items")
+    parser.add_argument("--repeat", type=int, default=100, help="decodes per page type")
+    parser.add_argument("--budgets", default=BUDGETS_PATH, help="JSON file with the budgets")
+    parser.add_argument("--update", action="store_true", help="record the current measures as budgets")
+    parser.add_argument("--headroom", type=float, default=0.1, help="margin added to the recorded budgets")
+    args = parser.parse_args(argv)
+
+    measures, sizes = run(args.repeat)
+    print(f"{'page type':<14}{'bytes':>10}{'blocks':>10}{'peak':>10}")
+    for page_type, measure in measures.items():
+        peak = "-" if measure.peak is None else f"{measure.peak:.0f}"
+        print(f"{page_type:<14}{measure.bytes:>10.0f}{measure.blocks:>10.0f}{peak:>10}")
+    print()
+    print(f"{'item class':<22}{'count':>8}{'bytes':>10}{'bytes/item':>12}")
+    for name, size in sorted(sizes.items()):
+        print(f"{name:<22}{size.count:>8}{size.bytes:>10}{size.bytes / size.count:>12.0f}")
+    print()
+
+    all_budgets = load_json(args.budgets)
+    version = python_version()
+    if args.update:
+        all_budgets[version] = make_budgets(measures, args.headroom)
+        save_json(args.budgets, all_budgets)
+        print(f"Budgets for Python {version} saved to {args.budgets}")
+        return 0
+    if version not in all_budgets:
+        print(f"No budgets recorded for Python {version}: run with --update to record them")
+        return 1
+    failures = check_budgets(measures, all_budgets[version])
+    for failure in failures:
+        print(failure)
+    if not failures:
+        print("All the budgets are met")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Pickling of items, as done to send them to other processes.
+
+Compares, for batches of items of every page type of a synthetic corpus
+(see :mod:`benchmarks.corpus`), the size and the time to pickle and unpickle
+them with the compact protocol of ``Item.__reduce__`` and with the default
+one for attrs slotted classes (which doesn't keep the unknown fields).
+
+Usage::
+
+    python -m benchmarks.pickling [--count 200] [--protocol 5]
+"""
+
+import argparse
+import copyreg
+import functools
+import io
+import pickle
+import sys
+import timeit
+from typing import Any, Dict, List, Optional, Tuple
+
+from autoextract_poet import registry
+from autoextract_poet.items import Item
+from benchmarks import FIXTURES
+from benchmarks.corpus import CorpusGenerator, CorpusOptions
+
+
+def default_reduce(obj: Item) -> Any:
+    """Reduce items as the default protocol for attrs slotted classes does"""
+    return copyreg.__newobj__, (type(obj),), obj.__getstate__()  # type: ignore[attr-defined]
+
+
+class DefaultDispatchTable(dict):
+    """Dispatch table reducing every item class with :func:`default_reduce`.
+    Used instead of ``Pickler.reducer_override``, which requires Python 3.8"""
+
+    def __missing__(self, cls: Any) -> Any:
+        if isinstance(cls, type) and issubclass(cls, Item):
+            return default_reduce
+        raise KeyError(cls)
+
+
+def default_dumps(obj: Any, protocol: int) -> bytes:
+    stream = io.BytesIO()
+    pickler = pickle.Pickler(stream, protocol)
+    pickler.dispatch_table = DefaultDispatchTable(copyreg.dispatch_table)  # type: ignore[attr-defined]
+    pickler.dump(obj)
+    return stream.getvalue()
+
+
+def compact_dumps(obj: Any, protocol: int) -> bytes:
+    return pickle.dumps(obj, protocol)
+
+
+def measure(items: List[Item], protocol: int, repeat: int = 5) -> Dict[str, Tuple[int, float, float]]:
+    """Return the size, and the best time to pickle and unpickle ``items``,
+    by pickling method."""
+    results = {}
+    for name, dumps in (("default", default_dumps), ("compact", compact_dumps)):
+        data = dumps(items, protocol)
+        dump_time = min(timeit.repeat(functools.partial(dumps, items, protocol), number=1, repeat=repeat))
+        load_time = min(timeit.repeat(functools.partial(pickle.loads, data), number=1, repeat=repeat))
+        results[name] = (len(data), dump_time, load_time)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pickling of items")
+    parser.add_argument("--count", type=int, default=200, help="items per page type")
+    parser.add_argument("--protocol", type=int, default=pickle.HIGHEST_PROTOCOL)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'page type':<14}{'method':<10}{'bytes':>12}{'dumps ms':>10}{'loads ms':>10}")
+    for page_type in FIXTURES:
+        generator = CorpusGenerator(args.seed, CorpusOptions(page_types=[page_type]))
+        cls = registry.lookup(page_type).item_class
+        items = [cls.from_dict(result[page_type]) for result in generator.results(args.count)]
+        for name, (size, dump_time, load_time) in measure(items, args.protocol).items():
+            print(f"{page_type:<14}{name:<10}{size:>12,}{dump_time * 1000:>10.2f}{load_time * 1000:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Throughput of the most frequent operations.
+
+Benchmarks, for every page type:
+
+* ``from_dict``: ``Item.from_dict`` on the item of the sample result;
+* ``to_item``: ``AutoExtractData.to_item`` on a new page input;
+* ``page``: ``AutoExtract*Page.to_item`` on a new page object;
+* ``scaled``: ``Item.from_dict`` on the sample result with its lists of
+  items (offers, products, reviews, comments...) made ``--scale`` times larger;
+* ``validate``: ``validation.validate`` on the item of the sample result;
+* ``binary``: ``binary.decode`` on the item of the sample result encoded.
+
+And for ``AutoExtractAdapter``: iteration (of names and of items), getting and setting
+known and unknown fields of a product.
+
+The throughput (operations per second) is the best of several runs. Results
+can be saved as a JSON baseline and compared with later runs, failing if any
+benchmark is slower than the baseline by more than a tolerance. Baselines
+depend on the machine, so they are not kept in the repository.
+
+Usage::
+
+    python -m benchmarks.throughput --save baseline.json
+    python -m benchmarks.throughput --compare baseline.json [--tolerance 0.1]
+"""
+
+import argparse
+import sys
+import timeit
+from typing import Any, Callable, Dict, List, Optional
+
+from autoextract_poet import binary, registry
+from autoextract_poet.adapters import AutoExtractAdapter
+from autoextract_poet.items import Product, get_nested_fields
+from autoextract_poet.validation import validate
+from benchmarks import load_json, load_results, save_json
+
+Benchmark = Callable[[], Any]
+
+
+def scale_data(cls: type, data: Any, scale: int) -> Any:
+    """Return a copy of ``data``, the dict of an item of class ``cls``, with
+    its lists of items (recursively) ``scale`` times larger."""
+    if not isinstance(data, dict):
+        return data
+    scaled = dict(data)
+    for name, (nested_cls, is_list) in get_nested_fields(cls).items():
+        value = data.get(name)
+        if is_list and isinstance(value, list):
+            scaled[name] = [scale_data(nested_cls, element, scale) for element in value] * scale
+        elif value is not None:
+            scaled[name] = scale_data(nested_cls, value, scale)
+    return scaled
+
+
+def get_benchmarks(scale: int = 10) -> Dict[str, Benchmark]:
+    """Return the benchmarks by name"""
+    benchmarks: Dict[str, Benchmark] = {}
+    results = load_results()
+    for page_type, result in results.items():
+        info = registry.lookup(page_type)
+        data = result[page_type]
+        scaled = scale_data(info.item_class, data, scale)
+        benchmarks[f"from_dict/{page_type}"] = _bind(info.item_class.from_dict, data)
+        benchmarks[f"to_item/{page_type}"] = _page_input_to_item(info.page_input_class, result)
+        if info.page_class is not None:
+            benchmarks[f"page/{page_type}"] = _page_to_item(info.page_class, info.page_input_class, result)
+        benchmarks[f"scaled/{page_type}"] = _bind(info.item_class.from_dict, scaled)
+        benchmarks[f"validate/{page_type}"] = _bind(validate, info.item_class.from_dict(data))
+        benchmarks[f"binary/{page_type}"] = _binary_decode(info.item_class, data)
+
+    product = Product.from_dict({**results["product"]["product"], "extra1": 1, "extra2": [2], "extra3": "3"})
+    adapter = AutoExtractAdapter(product)
+    benchmarks["adapter/iter"] = lambda: list(AutoExtractAdapter(product))
+    benchmarks["adapter/items"] = lambda: [(name, adapter[name]) for name in AutoExtractAdapter(product)]
+    benchmarks["adapter/get_known"] = _bind(adapter.__getitem__, "name")
+    benchmarks["adapter/get_unknown"] = _bind(adapter.__getitem__, "extra3")
+    benchmarks["adapter/set_known"] = lambda: adapter.__setitem__("name", "Chair")
+    benchmarks["adapter/set_unknown"] = lambda: adapter.__setitem__("extra3", "value")
+    return benchmarks
+
+
+def _bind(function: Callable, argument: Any) -> Benchmark:
+    return lambda: function(argument)
+
+
+def _binary_decode(cls: type, data: dict) -> Benchmark:
+    encoded = binary.encode(cls.from_dict(data))  # type: ignore[attr-defined]
+    return lambda: binary.decode(encoded, cls)
+
+
+# Page inputs cache their items, so new ones are created every time
+def _page_input_to_item(page_input_cls: type, result: dict) -> Benchmark:
+    return lambda: page_input_cls(result).to_item()
+
+
+def _page_to_item(page_cls: type, page_input_cls: type, result: dict) -> Benchmark:
+    return lambda: page_cls(page_input_cls(result)).to_item()
+
+
+def measure(benchmark: Benchmark, repeat: int = 5, min_time: float = 0.2) -> float:
+    """Return the operations per second of ``benchmark``, the best of
+    ``repeat`` runs of at least ``min_time`` seconds each."""
+    timer = timeit.Timer(benchmark)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / elapsed) if elapsed else number * 10)
+    best = min([elapsed] + timer.repeat(repeat - 1, number))
+    return number / best
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    """Return the description of the benchmarks slower than the baseline
+    by more than ``tolerance`` (e.g. 0.1 for 10%)."""
+    failures = []
+    for name, ops in results.items():
+        base = baseline.get(name)
+        if base and ops < base * (1 - tolerance):
+            failures.append(
+                f"{name}: {ops:.0f} ops/s is {1 - ops / base:.1%} slower than the baseline {base:.0f} ops/s"
+            )
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Throughput of the most frequent operations")
+    parser.add_argument("-k", "--filter", default="", help="run only the benchmarks containing this text")
+    parser.add_argument("--scale", type=int, default=10, help="size factor for the scaled benchmarks")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per run")
+    parser.add_argument("--save", help="save the results as a JSON baseline")
+    parser.add_argument("--compare", help="compare the results with a JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="slowdown allowed when comparing")
+    args = parser.parse_args(argv)
+
+    baseline: Dict[str, float] = {}
+    if args.compare:
+        saved = load_json(args.compare)
+        if "results" not in saved:
+            parser.error(f"{args.compare} is not a baseline saved with --save")
+        baseline = saved["results"]
+    results = {}
+    for name, benchmark in get_benchmarks(args.scale).items():
+        if args.filter not in name:
+            continue
+        ops = results[name] = measure(benchmark, args.repeat, args.min_time)
+        line = f"{name:<28}{ops:>14,.0f} ops/s"
+        if baseline.get(name):
+            line += f"{ops / baseline[name] - 1:>+10.1%}"
+        print(line)
+
+    if args.save:
+        save_json(args.save, {"scale": args.scale, "python": sys.version.split()[0], "results": results})
+        print(f"Results saved to {args.save}")
+    failures = compare(results, baseline, args.tolerance)
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,6 +11,7 @@ setup(
     url="https://github.com/scrapinghub/autoextract-poet",
     packages=find_packages(
         exclude=[
+            "benchmarks",
             "tests",
         ]
     ),
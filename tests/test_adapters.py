@@ -127,3 +127,26 @@ def test_asdict(item_adapter, item):
         ("attr3", "additional1"),
         ("attr4", "additional2"),
     ]
+
+
+def test_iter_unknown_shadowing_known(adapted_item):
+    adapted_item.item._unknown_fields_dict["attr1"] = "shadowed"
+    assert list(adapted_item) == [f"attr{idx}" for idx in range(1, 5)]
+    # Once the known field is deleted the unknown one is visible
+    del adapted_item.item.attr1
+    assert list(adapted_item) == ["attr2", "attr3", "attr4", "attr1"]
+
+
+def test_iter_many_unknown_fields():
+    item = ItemTest.from_dict({"attr2": "a", **{f"unknown{idx}": idx for idx in range(1000)}})
+    adapted_item = AutoExtractAdapter(item)
+    expected = ["attr1", "attr2"] + [f"unknown{idx}" for idx in range(1000)]
+    assert list(adapted_item) == expected
+    assert list(adapted_item.field_names()) == expected
+    assert adapted_item["unknown999"] == 999
+
+
+def test_fields_computed_once_per_class(adapted_item, empty_item):
+    assert AutoExtractAdapter(ItemTest())._fields_dict is adapted_item._fields_dict
+    assert list(adapted_item._fields_dict) == ["attr1", "attr2"]
+    assert empty_item._fields_dict == {}
@@ -0,0 +1,130 @@
+import json
+import os
+
+import pytest
+
+from autoextract_poet import json_backends
+from autoextract_poet.archive import Location, ResponseArchive
+from autoextract_poet.page_inputs import AutoExtractArticleData, AutoExtractProductData
+from tests import load_fixture
+
+product_result = load_fixture("sample_product.json")[0]
+article_result = load_fixture("sample_article.json")[0]
+
+
+def product(url, name="Chair"):
+    return {
+        "query": {"userQuery": {"url": url, "pageType": "product"}},
+        "product": {**product_result["product"], "name": name},
+    }
+
+
+def article(url):
+    return {**article_result, "query": {"userQuery": {"url": url, "pageType": "article"}}}
+
+
+@pytest.fixture
+def dumps(tmp_path):
+    first = tmp_path / "dump-1.jsonl"
+    lines = [
+        json.dumps([product("https://a.com", "A"), article("https://b.com")]),
+        "",
+        json.dumps(product("https://c.com", "C")),
+        "{invalid",
+        json.dumps([{"query": {"userQuery": {"url": "https://d.com", "pageType": "product"}}, "error": "Timeout"}]),
+    ]
+    first.write_text("\n".join(lines) + "\n")
+    second = tmp_path / "dump-2.jsonl"
+    # No line break at the end
+    second.write_text(json.dumps(product("https://a.com", "A2")))
+    empty = tmp_path / "empty.jsonl"
+    empty.write_text("")
+    return [str(first), str(second), str(empty)]
+
+
+def test_get(dumps):
+    with ResponseArchive(dumps) as archive:
+        assert len(archive) == 4
+        page_input = archive.get("https://c.com")
+        assert isinstance(page_input, AutoExtractProductData)
+        assert page_input.to_item().name == "C"
+        page_input = archive.get("https://b.com", "article")
+        assert page_input == AutoExtractArticleData(article("https://b.com"))
+        assert archive.get("https://b.com", "product") is None
+        # Errors are not indexed
+        assert archive.get("https://d.com") is None
+        assert "https://d.com" not in archive
+        assert "https://b.com" in archive
+
+
+def test_last_archived(dumps):
+    with ResponseArchive(dumps) as archive:
+        assert archive.get("https://a.com").to_item().name == "A2"
+        assert archive.locate("https://a.com") == Location(
+            os.path.abspath(dumps[1]), 0, os.path.getsize(dumps[1]), None, "product"
+        )
+    with ResponseArchive(dumps[:1]) as archive:
+        assert archive.get("https://a.com").to_item().name == "A"
+        assert archive.locate("https://a.com").position == 0
+
+
+def test_get_many(dumps):
+    with ResponseArchive(dumps) as archive:
+        page_inputs = archive.get_many(["https://c.com", "https://x.com", "https://b.com"])
+        assert [type(page_input) for page_input in page_inputs] == [
+            AutoExtractProductData,
+            type(None),
+            AutoExtractArticleData,
+        ]
+
+
+def test_persistent_index(dumps, tmp_path):
+    index_path = str(tmp_path / "index.sqlite")
+    with ResponseArchive(dumps, index_path) as archive:
+        assert archive.update_index() == 0
+    with ResponseArchive(dumps, index_path) as archive:
+        assert archive.update_index() == 0
+        assert len(archive) == 4
+        with open(dumps[1], "a") as f:
+            f.write("\n" + json.dumps(product("https://e.com", "E")) + "\n")
+        assert archive.update_index() == 1
+        assert len(archive) == 5
+        assert archive.get("https://e.com").to_item().name == "E"
+        assert archive.get("https://a.com").to_item().name == "A2"
+    # Only the files of the archive are looked up
+    with ResponseArchive(dumps[:1], index_path) as archive:
+        assert len(archive) == 3
+        assert archive.get("https://e.com") is None
+
+
+def test_many_files(tmp_path):
+    # More files than parameters allowed in a query by old SQLite builds
+    paths = []
+    for i in range(1000):
+        path = tmp_path / f"dump-{i}.jsonl"
+        path.write_text(json.dumps(product(f"https://example.com/{i % 500}", str(i))) + "\n")
+        paths.append(str(path))
+    with ResponseArchive(paths) as archive:
+        assert len(archive) == 1000
+        urls = [f"https://example.com/{i}" for i in range(600)]
+        page_inputs = archive.get_many(urls)
+        assert [page_input.to_item().name for page_input in page_inputs[:500]] == [str(i + 500) for i in range(500)]
+        assert page_inputs[500:] == [None] * 100
+        assert archive.get("https://example.com/1").to_item().name == "501"
+
+
+def test_get_many_parses_lines_once(dumps, monkeypatch):
+    calls = []
+    loads = json_backends.loads
+    monkeypatch.setattr(json_backends, "loads", lambda data: calls.append(data) or loads(data))
+    with ResponseArchive(dumps[:1]) as archive:
+        calls.clear()
+        page_inputs = archive.get_many(["https://a.com", "https://b.com", "https://a.com", "https://c.com"])
+        assert [type(page_input) for page_input in page_inputs] == [
+            AutoExtractProductData,
+            AutoExtractArticleData,
+            AutoExtractProductData,
+            AutoExtractProductData,
+        ]
+        # The line with a.com and b.com, and the one with c.com
+        assert len(calls) == 2
@@ -0,0 +1,54 @@
+import asyncio
+
+import attr
+import pytest
+
+from autoextract_poet import registry
+from autoextract_poet.async_pages import (
+    AsyncAutoExtractArticleListPage,
+    AsyncAutoExtractArticlePage,
+    AsyncAutoExtractCommentsPage,
+    AsyncAutoExtractForumPostsPage,
+    AsyncAutoExtractJobPostingPage,
+    AsyncAutoExtractPage,
+    AsyncAutoExtractProductListPage,
+    AsyncAutoExtractProductPage,
+    AsyncAutoExtractRealEstatePage,
+    AsyncAutoExtractReviewsPage,
+    AsyncAutoExtractVehiclePage,
+)
+from tests import load_fixture
+
+ASYNC_PAGES = [
+    (AsyncAutoExtractArticlePage, "sample_article.json"),
+    (AsyncAutoExtractArticleListPage, "sample_article_list.json"),
+    (AsyncAutoExtractProductPage, "sample_product.json"),
+    (AsyncAutoExtractProductListPage, "sample_product_list.json"),
+    (AsyncAutoExtractCommentsPage, "sample_comments.json"),
+    (AsyncAutoExtractForumPostsPage, "sample_forum_posts.json"),
+    (AsyncAutoExtractJobPostingPage, "sample_job_posting.json"),
+    (AsyncAutoExtractRealEstatePage, "sample_real_estate.json"),
+    (AsyncAutoExtractReviewsPage, "sample_reviews.json"),
+    (AsyncAutoExtractVehiclePage, "sample_vehicle.json"),
+]
+
+
+@pytest.mark.parametrize("threshold", [0, 10**6])
+@pytest.mark.parametrize("page_cls, fixture", ASYNC_PAGES)
+def test_async_pages(page_cls, fixture, threshold):
+    [field] = attr.fields(page_cls)
+    page_input = field.type(load_fixture(fixture)[0])
+
+    class Page(page_cls):
+        offload_threshold = threshold
+
+    item = asyncio.run(Page(page_input).to_item())
+    assert item is page_input.to_item()
+    assert attr.asdict(item) == page_input.data[page_input.page_type]
+    # The synchronous pages remain registered
+    assert registry.lookup(page_input.page_type).page_class is not page_cls
+
+
+def test_async_page_defaults():
+    assert AsyncAutoExtractPage.executor is None
+    assert AsyncAutoExtractPage.offload_threshold > 0
@@ -0,0 +1,170 @@
+import io
+import json
+import pickle
+
+import pytest
+
+from autoextract_poet.dispatch import dispatch
+from autoextract_poet.items import Offer, Product, ProductList
+from autoextract_poet.page_inputs import AutoExtractData, get_page_type
+from autoextract_poet.streaming import iter_results
+from benchmarks import FIXTURES, load_results
+from benchmarks.corpus import CorpusGenerator, CorpusOptions
+from benchmarks.memory import BUDGETS_PATH, Measure, check_budgets, deep_sizes
+from benchmarks.memory import main as memory_main
+from benchmarks.memory import make_budgets, measure_decode, python_version
+from benchmarks.pickling import default_dumps
+from benchmarks.pickling import measure as measure_pickling
+from benchmarks.throughput import compare, get_benchmarks
+from benchmarks.throughput import main as throughput_main
+from benchmarks.throughput import measure, scale_data
+
+
+def test_load_results():
+    results = load_results()
+    assert list(results) == list(FIXTURES)
+    for page_type, result in results.items():
+        assert page_type in result
+
+
+def test_measure_decode():
+    measure = measure_decode(Offer.from_dict, {"price": "1", "extra": "value"}, repeat=10)
+    # The item and its unknown fields dict
+    assert measure.blocks >= 2
+    assert measure.bytes > 0
+
+
+def test_deep_sizes():
+    breadcrumb = {"name": "Home", "link": "/"}
+    product = Product.from_dict({"name": "Chair", "offers": [{"price": "1"}] * 2, "breadcrumbs": [breadcrumb]})
+    sizes = deep_sizes(product)
+    assert {name: size.count for name, size in sizes.items()} == {"Product": 1, "Offer": 2, "Breadcrumb": 1}
+    assert all(size.bytes > 0 for size in sizes.values())
+
+
+def test_budgets():
+    measures = {"product": Measure(bytes=100, blocks=10), "article": Measure(bytes=50.5, blocks=4.1)}
+    budgets = make_budgets(measures, headroom=0.1)
+    assert budgets == {"product": {"bytes": 110, "blocks": 11}, "article": {"bytes": 56, "blocks": 5}}
+    assert check_budgets(measures, budgets) == []
+    assert check_budgets(measures, {}) == []
+    measures["product"].bytes = 111
+    assert check_budgets(measures, budgets) == ["product: 111 bytes per item exceeds the budget of 110"]
+
+
+def test_budgets_by_python_version(tmp_path, capsys):
+    with open(BUDGETS_PATH) as f:
+        recorded = json.load(f)
+    assert all(version.count(".") == 1 for version in recorded)
+    assert all(set(budgets) == set(FIXTURES) for budgets in recorded.values())
+
+    path = tmp_path / "budgets.json"
+    path.write_text(json.dumps({"2.7": {"product": {"bytes": 1, "blocks": 1}}}))
+    # No budgets for this version
+    assert memory_main(["--repeat", "2", "--budgets", str(path)]) == 1
+    assert "No budgets recorded" in capsys.readouterr().out
+    assert memory_main(["--repeat", "2", "--budgets", str(path), "--update"]) == 0
+    budgets = json.loads(path.read_text())
+    assert set(budgets) == {"2.7", python_version()}
+    assert set(budgets[python_version()]) == set(FIXTURES)
+    assert memory_main(["--repeat", "2", "--budgets", str(path)]) == 0
+
+
+def test_scale_data():
+    data = {"name": "List", "products": [{"name": "A", "offers": [{"price": "1"}]}], "paginationNext": {"url": "/2"}}
+    scaled = scale_data(ProductList, data, 3)
+    assert [product["name"] for product in scaled["products"]] == ["A"] * 3
+    assert all(len(product["offers"]) == 3 for product in scaled["products"])
+    assert scaled["paginationNext"] == data["paginationNext"]
+    assert len(data["products"]) == 1 and len(data["products"][0]["offers"]) == 1
+
+
+def test_throughput_benchmarks():
+    benchmarks = get_benchmarks(scale=2)
+    for kind in ("from_dict", "to_item", "page", "scaled", "validate", "binary"):
+        assert [name.split("/")[1] for name in benchmarks if name.startswith(f"{kind}/")] == list(FIXTURES)
+    for benchmark in benchmarks.values():
+        benchmark()
+    assert measure(benchmarks["from_dict/product"], repeat=2, min_time=0.001) > 0
+
+
+def test_compare():
+    baseline = {"a": 100.0, "b": 100.0, "c": 100.0}
+    assert compare({"a": 95.0, "b": 150.0, "d": 1.0}, baseline, tolerance=0.1) == []
+    assert compare({"a": 80.0, "b": 95.0}, baseline, tolerance=0.1) == [
+        "a: 80 ops/s is 20.0% slower than the baseline 100 ops/s"
+    ]
+
+
+def test_compare_missing_baseline(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        throughput_main(["-k", "none", "--compare", str(tmp_path / "missing.json")])
+    assert "missing.json is not a baseline" in capsys.readouterr().err
+
+
+def test_corpus_reproducible():
+    generator = CorpusGenerator(seed=1)
+    results = list(generator.results(20))
+    assert results == list(CorpusGenerator(seed=1).results(20))
+    assert results[5:] == list(generator.results(15, start=5))
+    assert results != list(CorpusGenerator(seed=2).results(20))
+    assert {get_page_type(result) for result in results} <= set(FIXTURES)
+
+
+def test_corpus_decodes():
+    generator = CorpusGenerator(seed=1, options=CorpusOptions(error_rate=0.2))
+    batch = dispatch(list(generator.results(200)))
+    assert batch.page_inputs and batch.errors
+    assert len(batch.page_inputs) + len(batch.errors) == 200
+    assert {error.message for error in batch.errors} <= {"Downloader error: http404", "Query timed out"}
+    assert all(item is not None for item in AutoExtractData.to_items(batch.page_inputs))
+
+
+def test_corpus_options():
+    options = CorpusOptions(
+        page_types=["product"],
+        list_lengths={"offers": (4, 4), "images": (0, 0)},
+        null_rate=0,
+        unknown_rate=1,
+        text_scale=3,
+    )
+    sample = load_results()["product"]["product"]
+    for result in CorpusGenerator(seed=3, options=options).results(10):
+        product = Product.from_dict(result["product"])
+        assert len(product.offers) == 4
+        assert product.images == []
+        assert product._unknown_fields
+        assert all(offer._unknown_fields for offer in product.offers)
+        assert product.offers[0].currency == sample["offers"][0]["currency"]
+        assert len(product.description) >= 3 * len(sample["description"])
+        assert all(getattr(product, name) is not None for name, value in sample.items() if value is not None)
+
+    options = CorpusOptions(page_types=["productList"], null_rate=1)
+    product_list = CorpusGenerator(options=options).result(0)["productList"]
+    assert product_list["url"] and product_list["products"] == []
+    assert all(value in (None, []) for name, value in product_list.items() if name != "url")
+
+
+@pytest.mark.parametrize("jsonl", [False, True])
+def test_corpus_write(jsonl):
+    generator = CorpusGenerator(seed=1)
+    stream = io.StringIO()
+    generator.write(stream, 5, jsonl=jsonl)
+    text = stream.getvalue()
+    if jsonl:
+        results = [json.loads(line) for line in text.splitlines()]
+    else:
+        results = list(iter_results(io.StringIO(text)))
+    assert results == list(generator.results(5))
+    stream = io.StringIO()
+    generator.write(stream, 0, jsonl=jsonl)
+    assert stream.getvalue() == ("\n" if jsonl else "[]\n")
+
+
+def test_pickling():
+    items = [Product.from_dict({"name": "Chair", "offers": [{"price": "1"}]}), Offer(price="2")]
+    results = measure_pickling(items, protocol=4, repeat=1)
+    assert set(results) == {"default", "compact"}
+    assert all(size > 0 and dumps >= 0 and loads >= 0 for size, dumps, loads in results.values())
+    assert pickle.loads(default_dumps(items, 4)) == items
+    assert default_dumps(items, 4) != pickle.dumps(items, 4)
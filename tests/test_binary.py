@@ -0,0 +1,127 @@
+from typing import List, Optional
+
+import attr
+import pytest
+
+from autoextract_poet.binary import (
+    HEADER,
+    decode,
+    decode_many,
+    encode,
+    encode_many,
+    get_fingerprint,
+)
+from autoextract_poet.flyweight import freeze
+from autoextract_poet.items import Item, Offer, Product, ProductList, Rating
+from benchmarks import item_class, load_results
+from tests.test_decoders import Node, Validated
+from tests.test_items import bracket
+
+
+@pytest.mark.parametrize("page_type, result", load_results().items())
+def test_roundtrip(page_type, result):
+    cls = item_class(page_type)
+    item = cls.from_dict({**result[page_type], "extra": {"a": [1, 2.5, None]}})
+    data = encode(item)
+    assert data.startswith(HEADER)
+    decoded = decode(data, cls)
+    assert type(decoded) is cls
+    assert decoded == item
+    assert decoded.to_dict() == item.to_dict()
+    # Smaller than JSON, given that keys are not repeated
+    assert len(data) < len(repr(item.to_dict()))
+
+
+def test_unknown_fields():
+    offer = Offer.from_dict({"price": "1"})
+    decoded = decode(encode(offer), Offer)
+    assert decoded._unknown_fields is None
+    product = Product.from_dict({"offers": [{"price": "1", "extra": 1}], "other": "a"})
+    decoded = decode(encode(product), Product)
+    assert decoded._unknown_fields == {"other": "a"}
+    assert decoded.offers[0]._unknown_fields == {"extra": 1}
+
+
+def test_many():
+    items = [Product(name="a", offers=[Offer(price="1")]), None, Product(name="b")]
+    data = encode_many(items, Product)
+    assert decode_many(data, Product) == items
+    assert decode_many(encode_many([], Product), Product) == []
+
+
+def test_variants():
+    product = Product.from_dict_lazy({"name": "a", "offers": [{"price": "1"}], "aggregateRating": {"ratingValue": 4}})
+    decoded = decode(encode(product), Product)
+    assert type(decoded) is Product
+    assert type(decoded.offers[0]) is Offer
+    assert decoded == product
+    frozen = freeze(Offer.from_dict({"price": "1", "extra": 1}))
+    decoded_offer = decode(encode(frozen), Offer)
+    assert type(decoded_offer) is Offer
+    assert decoded_offer._unknown_fields == {"extra": 1}
+    assert decode_many(encode_many([frozen], Offer), Offer) == [frozen]
+
+
+def test_recursive():
+    tree = Node.from_dict({"name": "root", "children": [{"name": "child", "children": [{"name": "leaf"}]}]})
+    assert decode(encode(tree), Node) == tree
+
+
+def test_init_classes():
+    item = Validated.from_dict({"value": "3", "rating": {"ratingValue": 1}, "extra": 1})
+    decoded = decode(encode(item), Validated)
+    assert decoded == item
+    assert decoded._unknown_fields == {"extra": 1}
+
+
+def test_init_classes_not_called():
+    @attr.s(auto_attribs=True, slots=True)
+    class Converted(Item):
+        value: str = attr.ib(default="", converter=bracket)
+        price: Optional[str] = attr.ib(default=None, kw_only=True)
+        count: int = attr.ib(default=0, init=False)
+
+    item = Converted("a", price="1")
+    item.count = 3
+    decoded = decode(encode(item), Converted)
+    assert decoded == item
+    assert decoded.value == "<a>"
+    assert decode_many(encode_many([item, None], Converted), Converted) == [item, None]
+
+
+def test_schema_changes():
+    @attr.s(auto_attribs=True, slots=True)
+    class Rated(Item):
+        rating: Optional[Rating] = None
+
+    @attr.s(auto_attribs=True, slots=True)
+    class OtherRated(Item):
+        rating: Optional[Rating] = None
+        ratings: List[Rating] = attr.Factory(list)
+
+    data = encode(Rated(Rating(4)))
+    assert get_fingerprint(Rated) in data
+    with pytest.raises(ValueError, match="changed"):
+        decode(data, OtherRated)
+    with pytest.raises(ValueError, match="changed"):
+        decode(data, Offer)
+    with pytest.raises(ValueError, match="Not encoded"):
+        decode(b"{}", Rated)
+
+
+def test_invalid_items():
+    with pytest.raises(ValueError, match="Expected an instance of Offer"):
+        encode(Product(offers=[Rating()]))  # type: ignore[list-item]
+    with pytest.raises(ValueError, match="Expected an instance of Product"):
+        encode_many([Offer()], Product)
+    offer = Offer()
+    del offer.price
+    with pytest.raises(ValueError, match="deleted"):
+        encode(offer)
+    with pytest.raises(ValueError):
+        encode(Offer(price=object()))  # type: ignore[arg-type]
+
+
+def test_product_list_nested_lists():
+    product_list = ProductList.from_dict({"products": [{"name": "a", "offers": [{"price": "1"}]}]})
+    assert decode(encode(product_list), ProductList) == product_list
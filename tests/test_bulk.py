@@ -0,0 +1,115 @@
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from autoextract_poet.bulk import (
+    decode_chunk,
+    iter_chunks,
+    iter_items,
+    iter_tasks,
+    write_items,
+)
+from autoextract_poet.items import Article, Product
+from tests import load_fixture
+
+product_result = load_fixture("sample_product.json")[0]
+article_result = load_fixture("sample_article.json")[0]
+
+
+def product(name):
+    return {**product_result, "product": {**product_result["product"], "name": name}}
+
+
+@pytest.fixture
+def dumps(tmp_path):
+    jsonl = tmp_path / "dump.jsonl"
+    lines = [
+        json.dumps([product("1"), article_result]),
+        "",
+        json.dumps(product("2")),
+        "{invalid",
+        json.dumps([{"query": {"userQuery": {"pageType": "product"}}, "error": "Timeout"}, product("3")]),
+    ]
+    jsonl.write_text("\n".join(lines) + "\n")
+    array = tmp_path / "response.json"
+    array.write_text(json.dumps([product("4"), product("5")]))
+    return [str(jsonl), str(array)]
+
+
+def test_iter_tasks(dumps):
+    tasks = list(iter_tasks(dumps, chunk_size=2))
+    assert [(path, line) for path, line, _ in tasks] == [(dumps[0], 1), (dumps[0], 3), (dumps[0], 5), (dumps[1], None)]
+    assert [len(texts) for _, _, texts in tasks[:3]] == [2, 2, 1]
+    assert tasks[3][2] is None
+
+
+def test_decode_chunk(dumps):
+    chunk = decode_chunk(*next(iter_tasks(dumps[:1])))
+    assert chunk.path == dumps[0]
+    assert chunk.line == 1
+    assert [type(item) for item in chunk.items] == [Product, Article, Product, Product]
+    assert [item.name for item in chunk.items if isinstance(item, Product)] == ["1", "2", "3"]
+    assert [(error.index, error.page_type) for error in chunk.errors] == [(3, None), (4, "product")]
+    assert chunk.errors[0].message.startswith("Invalid JSON at line 4")
+    assert chunk.errors[1].message == "Timeout"
+
+
+def test_decode_errors(tmp_path):
+    bad = {**product_result, "product": {**product_result["product"], "gtin": [{"value": "123"}]}}
+    path = tmp_path / "dump.jsonl"
+    timeout = {"query": {"userQuery": {"pageType": "product"}}, "error": "Timeout"}
+    lines = [[product("1"), timeout, bad], product("2")]
+    path.write_text("\n".join(json.dumps(line) for line in lines) + "\n")
+    chunk = decode_chunk(*next(iter_tasks([str(path)])))
+    assert [item.name for item in chunk.items] == ["1", "2"]
+    assert [error.index for error in chunk.errors] == [1, 2]
+    error = chunk.errors[1]
+    assert (error.page_type, error.result) == ("product", bad)
+    assert error.message.startswith("Can't decode the 'product' data: TypeError")
+    assert [item.name for item in iter_items([str(path)], processes=0)] == ["1", "2"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 1000])
+def test_iter_items(dumps, chunk_size):
+    items = list(iter_items(dumps, processes=0, chunk_size=chunk_size))
+    assert [item.name if isinstance(item, Product) else "article" for item in items] == [
+        "1",
+        "article",
+        "2",
+        "3",
+        "4",
+        "5",
+    ]
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_process_pool(dumps, ordered):
+    chunks = list(iter_chunks(dumps, processes=2, chunk_size=1, ordered=ordered))
+    names = [item.name for chunk in chunks for item in chunk.items if isinstance(item, Product)]
+    if ordered:
+        assert names == ["1", "2", "3", "4", "5"]
+    else:
+        assert sorted(names) == ["1", "2", "3", "4", "5"]
+    assert sum(len(chunk.errors) for chunk in chunks) == 2
+
+
+def test_executor(dumps):
+    with ThreadPoolExecutor(2) as executor:
+        items = list(iter_items(dumps, chunk_size=1, ordered=False, executor=executor))
+    assert len(items) == 6
+
+
+def test_write_items(dumps):
+    output = io.BytesIO()
+    assert write_items(dumps, output, processes=0) == 6
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert lines[0] == Product.from_dict(product("1")["product"]).to_dict()
+    assert [line.get("name") for line in lines][2:] == ["2", "3", "4", "5"]
+
+
+def test_early_stop(dumps):
+    chunks = iter_chunks(dumps * 10, processes=1, chunk_size=1)
+    assert next(chunks).line == 1
+    chunks.close()
@@ -0,0 +1,141 @@
+import time
+
+import pytest
+
+from autoextract_poet.cache import HTML_KIND, CacheStats, ResponseCache
+from autoextract_poet.page_inputs import (
+    AutoExtractArticleData,
+    AutoExtractHtml,
+    AutoExtractProductData,
+    get_result_url,
+)
+from tests import load_fixture
+
+product_result = load_fixture("sample_product.json")[0]
+article_result = load_fixture("sample_article.json")[0]
+
+
+def product(url, name="Chair"):
+    return AutoExtractProductData(
+        {
+            "query": {"userQuery": {"url": url, "pageType": "product"}},
+            "product": {**product_result["product"], "name": name},
+        }
+    )
+
+
+def test_get_put():
+    cache = ResponseCache()
+    url = get_result_url(product_result)
+    assert cache.get(url, "product") is None
+    cache.put(AutoExtractProductData(product_result))
+    page_input = cache.get(url, "product")
+    assert isinstance(page_input, AutoExtractProductData)
+    assert page_input == AutoExtractProductData(product_result)
+    assert page_input.to_item() == AutoExtractProductData(product_result).to_item()
+    # Keyed by page type too
+    assert cache.get(url, "article") is None
+    assert cache.stats == CacheStats(hits=1, misses=2)
+    assert cache.stats.hit_rate == pytest.approx(1 / 3)
+
+
+def test_explicit_url():
+    cache = ResponseCache()
+    cache.put(AutoExtractArticleData(article_result), url="https://example.com/a")
+    assert isinstance(cache.get("https://example.com/a", "article"), AutoExtractArticleData)
+    with pytest.raises(ValueError, match="URL"):
+        cache.put(AutoExtractProductData({"product": {}}))
+    with pytest.raises(ValueError, match="2 URLs for 1 page inputs"):
+        cache.put_many([product("https://example.com/b")], ["https://example.com/b", "https://example.com/c"])
+    assert cache.get("https://example.com/b", "product") is None
+
+
+def test_bulk():
+    cache = ResponseCache()
+    cache.put_many([product(f"https://example.com/{i}", str(i)) for i in range(1000)])
+    assert len(cache) == 1000
+    keys = [(f"https://example.com/{i}", "product") for i in (5, 2000, 999, 5)]
+    page_inputs = cache.get_many(keys)
+    assert [page_input and page_input.to_item().name for page_input in page_inputs] == ["5", None, "999", "5"]
+    assert cache.stats == CacheStats(hits=3, misses=1)
+    # Replaced
+    cache.put(product("https://example.com/5", "new"))
+    assert cache.get("https://example.com/5", "product").to_item().name == "new"
+    assert len(cache) == 1000
+
+
+def test_html():
+    cache = ResponseCache()
+    html = AutoExtractHtml("https://example.com", "<html>Ñ</html>")
+    assert cache.get_html(html.url) is None
+    cache.put_html(html)
+    assert cache.get_html(html.url) == html
+    assert cache.get(html.url, "product") is None
+    assert cache.delete(html.url, HTML_KIND)
+    assert not cache.delete(html.url, HTML_KIND)
+    assert cache.get_html(html.url) is None
+
+
+def test_max_age(monkeypatch):
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache = ResponseCache(max_age=60)
+    cache.put(product("https://example.com"))
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert cache.get("https://example.com", "product") is None
+    assert cache.get("https://example.com", "product", max_age=300) is not None
+    assert cache.stats == CacheStats(hits=1, misses=1, stale=1)
+    assert len(cache) == 1
+
+
+def test_eviction(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = ResponseCache()
+    cache.put(product("https://example.com/0"))
+    entry_size = cache.size()
+    cache = ResponseCache(max_size=3 * entry_size)
+    for i in range(3):
+        now[0] += 1
+        cache.put(product(f"https://example.com/{i}"))
+    now[0] += 1
+    # Accessed, so it is not the least recently used anymore
+    assert cache.get("https://example.com/0", "product") is not None
+    now[0] += 1
+    cache.put(product("https://example.com/3"))
+    assert len(cache) == 3
+    assert cache.size() <= 3 * entry_size
+    assert cache.get("https://example.com/1", "product") is None
+    assert cache.get("https://example.com/0", "product") is not None
+    assert cache.stats.evictions == 1
+    assert cache.evict(0) == 3
+    assert len(cache) == 0
+
+
+def test_eviction_limit_set_later(monkeypatch, tmp_path):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    path = str(tmp_path / "cache.sqlite")
+    with ResponseCache(path) as cache:
+        for i in range(3):
+            now[0] += 1
+            cache.put(product(f"https://example.com/{i}"))
+        now[0] += 1
+        assert cache.get("https://example.com/0", "product") is not None
+        entry_size = cache.size() // 3
+    with ResponseCache(path, max_size=2 * entry_size) as cache:
+        now[0] += 1
+        cache.put(product("https://example.com/3"))
+        assert cache.get("https://example.com/0", "product") is not None
+        assert cache.get("https://example.com/1", "product") is None
+        assert cache.get("https://example.com/2", "product") is None
+
+
+def test_persistent(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    with ResponseCache(path) as cache:
+        cache.put(product("https://example.com"))
+    with ResponseCache(path) as cache:
+        assert cache.get("https://example.com", "product").to_item().name == "Chair"
+        cache.clear()
+        assert len(cache) == 0
@@ -0,0 +1,150 @@
+import math
+import types
+
+import pytest
+
+from autoextract_poet import columnar
+from autoextract_poet.columnar import to_table
+from autoextract_poet.items import Offer, Product, ProductList, Rating, Review
+from tests import load_fixture
+from tests.test_decoders import Node
+
+example_product_result = load_fixture("sample_product.json")[0]
+example_product_list_result = load_fixture("sample_product_list.json")[0]
+example_reviews_result = load_fixture("sample_reviews.json")[0]
+
+
+@pytest.fixture(params=[False, True], ids=["array", "numpy"])
+def use_numpy(request):
+    if request.param:
+        pytest.importorskip("numpy")
+    return request.param
+
+
+def test_product_list(use_numpy):
+    item = ProductList.from_dict(example_product_list_result["productList"])
+    products = [item, None, item]
+    table = to_table(products, use_numpy=use_numpy)
+    assert table.item_class is ProductList
+    assert len(table) == 3
+    assert table["url"].to_list() == [item.url, None, item.url]
+    assert table["paginationNext.url"].to_list() == [item.paginationNext.url, None, item.paginationNext.url]
+
+    n_products = len(item.products)
+    assert table.offsets["products"].tolist() == [0, n_products, n_products, 2 * n_products]
+    assert table["products.name"].to_list() == [product.name for product in item.products] * 2
+    assert table["products.aggregateRating.ratingValue"].kind == "float"
+
+    offers = [offer for product in item.products for offer in product.offers] * 2
+    assert table.offsets["products.offers"][-1] == len(offers)
+    assert len(table["products.offers.price"]) == len(offers)
+    assert table["products.offers.currency"].to_list() == [offer.currency for offer in offers]
+    assert table["products.images"].to_list() == [image for product in item.products for image in product.images] * 2
+
+
+def test_types(use_numpy):
+    offers = [Offer(price="10", currency="USD"), Offer(price="20", currency="USD"), Offer(currency="EUR")]
+    table = to_table(offers, use_numpy=use_numpy)
+    currency = table["currency"]
+    assert currency.categories == ["USD", "EUR"]
+    assert currency.values.tolist() == [0, 0, 1]
+    assert table["price"].to_list() == ["10", "20", None]
+    assert table["price"].valid.tolist() == [1, 1, 0]
+
+    table = to_table(offers, strings="object", use_numpy=use_numpy)
+    assert table["currency"].categories is None
+    assert list(table["currency"].values) == ["USD", "USD", "EUR"]
+
+    reviews = [Review.from_dict(review) for review in example_reviews_result["reviews"]["reviews"]]
+    reviews.append(Review(name="empty"))
+    table = to_table(reviews, use_numpy=use_numpy)
+    ratings = table["reviewRating.ratingValue"]
+    assert ratings.to_list() == [review.reviewRating and review.reviewRating.ratingValue for review in reviews]
+    assert math.isnan(ratings.values[-1])
+    assert table["votedHelpful"].kind == "int"
+    assert table["votedHelpful"].to_list() == [review.votedHelpful for review in reviews]
+    assert table["isVerified"].kind == "bool"
+    assert table["isVerified"].to_list() == [review.isVerified for review in reviews]
+
+
+def test_product():
+    item = Product.from_dict(example_product_result["product"])
+    table = to_table([item], use_numpy=False)
+    assert table["offers.price"].to_list() == [offer.price for offer in item.offers]
+    assert table["gtin.type"].to_list() == [gtin.type for gtin in item.gtin]
+    assert table["aggregateRating.reviewCount"].to_list() == [item.aggregateRating.reviewCount]
+
+
+def test_empty_and_errors():
+    table = to_table([], Offer, use_numpy=False)
+    assert len(table) == 0
+    assert len(table["price"]) == 0
+    with pytest.raises(ValueError):
+        to_table([], Offer, strings="unknown")
+    # The class of the items must be given if there are none
+    with pytest.raises(ValueError, match="class of the items"):
+        to_table([])
+    with pytest.raises(ValueError, match="class of the items"):
+        to_table([None, None])
+    assert len(to_table([None, None], Offer)["price"]) == 2
+
+
+def test_values_not_matching_annotations(use_numpy):
+    ratings = [Rating(ratingValue=4.5), Rating(ratingValue="n/a"), Rating(reviewCount=4.7), Rating(reviewCount=3)]
+    table = to_table(ratings, use_numpy=use_numpy)
+    assert table["ratingValue"].kind == "object"
+    assert table["ratingValue"].to_list() == [4.5, "n/a", None, None]
+    assert table["reviewCount"].kind == "object"
+    assert table["reviewCount"].to_list() == [None, None, 4.7, 3]
+    assert table["bestRating"].kind == "float"
+
+    # Integers are valid floats, but booleans are not numbers
+    table = to_table([Rating(ratingValue=4), Rating(ratingValue=True)], use_numpy=use_numpy)
+    assert table["ratingValue"].kind == "object"
+    assert table["ratingValue"].to_list() == [4, True]
+    table = to_table([Rating(ratingValue=4), Rating(ratingValue=4.5)], use_numpy=use_numpy)
+    assert table["ratingValue"].kind == "float"
+    assert table["ratingValue"].to_list() == [4.0, 4.5]
+
+    table = to_table([Offer(price="1"), Offer(price=["1"])], use_numpy=use_numpy)
+    assert table["price"].kind == "object"
+    assert table["price"].to_list() == ["1", ["1"]]
+
+
+def test_recursive_definition(use_numpy):
+    tree = Node("root", [Node("a", [Node("b")]), Node("c")])
+    table = to_table([tree, Node("other")], use_numpy=use_numpy)
+    assert table["name"].to_list() == ["root", "other"]
+    assert table.offsets["children"].tolist() == [0, 2, 2]
+    assert table["children"].kind == "object"
+    assert table["children"].to_list() == tree.children
+
+
+class FakeArray(list):
+    def __init__(self, values, dtype):
+        super().__init__(values)
+        self.dtype = dtype
+
+    def tolist(self):
+        return list(self)
+
+
+def test_numpy_conversions(monkeypatch):
+    # Covers the NumPy code path without NumPy installed
+    fake_numpy = types.SimpleNamespace(
+        array=lambda values, dtype: FakeArray(values, dtype),
+        empty=lambda size, dtype: FakeArray([None] * size, dtype),
+    )
+    monkeypatch.setattr(columnar, "np", fake_numpy)
+    reviews = [Review(name="a", votedHelpful=2, isVerified=True, reviewRating=Rating(ratingValue=4.5)), None]
+    table = to_table(reviews, use_numpy=True)
+    assert table["reviewRating.ratingValue"].values.dtype == "float64"
+    assert table["votedHelpful"].values.dtype == "int64"
+    assert table["isVerified"].values.dtype == "int8"
+    assert table["name"].values.dtype == "int32"
+    assert table["name"].valid.dtype == "bool"
+    assert table["isVerified"].to_list() == [True, None]
+    assert to_table([Rating(ratingValue="n/a")], use_numpy=True)["ratingValue"].values.dtype is object
+    table = to_table(reviews, strings="object", use_numpy=True)
+    assert table["name"].values.dtype is object
+    assert table["name"].to_list() == ["a", None]
@@ -0,0 +1,191 @@
+from typing import List, Optional
+
+import attr
+import pytest
+
+from autoextract_poet.adapters import AutoExtractAdapter
+from autoextract_poet.decoders import (
+    CustomDecoders,
+    _generic_decoder,
+    compile_decoder,
+    get_decoder,
+)
+from autoextract_poet.items import (
+    GTIN,
+    Item,
+    Offer,
+    Product,
+    ProductFromList,
+    ProductList,
+    Rating,
+    get_nested_fields,
+)
+from tests import crazy_monkey_nullify, load_fixture, temp_seed
+
+example_product_result = load_fixture("sample_product.json")[0]
+example_product_list_result = load_fixture("sample_product_list.json")[0]
+
+
+@attr.s(auto_attribs=True, slots=True)
+class Node(Item):
+    name: Optional[str] = None
+    children: List["Node"] = attr.Factory(list)
+
+
+@attr.s(auto_attribs=True, slots=True)
+class Validated(Item):
+    value: int = attr.ib(default=0, converter=int)  # type: ignore[arg-type]
+    rating: Optional[Rating] = None
+
+
+@attr.s(auto_attribs=True, slots=True)
+class CustomRating(Rating):
+    @classmethod
+    def from_dict(cls, item):
+        obj = super().from_dict(item)
+        if obj:
+            obj.ratingValue = -1
+        return obj
+
+
+@attr.s(auto_attribs=True, slots=True)
+class CustomProduct(Item):
+    rating: Optional[CustomRating] = None
+
+
+def test_decoder_is_cached():
+    decoder = get_decoder(Product)
+    assert get_decoder(Product) is decoder
+    assert Product.__dict__["_decoder"] is decoder
+    # Subclasses get their own decoder
+    assert get_decoder(CustomRating) is not get_decoder(Rating)
+
+
+@pytest.mark.parametrize(
+    "cls, data",
+    [
+        (Product, example_product_result["product"]),
+        (ProductList, example_product_list_result["productList"]),
+    ],
+)
+def test_compiled_matches_generic(cls, data):
+    compiled = compile_decoder(cls)
+    generic = _generic_decoder(cls, get_nested_fields(cls))
+    with temp_seed(7):
+        for input in [data, {**data, "extra": [1]}] + [crazy_monkey_nullify(data) for _ in range(10)]:
+            expected, actual = generic(input), compiled(input)
+            assert actual == expected
+            assert actual._unknown_fields_dict == expected._unknown_fields_dict
+
+
+def test_compiled_source():
+    source = get_decoder(Offer).__source__
+    assert "obj.price = get('price')" in source
+
+
+def test_missing_required_field():
+    with pytest.raises(TypeError):
+        GTIN.from_dict({"type": "isbn"})
+    assert GTIN.from_dict({"type": "isbn", "value": "1"}) == GTIN("isbn", "1")
+
+
+def test_nested_unknown_fields():
+    data = {"offers": [{"price": "1", "extra": 1}], "aggregateRating": {"other": 2}, "extra": 3}
+    item = ProductFromList.from_dict(data)
+    assert item._unknown_fields_dict == {"extra": 3}
+    assert item.offers[0]._unknown_fields_dict == {"extra": 1}
+    assert item.aggregateRating._unknown_fields_dict == {"other": 2}
+
+
+def test_empty_and_absent_values():
+    item = ProductFromList.from_dict({"offers": None, "aggregateRating": {}, "images": None})
+    assert item.offers == []
+    assert item.aggregateRating is None
+    assert item.images is None
+    assert ProductFromList.from_dict({"url": "x"}).images == []
+    assert ProductFromList.from_dict({"offers": [None, {}, {"price": "1"}]}).offers == [None, None, Offer(price="1")]
+
+
+def test_recursive_definition():
+    assert get_nested_fields(Node) == {"children": (Node, True)}
+    item = Node.from_dict({"name": "a", "children": [{"name": "b", "children": [{"name": "c"}]}]})
+    assert item == Node("a", [Node("b", [Node("c")])])
+
+
+def test_generic_fallback():
+    item = Validated.from_dict({"value": "3", "rating": {"ratingValue": 4.5}, "extra": 1})
+    assert item == Validated(3, Rating(ratingValue=4.5))
+    assert item._unknown_fields_dict == {"extra": 1}
+    assert "__source__" not in dir(get_decoder(Validated))
+
+
+def test_nested_from_dict_override():
+    item = CustomProduct.from_dict({"rating": {"ratingValue": 4.5}})
+    assert item.rating.ratingValue == -1
+
+
+def test_lazy_decoder():
+    data = example_product_list_result["productList"]
+    item = ProductList.from_dict_lazy({**data, "extra": 1})
+    assert isinstance(item, ProductList)
+    assert type(item) is not ProductList
+    assert item._unknown_fields_dict == {"extra": 1}
+    assert type(item).__qualname__ == "ProductList"
+
+    # Nested fields are kept raw until accessed
+    slot = ProductList.__dict__["products"]
+    assert slot.__get__(item).value is data["products"]
+    assert item.url == data["url"]
+    products = item.products
+    assert slot.__get__(item) is products
+    assert item.products is products
+    assert isinstance(products[0], ProductFromList)
+    assert isinstance(products[0].offers[0], Offer)
+    assert isinstance(item.paginationNext, Item)
+
+    # Equality holds in both directions and with nested lazy items
+    expected = ProductList.from_dict(data)
+    lazy = ProductList.from_dict_lazy(data)
+    assert lazy == expected
+    assert expected == lazy
+    assert not lazy != expected
+    assert ProductList.from_dict_lazy(data) == ProductList.from_dict_lazy(data)
+    assert lazy != ProductList.from_dict({**data, "url": "other"})
+    assert attr.asdict(ProductList.from_dict_lazy(data)) == attr.asdict(expected)
+    adapter = AutoExtractAdapter(ProductList.from_dict_lazy({**data, "extra": 1}))
+    assert list(adapter) == list(AutoExtractAdapter(expected)) + ["extra"]
+    assert adapter["products"] == expected.products
+
+
+def test_lazy_decoder_set_and_delete():
+    item = ProductFromList.from_dict_lazy({"offers": [{"price": "1"}], "aggregateRating": {"ratingValue": 1.0}})
+    item.offers = [Offer(price="2")]
+    assert item.offers == [Offer(price="2")]
+    del item.aggregateRating
+    assert not hasattr(item, "aggregateRating")
+    item = ProductFromList.from_dict_lazy({})
+    assert item is None
+    item = ProductFromList.from_dict_lazy({"url": "x", "offers": None})
+    assert item.offers == []
+    assert item.aggregateRating is None
+
+
+def test_lazy_decoder_fallback():
+    # Nothing to defer
+    assert type(Offer.from_dict_lazy({"price": "1"})) is Offer
+    # Not compiled
+    assert type(Validated.from_dict_lazy({"value": "1"})) is Validated
+    item = Node.from_dict_lazy({"name": "a", "children": [{"name": "b", "children": [{"name": "c"}]}]})
+    assert item == Node("a", [Node("b", [Node("c")])])
+    assert type(item.children[0]) is type(item)
+
+
+def test_custom_decoders_compile_is_abstract():
+    with pytest.raises(TypeError):
+        CustomDecoders()  # type: ignore[abstract]
+
+    class Plain(CustomDecoders):
+        def compile(self, cls):
+            return compile_decoder(cls, reader=self.reader)
+
+    assert Plain().from_dict(Offer, {"price": "1"}) == Offer(price="1")
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from autoextract_poet import (
+    AutoExtractArticleData,
+    AutoExtractProductData,
+    AutoExtractProductListData,
+)
+from autoextract_poet.dispatch import Batch, dispatch
+from autoextract_poet.items import Article, Product, ProductFromList, ProductList
+
+
+def result(page_type, **kwargs):
+    return {"query": {"id": "1", "userQuery": {"pageType": page_type, "url": "https://example.com"}}, **kwargs}
+
+
+RESULTS = [
+    result("product", product={"name": "Chair"}),
+    result("article", article={"headline": "News"}),
+    result("product", error="Downloader error: http404"),
+    result("productList", productList={"products": [{"name": "Table"}]}),
+    result("unknown", unknown={}),
+    result("article"),
+    {"error": "Query timed out"},
+    "garbage",
+    result("product", product={"name": "Lamp"}),
+]
+
+
+def check(batch):
+    assert [type(page_input) for page_input in batch.page_inputs] == [
+        AutoExtractProductData,
+        AutoExtractArticleData,
+        AutoExtractProductListData,
+        AutoExtractProductData,
+    ]
+    items = [page_input.to_item() for page_input in batch.page_inputs]
+    assert items == [
+        Product(name="Chair"),
+        Article(headline="News"),
+        ProductList(products=[ProductFromList(name="Table")]),
+        Product(name="Lamp"),
+    ]
+    assert [(error.index, error.page_type, error.message) for error in batch.errors] == [
+        (2, "product", "Downloader error: http404"),
+        (4, "unknown", "Unknown page type: 'unknown'"),
+        (5, "article", "Missing 'article' data"),
+        (6, None, "Query timed out"),
+        (7, None, "Result is not a JSON object"),
+    ]
+    for error in batch.errors:
+        assert error.result is RESULTS[error.index] or error.result == RESULTS[error.index]
+
+
+def test_dispatch():
+    batch = dispatch(RESULTS)
+    check(batch)
+    assert batch.page_inputs[0].data is RESULTS[0]
+    groups = batch.by_page_type()
+    assert list(groups) == ["product", "article", "productList"]
+    assert [page_input.data for page_input in groups["product"]] == [RESULTS[0], RESULTS[8]]
+
+
+@pytest.mark.parametrize("encode", [json.dumps, lambda results: json.dumps(results).encode()])
+def test_dispatch_json(encode):
+    check(dispatch(encode(RESULTS)))
+
+
+def test_dispatch_empty():
+    assert dispatch([]) == Batch()
+    assert dispatch(iter([])) == Batch()
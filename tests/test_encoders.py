@@ -0,0 +1,110 @@
+import json
+
+import attr
+import pytest
+from itemadapter import ItemAdapter
+
+from autoextract_poet.adapters import AutoExtractAdapter
+from autoextract_poet.encoders import get_encoder
+from autoextract_poet.items import (
+    Article,
+    ArticleList,
+    Comments,
+    ForumPosts,
+    JobPosting,
+    Offer,
+    Product,
+    ProductList,
+    Rating,
+    RealEstate,
+    Reviews,
+    Vehicle,
+)
+from tests import crazy_monkey_nullify, load_fixture, temp_seed
+from tests.test_decoders import Node
+
+examples = [
+    (Article, load_fixture("sample_article.json")[0]["article"]),
+    (ArticleList, load_fixture("sample_article_list.json")[0]["articleList"]),
+    (Product, load_fixture("sample_product.json")[0]["product"]),
+    (ProductList, load_fixture("sample_product_list.json")[0]["productList"]),
+    (JobPosting, load_fixture("sample_job_posting.json")[0]["jobPosting"]),
+    (Comments, load_fixture("sample_comments.json")[0]["comments"]),
+    (ForumPosts, load_fixture("sample_forum_posts.json")[0]["forumPosts"]),
+    (RealEstate, load_fixture("sample_real_estate.json")[0]["realEstate"]),
+    (Reviews, load_fixture("sample_reviews.json")[0]["reviews"]),
+    (Vehicle, load_fixture("sample_vehicle.json")[0]["vehicle"]),
+]
+
+
+@pytest.fixture
+def item_adapter():
+    ItemAdapter.ADAPTER_CLASSES.appendleft(AutoExtractAdapter)
+    yield ItemAdapter
+    ItemAdapter.ADAPTER_CLASSES.popleft()
+
+
+@pytest.mark.parametrize("cls, data", examples)
+def test_round_trip(cls, data):
+    assert cls.from_dict(data).to_dict() == data
+    assert cls.from_dict_lazy(data).to_dict() == data
+
+    with temp_seed(7):
+        for _ in range(10):
+            data_with_holes = crazy_monkey_nullify(data)
+            item = cls.from_dict(data_with_holes)
+            assert item.to_dict() == attr.asdict(item)
+
+
+@pytest.mark.parametrize("cls, data", examples)
+def test_same_as_adapter(item_adapter, cls, data):
+    data = json.loads(json.dumps(data))
+    data["unknownField"] = {"nested": [1]}
+    if isinstance(data.get("offers"), list):
+        data["offers"][0]["unknownOfferField"] = "value"
+    item = cls.from_dict(data)
+    result = item.to_dict()
+    assert result == data
+    assert list(result.items()) == list(item_adapter(item).asdict().items())
+
+
+def test_unknown_fields_order():
+    item = Offer.from_dict({"extra": 1, "price": "1"})
+    item._unknown_fields_dict["price"] = "ignored"
+    assert list(item.to_dict().items()) == [
+        ("price", "1"),
+        ("currency", None),
+        ("availability", None),
+        ("regularPrice", None),
+        ("extra", 1),
+    ]
+
+
+def test_deleted_fields():
+    item = Product.from_dict({"url": "x", "aggregateRating": {"ratingValue": 1.0}})
+    del item.url
+    result = item.to_dict()
+    assert "url" not in result
+    assert result["aggregateRating"] == {"ratingValue": 1.0, "bestRating": None, "reviewCount": None}
+
+
+def test_unexpected_values():
+    @attr.s(auto_attribs=True, slots=True)
+    class CustomRating(Rating):
+        custom: int = 0
+
+    item = Product(offers=None, aggregateRating=CustomRating(ratingValue=1.0, custom=1))  # type: ignore
+    result = item.to_dict()
+    assert result["offers"] is None
+    assert result["aggregateRating"] == {"ratingValue": 1.0, "bestRating": None, "reviewCount": None, "custom": 1}
+
+
+def test_recursive_definition():
+    data = {"name": "a", "children": [{"name": "b", "children": [{"name": "c", "children": []}]}]}
+    assert Node.from_dict(data).to_dict() == data
+
+
+def test_encoder_is_cached():
+    encoder = get_encoder(Product)
+    assert get_encoder(Product) is encoder
+    assert Product.__dict__["_encoder"] is encoder
@@ -0,0 +1,127 @@
+import attr
+import pytest
+from itemadapter import ItemAdapter
+
+from autoextract_poet.adapters import AutoExtractAdapter
+from autoextract_poet.flyweight import Flyweights, freeze, is_frozen, thaw
+from autoextract_poet.items import (
+    ArticleList,
+    Breadcrumb,
+    Offer,
+    PaginationLink,
+    Product,
+    ProductList,
+    Rating,
+)
+
+
+def product_list(page):
+    return {
+        "products": [{"name": f"Product {page}"}],
+        "breadcrumbs": [{"name": "Home", "link": "/"}, {"name": "Chairs", "link": "/chairs", "extra": 1}],
+        "paginationNext": {"url": "/next", "text": "Next"},
+    }
+
+
+def test_flyweights():
+    flyweights = Flyweights()
+    data = [product_list(1), product_list(2)]
+    first, second = flyweights.from_dicts(ProductList, data)
+    assert [first, second] == ProductList.from_dicts(data)
+    assert first.breadcrumbs[0] is second.breadcrumbs[0]
+    assert first.breadcrumbs[1] is second.breadcrumbs[1]
+    assert first.breadcrumbs[1]._unknown_fields_dict == {"extra": 1}
+    assert first.paginationNext is second.paginationNext
+    assert first.products[0] is not second.products[0]
+    assert len(flyweights) == 3
+    assert not is_frozen(first) and not is_frozen(first.products[0])
+
+    flyweights.clear()
+    assert len(flyweights) == 0
+    third = flyweights.from_dict(ProductList, product_list(3))
+    assert third.breadcrumbs[0] is not first.breadcrumbs[0]
+    assert third.breadcrumbs[0] == first.breadcrumbs[0]
+
+
+def test_flyweights_classes():
+    flyweights = Flyweights(classes=[Offer])
+    data = {"offers": [{"price": "1"}, {"price": "1"}], "breadcrumbs": [{"name": "A"}, {"name": "A"}]}
+    product = flyweights.from_dict(Product, data)
+    assert product.offers[0] is product.offers[1]
+    assert product.breadcrumbs[0] is not product.breadcrumbs[1]
+    assert not is_frozen(product.breadcrumbs[0])
+
+
+def test_flyweights_max_size():
+    flyweights = Flyweights(max_size=1)
+    links = [flyweights.from_dict(PaginationLink, {"url": url}) for url in ["/1", "/2", "/1", "/2"]]
+    assert len(flyweights) == 1
+    assert links[0] is links[2]
+    assert links[1] is not links[3]
+    # Frozen even when not shared, so the contract doesn't depend on the cache
+    assert all(is_frozen(link) for link in links)
+
+
+def test_flyweights_unhashable():
+    flyweights = Flyweights(classes=[Breadcrumb])
+    first, second = [flyweights.from_dict(Breadcrumb, {"name": "A", "extra": [1]}) for _ in range(2)]
+    assert first == second
+    assert first is not second
+    assert is_frozen(first)
+    assert len(flyweights) == 0
+
+
+def test_flyweights_value_types():
+    flyweights = Flyweights(classes=[Rating])
+    values = [{"ratingValue": 1}, {"ratingValue": True}, {"ratingValue": 1.0}, {"ratingValue": 4.0}, {"ratingValue": 4}]
+    ratings = [flyweights.from_dict(Rating, data) for data in values]
+    assert [rating.ratingValue.__class__ for rating in ratings] == [int, bool, float, float, int]
+    assert len(flyweights) == 5
+
+    # The order of the keys doesn't matter, but absent and null values do
+    first = flyweights.from_dict(Rating, {"ratingValue": 1, "bestRating": 5, "extra": 1, "other": 2})
+    assert flyweights.from_dict(Rating, {"other": 2, "bestRating": 5, "extra": 1, "ratingValue": 1}) is first
+    assert flyweights.from_dict(Rating, {"ratingValue": 1, "bestRating": 5, "extra": True, "other": 2}) is not first
+    absent = flyweights.from_dict(Rating, {"ratingValue": 2})
+    assert flyweights.from_dict(Rating, {"ratingValue": 2}) is absent
+    assert flyweights.from_dict(Rating, {"ratingValue": 2, "bestRating": None}) is not absent
+
+
+def test_flyweights_empty():
+    flyweights = Flyweights()
+    article_list = flyweights.from_dict(ArticleList, {"url": "/news", "paginationNext": {}})
+    assert article_list.paginationNext is None
+    assert flyweights.from_dict(PaginationLink, None) is None
+
+
+def test_frozen_items():
+    link = freeze(PaginationLink.from_dict({"url": "/next", "extra": "value"}))
+    assert is_frozen(link)
+    assert freeze(link) is link
+    assert link == PaginationLink(url="/next")
+    assert PaginationLink(url="/next") == link
+    assert link != PaginationLink(url="/other")
+    assert type(link).__name__ == "PaginationLink"
+    assert isinstance(link, PaginationLink)
+    with pytest.raises(attr.exceptions.FrozenInstanceError):
+        link.url = "/other"
+    with pytest.raises(attr.exceptions.FrozenInstanceError):
+        del link.url
+    with pytest.raises(TypeError):
+        link._unknown_fields_dict["extra"] = "other"  # type: ignore[index]
+    assert link.to_dict() == {"url": "/next", "text": None, "extra": "value"}
+    assert list(AutoExtractAdapter(link)) == ["url", "text", "extra"]
+    assert ItemAdapter(link).asdict() == {"url": "/next", "text": None}
+
+
+def test_thaw():
+    link = freeze(PaginationLink.from_dict({"url": "/next", "extra": "value"}))
+    copy = thaw(link)
+    assert not is_frozen(copy)
+    assert type(copy) is PaginationLink
+    assert copy == link
+    copy.url = "/other"
+    copy._unknown_fields_dict["extra"] = "other"
+    assert link.url == "/next"
+    assert link._unknown_fields_dict == {"extra": "value"}
+    assert thaw(copy) is copy
@@ -0,0 +1,107 @@
+from typing import Optional
+
+import attr
+
+from autoextract_poet.decoders import compile_decoder
+from autoextract_poet.interning import Interner, InternTable
+from autoextract_poet.items import Article, Breadcrumb, Item, Offer, Product
+from tests.test_decoders import Node
+
+
+def copy(value: str) -> str:
+    """Return a different object equal to ``value``"""
+    return "".join(list(value))
+
+
+def product(price):
+    return {
+        "name": copy("Chair"),
+        "offers": [{"price": price, "currency": copy("USD"), "availability": copy("InStock")}],
+        "breadcrumbs": [{"name": copy("Home")}, {"name": copy("Furniture"), "link": "https://example.com"}],
+        "extra": copy("unknown"),
+    }
+
+
+def test_interner():
+    interner = Interner()
+    data = [product("1"), product("2"), None]
+    items = interner.from_dicts(Product, data)
+    assert items == Product.from_dicts(data)
+    first, second, _ = items
+    assert first.offers[0].currency is second.offers[0].currency
+    assert first.offers[0].availability is second.offers[0].availability
+    assert first.breadcrumbs[1].name is second.breadcrumbs[1].name
+    # Fields not in the policy are kept as they are
+    assert first.name is not second.name
+    assert first._unknown_fields_dict["extra"] is not second._unknown_fields_dict["extra"]
+    assert len(interner.table) == 4
+    assert interner.from_dict(Product, product("3")).offers[0].currency is first.offers[0].currency
+
+
+def test_interner_non_strings():
+    interner = Interner({Offer: ["price", "currency"]})
+    offer = interner.from_dict(Offer, {"price": 12, "currency": None})
+    assert offer == Offer(price=12, currency=None)  # type: ignore[arg-type]
+    assert len(interner.table) == 0
+
+
+def test_interner_policy():
+    interner = Interner({Article: ["headline"]})
+    first = interner.from_dict(Article, {"headline": copy("News"), "inLanguage": copy("en")})
+    second = interner.from_dict(Article, {"headline": copy("News"), "inLanguage": copy("en")})
+    assert first.headline is second.headline
+    assert first.inLanguage is not second.inLanguage
+    assert interner.fields_for(Article) == {"headline"}
+    assert Interner().fields_for(Article) == {"inLanguage"}
+
+
+def test_interner_subclasses():
+    @attr.s(auto_attribs=True, slots=True)
+    class CustomBreadcrumb(Breadcrumb):
+        position: Optional[str] = None
+
+    interner = Interner({Breadcrumb: ["name"], CustomBreadcrumb: ["position"]})
+    assert interner.fields_for(CustomBreadcrumb) == {"name", "position"}
+    first = interner.from_dict(CustomBreadcrumb, {"name": copy("Home"), "position": copy("10")})
+    second = interner.from_dict(CustomBreadcrumb, {"name": copy("Home"), "position": copy("10")})
+    assert first.name is second.name
+    assert first.position is second.position
+
+
+def test_interner_generic_decoder():
+    # Classes that can't be compiled go through __init__, interning too
+    @attr.s(auto_attribs=True, slots=True)
+    class Converted(Item):
+        name: str = attr.ib(default="", converter=str)
+
+    interner = Interner({Converted: ["name"]})
+    first = interner.from_dict(Converted, {"name": copy("value")})
+    second = interner.from_dict(Converted, {"name": copy("value")})
+    assert first.name is second.name
+
+
+def test_interner_recursive():
+    interner = Interner({Node: ["name"]})
+    node = interner.from_dict(Node, {"name": copy("root"), "children": [{"name": copy("root")}]})
+    assert node.children[0].name is node.name
+
+
+def test_intern_table_bounded():
+    table = InternTable(max_size=2)
+    interner = Interner(table=table)
+    items = [
+        interner.from_dict(Offer, {"price": "1", "currency": copy(currency)})
+        for currency in ["AA", "BB", "CC", "DD"] * 2
+    ]
+    assert len(table) == 2
+    assert "AA" in table and "CC" not in table
+    assert items[0].currency is items[4].currency
+    assert items[2].currency is not items[6].currency
+    assert [item.currency for item in items] == ["AA", "BB", "CC", "DD"] * 2
+    table.clear()
+    assert len(table) == 0
+
+
+def test_string_hooks():
+    decode = compile_decoder(Offer, string_hooks={"currency": str.lower, "price": str.upper})
+    assert decode({"price": "abc", "currency": "USD"}) == Offer(price="ABC", currency="usd")
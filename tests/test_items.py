@@ -1,6 +1,10 @@
+import pickle
+from typing import TYPE_CHECKING, ClassVar, List, Optional
+
 import attr
 import pytest
 
+from autoextract_poet.flyweight import freeze
 from autoextract_poet.items import (
     GTIN,
     AdditionalProperty,
@@ -20,6 +24,7 @@ from autoextract_poet.items import (
     JobPosting,
     Location,
     MileageFromOdometer,
+    NestedFields,
     Offer,
     Organization,
     PaginationLink,
@@ -35,6 +40,7 @@ from autoextract_poet.items import (
     TradeAction,
     Vehicle,
     VehicleEngine,
+    get_nested_fields,
 )
 from tests import crazy_monkey_nullify, load_fixture, temp_seed
 from tests.typing import assert_type_compliance
@@ -50,6 +56,11 @@ example_real_estate_result = load_fixture("sample_real_estate.json")[0]
 example_reviews_result = load_fixture("sample_reviews.json")[0]
 example_vehicle_result = load_fixture("sample_vehicle.json")[0]
 
+if TYPE_CHECKING:
+    # Only defined for type checkers, so that annotations using it can't be
+    # resolved at runtime
+    UnknownRating = Rating
+
 
 @pytest.mark.parametrize(
     "cls, data",
@@ -112,6 +123,227 @@ def test_from_list():
     assert Number.from_list([]) == []
 
 
+@pytest.mark.parametrize(
+    "cls, expected",
+    [
+        (Offer, {}),
+        (Article, {"breadcrumbs": (Breadcrumb, True)}),
+        (
+            ArticleList,
+            {
+                "articles": (ArticleFromList, True),
+                "paginationNext": (PaginationLink, False),
+                "paginationPrevious": (PaginationLink, False),
+            },
+        ),
+        (
+            Product,
+            {
+                "offers": (Offer, True),
+                "gtin": (GTIN, True),
+                "breadcrumbs": (Breadcrumb, True),
+                "additionalProperty": (AdditionalProperty, True),
+                "aggregateRating": (Rating, False),
+            },
+        ),
+        (ProductFromList, {"offers": (Offer, True), "aggregateRating": (Rating, False)}),
+        (
+            JobPosting,
+            {
+                "hiringOrganization": (Organization, False),
+                "baseSalary": (Salary, False),
+                "jobLocation": (Location, False),
+            },
+        ),
+        (Comments, {"comments": (Comment, True)}),
+        (ForumPosts, {"topic": (Topic, False), "posts": (ForumPost, True)}),
+        (Review, {"reviewRating": (Rating, False)}),
+    ],
+)
+def test_nested_fields(cls, expected):
+    assert cls.__dict__["_nested_fields"] == expected
+    assert get_nested_fields(cls) == expected
+
+
+def test_nested_fields_on_definition():
+    @attr.s(auto_attribs=True, slots=True)
+    class Extended(Offer):
+        rating: Optional[Rating] = None
+        gtin: List[GTIN] = attr.Factory(list)
+
+    assert Extended.__dict__["_nested_fields"] == {"rating": (Rating, False), "gtin": (GTIN, True)}
+    item = Extended.from_dict({"price": "1", "rating": {"ratingValue": 3.0}, "gtin": [{"type": "a", "value": "b"}]})
+    assert item == Extended(price="1", rating=Rating(ratingValue=3.0), gtin=[GTIN("a", "b")])
+
+    @attr.s(auto_attribs=True)
+    class NotSlotted(Item):
+        rating: Optional[Rating] = None
+
+    assert "_nested_fields" not in NotSlotted.__dict__
+    assert get_nested_fields(NotSlotted) == {"rating": (Rating, False)}
+    assert NotSlotted.from_dict({"rating": {"ratingValue": 3.0}}).rating == Rating(ratingValue=3.0)
+
+
+def test_nested_fields_unresolved():
+    @attr.s(auto_attribs=True, slots=True)
+    class Unresolved(Item):
+        rating: Optional["UnknownRating"] = None
+
+    with pytest.raises(TypeError, match="Unresolved"):
+        Unresolved.from_dict({"rating": {"ratingValue": 3.0}})
+
+    @attr.s(auto_attribs=True, slots=True)
+    class Declared(Item):
+        rating: Optional["UnknownRating"] = None
+
+        _nested_fields: ClassVar[NestedFields] = {"rating": (Rating, False)}
+
+    assert "_nested_fields" not in Declared.__dict__
+    with pytest.warns(UserWarning, match="declared _nested_fields"):
+        assert get_nested_fields(Declared) == {"rating": (Rating, False)}
+    assert Declared.from_dict({"rating": {"ratingValue": 3.0}}).rating == Rating(ratingValue=3.0)
+
+    @attr.s(auto_attribs=True, slots=True)
+    class Overridden(Item):
+        rating: Optional[Rating] = None
+
+        _nested_fields: ClassVar[NestedFields] = {}
+
+    # The annotations take precedence when they can be resolved
+    assert get_nested_fields(Overridden) == {"rating": (Rating, False)}
+
+
+def test_from_dicts():
+    data = example_product_list_result["productList"]["products"]
+    assert ProductFromList.from_dicts(data) == [ProductFromList.from_dict(product) for product in data]
+    assert ProductFromList.from_dicts(iter([None, {}])) == [None, None]
+    assert ProductFromList.from_dicts([]) == []
+
+    @attr.s(auto_attribs=True, slots=True)
+    class Doubled(Item):
+        value: int
+
+        @classmethod
+        def from_dict(cls, item):
+            return cls(item["value"] * 2)
+
+    assert Doubled.from_dicts([dict(value=1), dict(value=2)]) == [Doubled(2), Doubled(4)]
+
+
+@pytest.mark.parametrize(
+    "item",
+    [
+        Offer(),
+        Offer.from_dict({"price": "1"}),
+        Offer.from_dict_lazy({"price": "1"}),
+        Product.from_dict({"offers": [{"price": "1"}]}).offers[0],
+    ],
+)
+def test_unknown_fields_created_on_demand(item):
+    # No dict is allocated for the items without unknown fields
+    assert item._unknown_fields is None
+    assert item.to_dict()["price"] == item.price
+    assert item._unknown_fields is None
+    item._unknown_fields_dict["extra"] = 1
+    assert item._unknown_fields == {"extra": 1}
+    assert item._unknown_fields_dict is item._unknown_fields
+    assert item.to_dict()["extra"] == 1
+    item._unknown_fields_dict = {"other": 2}
+    assert item._unknown_fields == {"other": 2}
+
+
+def test_unknown_fields_kept():
+    offer = Offer.from_dict({"price": "1", "extra": 1})
+    assert offer._unknown_fields == {"extra": 1}
+    assert offer._unknown_fields_dict is offer._unknown_fields
+
+
+@pytest.mark.parametrize(
+    "result, cls",
+    [
+        (example_product_result["product"], Product),
+        (example_product_list_result["productList"], ProductList),
+        (example_reviews_result["reviews"], Reviews),
+    ],
+)
+def test_pickle(result, cls):
+    item = cls.from_dict({**result, "extra": [1]})
+    restored = pickle.loads(pickle.dumps(item))
+    assert type(restored) is cls
+    assert restored == item
+    assert restored.to_dict() == item.to_dict()
+    assert restored._unknown_fields == {"extra": [1]}
+
+
+def test_pickle_nested():
+    product = Product.from_dict({"offers": [{"price": "1", "extra": 1}, {"price": "2"}]})
+    restored = pickle.loads(pickle.dumps(product))
+    assert restored.offers == product.offers
+    assert restored.offers[0]._unknown_fields == {"extra": 1}
+    assert restored.offers[1]._unknown_fields is None
+    assert restored._unknown_fields is None
+
+
+def test_pickle_variants():
+    lazy = Product.from_dict_lazy({"offers": [{"price": "1"}], "extra": 1})
+    restored = pickle.loads(pickle.dumps(lazy))
+    assert type(restored) is Product
+    assert type(restored.offers[0]) is Offer
+    assert restored.to_dict() == lazy.to_dict()
+
+    frozen = freeze(Offer.from_dict({"price": "1", "extra": 1}))
+    restored = pickle.loads(pickle.dumps(frozen))
+    assert type(restored) is Offer
+    assert restored._unknown_fields == {"extra": 1}
+    restored.price = "2"
+
+
+@attr.s(auto_attribs=True, slots=True)
+class KeywordOnly(Item):
+    name: Optional[str] = None
+    price: Optional[str] = attr.ib(default=None, kw_only=True)
+
+
+@attr.s(auto_attribs=True, slots=True)
+class NotInInit(Item):
+    name: Optional[str] = None
+    count: int = attr.ib(default=0, init=False)
+
+
+def bracket(value: str) -> str:
+    return f"<{value}>"
+
+
+@attr.s(auto_attribs=True, slots=True)
+class Converted(Item):
+    value: str = attr.ib(default="", converter=bracket)  # type: ignore[arg-type]
+
+
+def test_pickle_not_positional():
+    item = KeywordOnly("a", price="1")
+    restored = pickle.loads(pickle.dumps(item))
+    assert restored == item
+    assert restored._unknown_fields is None
+
+    item = NotInInit("a")
+    item.count = 3
+    restored = pickle.loads(pickle.dumps(item))
+    assert restored == item
+    assert restored.count == 3
+
+    # Converters are not applied again
+    item = Converted("a")
+    assert pickle.loads(pickle.dumps(item)).value == "<a>"
+
+
+def test_pickle_deleted_fields():
+    offer = Offer(price="1", currency="EUR")
+    del offer.currency
+    restored = pickle.loads(pickle.dumps(offer))
+    assert restored.price == "1"
+    assert not hasattr(restored, "currency")
+
+
 def assert_all_isinstance(lst, cls):
     assert all(isinstance(el, cls) for el in lst)
 
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from autoextract_poet import json_backends
+from autoextract_poet.items import Product
+from autoextract_poet.page_inputs import (
+    AutoExtractArticleData,
+    AutoExtractProductData,
+    items_from_json,
+    page_inputs_from_json,
+)
+from tests import load_fixture
+
+example_article_result = load_fixture("sample_article.json")
+example_product_result = load_fixture("sample_product.json")
+
+
+@pytest.fixture(params=list(json_backends.BACKENDS))
+def backend(request):
+    try:
+        json_backends.get_loads(request.param)
+    except ImportError:
+        pytest.skip(f"{request.param} is not installed")
+    previous = json_backends.backend_name
+    yield json_backends.set_backend(request.param)
+    json_backends.set_backend(previous)
+
+
+def test_default_backend():
+    assert json_backends.backend_name == json_backends.available_backends()[0]
+    assert json_backends.get_loads() is json_backends.loads
+    assert "json" in json_backends.available_backends()
+    with pytest.raises(ValueError):
+        json_backends.get_loads("unknown")
+
+
+@pytest.mark.parametrize("encode", [lambda s: s, str.encode])
+def test_from_json(backend, encode):
+    data = example_product_result[0]["product"]
+    raw = encode(json.dumps({**data, "extra": 1}))
+    item = Product.from_json(raw)
+    assert item == Product.from_dict(data)
+    assert item._unknown_fields_dict == {"extra": 1}
+
+
+def test_page_inputs_from_json(backend):
+    raw = json.dumps(example_product_result + example_article_result).encode()
+    page_inputs = page_inputs_from_json(raw)
+    assert page_inputs == [
+        AutoExtractProductData(example_product_result[0]),
+        AutoExtractArticleData(example_article_result[0]),
+    ]
+    assert items_from_json(raw) == [page_input.to_item() for page_input in page_inputs]
+    assert page_inputs_from_json(b"[]") == []
@@ -1,15 +1,22 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import attr
 import pytest
 
 from autoextract_poet import *  # noqa
+from autoextract_poet.items import Article, Product
 from autoextract_poet.page_inputs import (
     AutoExtractArticleListData,
     AutoExtractCommentsData,
+    AutoExtractData,
     AutoExtractForumPostsData,
     AutoExtractJobPostingData,
     AutoExtractRealEstateData,
     AutoExtractReviewsData,
     AutoExtractVehicleData,
+    estimate_size,
 )
 from autoextract_poet.pages import (
     AutoExtractArticleListPage,
@@ -58,6 +65,127 @@ def test_response_data_and_page(page_input_cls, page_cls, results):
     assert attr.asdict(page_cls(response_data).to_item()) == expected
 
 
+def test_to_items():
+    page_inputs = [
+        AutoExtractProductData(example_product_result[0]),
+        AutoExtractArticleData(example_article_result[0]),
+        AutoExtractProductData(example_product_result[0]),
+    ]
+    items = AutoExtractData.to_items(page_inputs)
+    assert items == [page_input.to_item() for page_input in page_inputs]
+    assert [type(item) for item in items] == [Product, Article, Product]
+    assert AutoExtractProductData.to_items([]) == []
+
+    with pytest.raises(KeyError):
+        AutoExtractData.to_items([AutoExtractProductData({"error": "Timeout"})])
+
+
+def test_to_items_overridden_to_item():
+    class RenamedProductData(AutoExtractProductData):
+        def to_item(self):
+            item = super().to_item()
+            item.name = "renamed"
+            return item
+
+    page_inputs = [
+        RenamedProductData({"product": {"name": "Chair"}}),
+        AutoExtractProductData({"product": {"name": "Table"}}),
+    ]
+    items = AutoExtractData.to_items(page_inputs)
+    assert [item.name for item in items] == ["renamed", "Table"]
+
+
+def test_to_item_cache():
+    data = {"product": {"name": "first"}}
+    page_input = AutoExtractProductData(data)
+    item = page_input.to_item()
+    assert page_input.to_item() is item
+    assert AutoExtractData.to_items([page_input]) == [item]
+    assert AutoExtractData.to_items([page_input])[0] is item
+    assert page_input == AutoExtractProductData({"product": {"name": "first"}})
+
+    # Modified in place
+    data["product"]["name"] = "second"
+    assert page_input.to_item() is item
+    page_input.invalidate_item()
+    assert page_input.to_item().name == "second"
+
+    # Replaced
+    page_input.data = {"product": {"name": "third"}}
+    assert page_input.to_item().name == "third"
+
+    # Populated by to_items
+    page_input = AutoExtractProductData({"product": {"name": "first"}})
+    items = AutoExtractData.to_items([page_input])
+    assert page_input.to_item() is items[0]
+
+
+def test_estimate_size():
+    assert estimate_size(None) == 1
+    assert estimate_size({"name": "Chair"}) == 1
+    assert estimate_size(example_product_list_result[0]["productList"]) == 1 + 3
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(1)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+def test_to_item_async():
+    async def to_items(page_inputs, executor, threshold):
+        return [await page_input.to_item_async(executor, threshold) for page_input in page_inputs]
+
+    data = example_product_list_result[0]
+    with RecordingExecutor() as executor:
+        # Small data: decoded in the event loop
+        page_input = AutoExtractProductListData(data)
+        [item] = asyncio.run(to_items([page_input], executor, threshold=4))
+        assert executor.submitted == 0
+        assert item == AutoExtractProductListData(data).to_item()
+        assert page_input.to_item() is item
+
+        # Large data: decoded in the executor, and cached
+        page_input = AutoExtractProductListData(data)
+        [item, cached] = asyncio.run(to_items([page_input, page_input], executor, threshold=3))
+        assert executor.submitted == 1
+        assert item == AutoExtractProductListData(data).to_item()
+        assert cached is item
+        assert page_input.to_item() is item
+
+
+def test_to_item_async_concurrent():
+    async def main(page_input):
+        return await asyncio.gather(*[page_input.to_item_async(threshold=0) for _ in range(5)])
+
+    page_input = AutoExtractProductData(example_product_result[0])
+    items = asyncio.run(main(page_input))
+    assert all(item is items[0] for item in items)
+    assert page_input.to_item() is items[0]
+
+
+def test_to_item_async_default_executor():
+    threads = []
+
+    class Recorder(Product):
+        @classmethod
+        def from_dict(cls, data):
+            threads.append(threading.current_thread())
+            return super().from_dict(data)
+
+    class RecorderData(AutoExtractProductData):
+        pass
+
+    RecorderData._item_class = Recorder
+    page_input = RecorderData({"product": {"name": "Chair"}})
+    assert asyncio.run(page_input.to_item_async(threshold=0)).name == "Chair"
+    assert threads and threads[0] is not threading.main_thread()
+
+
 def test_auto_extract_html():
     url = "https://example.com"
     html = "<html><body><p>Hello!</p></body></html>"
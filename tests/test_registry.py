@@ -0,0 +1,123 @@
+import attr
+import pytest
+
+from autoextract_poet import registry
+from autoextract_poet.items import Product
+from autoextract_poet.page_inputs import (
+    AutoExtractData,
+    AutoExtractProductData,
+    get_item_class,
+    get_page_input_class,
+)
+from autoextract_poet.pages import AutoExtractProductPage
+
+PAGE_TYPES = [
+    "article",
+    "articleList",
+    "comments",
+    "forumPosts",
+    "jobPosting",
+    "product",
+    "productList",
+    "realEstate",
+    "reviews",
+    "vehicle",
+]
+
+
+@pytest.fixture
+def restore_registry():
+    by_page_type, by_class = dict(registry._BY_PAGE_TYPE), dict(registry._BY_CLASS)
+    pages = {info.page_type: info.page_class for info in by_page_type.values()}
+    yield
+    for info in by_page_type.values():
+        info.page_class = pages[info.page_type]
+    registry._BY_PAGE_TYPE.clear()
+    registry._BY_PAGE_TYPE.update(by_page_type)
+    registry._BY_CLASS.clear()
+    registry._BY_CLASS.update(by_class)
+
+
+def test_page_types():
+    assert sorted(info.page_type for info in registry.page_types()) == PAGE_TYPES
+
+
+@pytest.mark.parametrize("page_type", PAGE_TYPES)
+def test_lookup(page_type):
+    info = registry.lookup(page_type)
+    assert info.page_input_class.page_type == page_type
+    assert get_page_input_class(page_type) is info.page_input_class
+    assert get_item_class(info.page_input_class) is info.item_class
+    assert info.page_class is not None
+    assert attr.fields(info.page_class)[0].type is info.page_input_class
+    for cls in (info.page_input_class, info.item_class, info.page_class):
+        assert registry.lookup(cls) is info
+
+
+def test_lookup_unknown():
+    with pytest.raises(KeyError):
+        registry.lookup("unknown")
+    with pytest.raises(KeyError):
+        registry.lookup(AutoExtractData)
+    assert registry.get("unknown") is None
+    assert registry.get(AutoExtractData, "default") == "default"
+    with pytest.raises(ValueError):
+        get_page_input_class("unknown")
+    with pytest.raises(ValueError):
+        get_page_input_class(None)
+
+
+def test_last_registration_wins(restore_registry):
+    @attr.s(auto_attribs=True)
+    class CustomProductData(AutoExtractProductData):
+        page_type = "product"
+
+    info = registry.lookup("product")
+    assert info.page_input_class is CustomProductData
+    assert info.item_class is Product
+    # The page class is kept until another one is registered
+    assert info.page_class is AutoExtractProductPage
+    assert registry.lookup(Product) is info
+    assert get_page_input_class("product") is CustomProductData
+
+    @registry.register_page
+    @attr.s(auto_attribs=True)
+    class CustomProductPage(AutoExtractProductPage):
+        product_data: CustomProductData
+
+    assert registry.lookup("product").page_class is CustomProductPage
+    assert registry.lookup(CustomProductPage) is info
+
+
+def test_subclasses_without_page_type_are_not_registered():
+    @attr.s(auto_attribs=True)
+    class MyProductData(AutoExtractProductData):
+        pass
+
+    assert registry.get(MyProductData) is None
+    assert registry.lookup("product").page_input_class is AutoExtractProductData
+    assert MyProductData({}).item_class is Product
+
+
+def test_unresolved_item_class_is_not_registered(restore_registry):
+    class Mixin:
+        pass
+
+    # The item class can't be resolved with the mixin first: it fails on access
+    @attr.s(auto_attribs=True)
+    class MixedProductData(Mixin, AutoExtractData[Product]):
+        page_type = "product"
+
+    assert registry.get(MixedProductData) is None
+    assert registry.lookup("product").page_input_class is AutoExtractProductData
+    with pytest.raises(AttributeError):
+        MixedProductData({}).item_class
+
+
+def test_register_page_without_page_input():
+    with pytest.raises(ValueError):
+
+        @registry.register_page
+        @attr.s(auto_attribs=True)
+        class Page:
+            data: dict
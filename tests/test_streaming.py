@@ -0,0 +1,75 @@
+import io
+import json
+
+import pytest
+
+from autoextract_poet.page_inputs import (
+    AutoExtractArticleData,
+    AutoExtractProductData,
+    AutoExtractProductListData,
+)
+from autoextract_poet.streaming import iter_page_inputs, iter_results
+from tests import load_fixture
+
+example_article_result = load_fixture("sample_article.json")
+example_product_result = load_fixture("sample_product.json")
+example_product_list_result = load_fixture("sample_product_list.json")
+
+results = example_product_result + example_article_result + example_product_list_result
+
+
+class TrickleIO(io.BytesIO):
+    """Returns at most 3 bytes per read, to split tokens and UTF-8 sequences"""
+
+    def read(self, size=-1):
+        return super().read(min(size, 3))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1024])
+@pytest.mark.parametrize("stream_cls", [io.BytesIO, TrickleIO])
+def test_iter_results(chunk_size, stream_cls):
+    content = (
+        json.dumps(results, ensure_ascii=False)
+        + "\n[]\n"
+        + json.dumps([1.25, "ünïcode", 12345, None, {"a": [1, 2]}], ensure_ascii=False)
+        + "[ 7 ]"
+    )
+    stream = stream_cls(content.encode("utf-8"))
+    expected = results + [1.25, "ünïcode", 12345, None, {"a": [1, 2]}, 7]
+    assert list(iter_results(stream, chunk_size)) == expected
+
+
+def test_iter_results_text_stream():
+    assert list(iter_results(io.StringIO(" [ 1 , 2 ] [3]  "), 1)) == [1, 2, 3]
+    assert list(iter_results(io.StringIO(""))) == []
+    assert list(iter_results(io.StringIO("  \n"))) == []
+
+
+@pytest.mark.parametrize("content", ['{"a": 1}', "[1, 2", "[1 2]", "[1,]", '[{"a": }]', "[1] x"])
+def test_iter_results_invalid(content):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_results(io.StringIO(content), 2))
+
+
+def test_iter_results_is_lazy():
+    stream = io.StringIO('[{"a": 1}, {"b": 2}, {"c": 3}]' + " " * 10000)
+    results = iter_results(stream, 8)
+    assert next(results) == {"a": 1}
+    assert stream.tell() < 100
+
+
+def test_iter_page_inputs():
+    stream = io.BytesIO(json.dumps(results).encode())
+    page_inputs = list(iter_page_inputs(stream))
+    assert page_inputs == [
+        AutoExtractProductData(example_product_result[0]),
+        AutoExtractArticleData(example_article_result[0]),
+        AutoExtractProductListData(example_product_list_result[0]),
+    ]
+
+    stream = io.BytesIO(json.dumps(example_product_result * 2).encode())
+    page_inputs = list(iter_page_inputs(stream, AutoExtractProductData))
+    assert page_inputs == [AutoExtractProductData(example_product_result[0])] * 2
+
+    with pytest.raises(ValueError):
+        list(iter_page_inputs(io.StringIO('[{"query": {"userQuery": {"pageType": "unknown"}}}]')))
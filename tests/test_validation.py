@@ -0,0 +1,117 @@
+from typing import Any, Dict, List, Optional
+
+import attr
+import pytest
+
+from autoextract_poet.flyweight import freeze
+from autoextract_poet.items import GTIN, Item, Offer, Product, ProductList, Rating
+from autoextract_poet.validation import (
+    MISSING,
+    Problem,
+    get_validator,
+    is_valid,
+    validate,
+)
+from benchmarks import item_class, load_results
+from tests.test_decoders import Node
+from tests.typing import assert_type_compliance
+
+
+@pytest.mark.parametrize("page_type, result", load_results().items())
+def test_fixtures_valid(page_type, result):
+    item = item_class(page_type).from_dict(result[page_type])
+    assert_type_compliance(item)
+    assert validate(item) == []
+    assert is_valid(item)
+    assert is_valid(item_class(page_type).from_dict_lazy(result[page_type]))
+
+
+def test_problems():
+    product = Product.from_dict(
+        {
+            "name": 1,
+            "probability": True,
+            "offers": [{"price": 2}],
+            "gtin": [{"type": 1, "value": "1"}],
+            "images": ["a", 1],
+            "aggregateRating": {"ratingValue": "high"},
+        }
+    )
+    product.offers += [None, 3]
+    product.breadcrumbs = None  # type: ignore[assignment]
+    assert not is_valid(product)
+    assert [problem.message for problem in validate(product)] == [
+        "probability: expected Optional[float], got bool",
+        "name: expected Optional[str], got int",
+        "offers[0].price: expected Optional[str], got int",
+        "offers[1]: expected Offer, got NoneType",
+        "offers[2]: expected Offer, got int",
+        "gtin[0].type: expected str, got int",
+        "breadcrumbs: expected List[Breadcrumb], got NoneType",
+        "images[1]: expected str, got int",
+        "aggregateRating.ratingValue: expected Optional[float], got str",
+    ]
+    assert validate(product)[0] == Problem("probability", "Optional[float]", True)
+
+
+def test_element_indexes():
+    # Equal elements share their identity (small ints, interned strings)
+    product = Product(images=["a", 1, "b", 1])  # type: ignore[list-item]
+    assert [problem.path for problem in validate(product)] == ["images[1]", "images[3]"]
+    offer = Offer(price=1)  # type: ignore[arg-type]
+    product = Product(offers=[Offer(), offer, offer])
+    assert [problem.path for problem in validate(product)] == ["offers[1].price", "offers[2].price"]
+
+
+def test_numbers():
+    assert is_valid(Rating(ratingValue=4, bestRating=5.0))
+    assert not is_valid(Rating(ratingValue=True))
+    assert not is_valid(Product(aggregateRating=Offer()))  # type: ignore[arg-type]
+
+
+def test_deleted_fields():
+    gtin = GTIN(type="isbn", value="1")
+    del gtin.value
+    assert validate(gtin) == [Problem("value", "str", MISSING)]
+    assert validate(gtin)[0].message == "value: expected str, got missing"
+
+
+def test_variants():
+    assert is_valid(freeze(Offer(price="1")))
+    product_list = ProductList.from_dict_lazy({"products": [{"name": 1}]})
+    assert [problem.path for problem in validate(product_list)] == ["products[0].name"]
+
+
+def test_subclasses():
+    @attr.s(auto_attribs=True, slots=True)
+    class CustomOffer(Offer):
+        stock: int = 0
+
+    product = Product(offers=[CustomOffer(stock="many")])  # type: ignore[arg-type]
+    assert [problem.message for problem in validate(product)] == ["offers[0].stock: expected int, got str"]
+
+
+def test_recursive():
+    tree = Node.from_dict({"name": "root", "children": [{"name": "child", "children": [{"name": 1}]}]})
+    assert [problem.path for problem in validate(tree)] == ["children[0].children[0].name"]
+
+
+def test_unchecked_annotations():
+    @attr.s(auto_attribs=True, slots=True)
+    class Custom(Item):
+        anything: Any = None
+        mapping: Dict[str, str] = attr.Factory(dict)
+        values: List[Optional[int]] = attr.Factory(list)
+
+    assert is_valid(Custom(anything=object(), values=[1, None]))
+    assert [problem.path for problem in validate(Custom(mapping=[], values=["1"]))] == ["mapping", "values[0]"]
+    custom = Custom()
+    del custom.anything
+    assert [problem.path for problem in validate(custom)] == ["anything"]
+
+
+def test_validator_cached():
+    validator = get_validator(Offer)
+    assert get_validator(Offer) is validator
+    assert Offer.__dict__["_validator"] is validator
+    assert "def validate(obj)" in validator.__source__  # type: ignore[attr-defined]